@@ -8,52 +8,19 @@ cp /etc/zabbix/zabbix_agentd.d/network_logs.conf /etc/zabbix/zabbix_agentd.d/net
 
 echo "✓ Backup de configuración creado"
 
-# Crear configuración final con IPs reales identificadas
-sudo tee /etc/zabbix/zabbix_agentd.d/network_logs.conf > /dev/null << 'EOF'
-# Universidad - Configuración Syslog FINAL
-# Con IPs reales identificadas
-
-# ROUTERS
-# R1 (192.168.1.250) - Identificado en logs reales
-UserParameter=network.log.r1,tail -n 10 /var/log/network/192.168.1.250.log
-
-# R2 (192.168.1.242) - Interface principal identificada
-# Nota: R2 tiene dos interfaces, usamos la del enlace R1-R2
-UserParameter=network.log.r2,tail -n 10 /var/log/network/192.168.1.242.log
-
-# R2 Interface secundaria (opcional) - enlace R2-R3
-UserParameter=network.log.r2.alt,tail -n 10 /var/log/network/192.168.1.245.log
-
-# R3 (172.16.0.1) - YA FUNCIONANDO CORRECTAMENTE
-UserParameter=network.log.r3,tail -n 10 /var/log/network/172.16.0.1.log
-
-# SWITCHES - YA FUNCIONANDO CORRECTAMENTE
-# Switch5 (172.16.0.4)
-UserParameter=network.log.switch5,tail -n 10 /var/log/network/172.16.0.4.log
-
-# Switch6 (172.16.0.3)
-UserParameter=network.log.switch6,tail -n 10 /var/log/network/172.16.0.3.log
-
-# Switch7 (172.16.0.2)
-UserParameter=network.log.switch7,tail -n 10 /var/log/network/172.16.0.2.log
-
-# Switch8 (192.168.0.130)
-UserParameter=network.log.switch8,tail -n 10 /var/log/network/192.168.0.130.log
-
-# Switch9 (192.168.0.2)
-UserParameter=network.log.switch9,tail -n 10 /var/log/network/192.168.0.2.log
-
-# UserParameters para contadores
-UserParameter=network.log.count.r1,wc -l < /var/log/network/192.168.1.250.log
-UserParameter=network.log.count.r2,wc -l < /var/log/network/192.168.1.242.log
-UserParameter=network.log.count.r3,wc -l < /var/log/network/172.16.0.1.log
-
-# UserParameters adicionales
-UserParameter=network.log.all,tail -n 20 /var/log/network/all-devices.log
-UserParameter=network.devices.active,ls -la /var/log/network/*.log | grep -c "^-.*\.log$"
-EOF
+# Generar la configuración: un único item maestro (network.metrics) que
+# obtiene en JSON todos los valores de la caché de métricas de la API; los
+# items por dispositivo son items dependientes con preprocesado JSONPath
+PYTHON=/root/venv/network_env/bin/python3
+METRICS_CACHE=/root/network_automation/scripts/metrics_cache.py
+if ! "$PYTHON" "$METRICS_CACHE" --userparams > /tmp/network_logs.conf; then
+    echo "✗ Error generando UserParameters desde devices.yaml"
+    exit 1
+fi
+sudo cp /tmp/network_logs.conf /etc/zabbix/zabbix_agentd.d/network_logs.conf
+rm -f /tmp/network_logs.conf
 
-echo "✓ UserParameters corregidos con IPs reales"
+echo "✓ UserParameters generados desde devices.yaml"
 
 # Reiniciar Zabbix Agent
 echo
@@ -68,33 +35,35 @@ else
     exit 1
 fi
 
-# Test final de UserParameters
+# Test final del item maestro
 echo
-echo "=== TESTING USERPARAMETERS CORREGIDOS ==="
+echo "=== TESTING ITEM MAESTRO ==="
 
-devices=("r1" "r2" "r3" "switch5" "switch6" "switch7" "switch8" "switch9")
+devices=($("$PYTHON" "$METRICS_CACHE" --devices))
+result=$(zabbix_agentd -t network.metrics 2>/dev/null)
+
+if [ $? -ne 0 ] || [ -z "$result" ]; then
+    echo "✗ network.metrics: NO FUNCIONA (¿API en ejecución?)"
+    exit 1
+fi
+echo "✓ network.metrics: FUNCIONA ($(echo "$result" | wc -c) bytes)"
 
 for device in "${devices[@]}"; do
-    echo "Testing network.log.$device:"
-    result=$(zabbix_agentd -t "network.log.$device" 2>/dev/null)
-    if [ $? -eq 0 ] && [ -n "$result" ]; then
-        # Contar líneas en el resultado
-        line_count=$(echo "$result" | wc -l)
-        first_line=$(echo "$result" | head -1)
-        echo "✓ $device: FUNCIONA ($line_count líneas)"
-        echo "    Muestra: $(echo "$first_line" | cut -c1-70)..."
+    if echo "$result" | grep -q "\"network.log.count.$device\""; then
+        echo "✓ $device: valores presentes en el JSON"
     else
-        echo "✗ $device: NO FUNCIONA"
+        echo "✗ $device: sin valores en el JSON"
     fi
-    echo
 done
+echo
 
 echo "=== RESUMEN FINAL ==="
 echo
-echo "UserParameters configurados correctamente:"
-echo "✓ R1: 192.168.1.250.log (IP del enlace R1-R3)"
-echo "✓ R2: 192.168.1.242.log (IP del enlace R1-R2)"
-echo "✓ R3: 172.16.0.1.log (Router-on-Stick)"
-echo "✓ Todos los switches funcionando"
+echo "UserParameter configurado correctamente:"
+echo "✓ ${#devices[@]} dispositivos de devices.yaml"
+echo "✓ Valores servidos desde la caché de la API (requiere la API en ejecución)"
+echo
+echo "Items dependientes de network.metrics a crear en Zabbix (clave y JSONPath):"
+"$PYTHON" "$METRICS_CACHE" --items
 echo
 echo "LISTOS PARA CONFIGURAR EN ZABBIX WEB!"
@@ -2,43 +2,51 @@
 
 # Script para monitorear logs de dispositivos en tiempo real
 # Universidad
+#
+# Se suscribe al flujo /api/logs/stream de la API de automatización
+# (Server-Sent Events): cada línea llega en cuanto se recibe, sin sondeos
+# periódicos ni un tail por dispositivo.
+# Uso: ./monitor_network_logs.sh [DISPOSITIVO] [SEVERIDAD]   (p. ej. R1 4)
+
+API_URL="${API_URL:-http://localhost:5000}"
+DEVICE="$1"
+SEVERITY="$2"
+
+URL="$API_URL/api/logs/stream?tail=10"
+[ -n "$DEVICE" ] && URL="$URL&device=$DEVICE"
+[ -n "$SEVERITY" ] && URL="$URL&severity=$SEVERITY"
 
 echo "=== MONITOREO DE LOGS DE RED EN TIEMPO REAL ==="
+echo "Flujo: $URL"
 echo "Presiona Ctrl+C para salir"
 echo
 
-# Función para mostrar logs de un dispositivo
-show_device_logs() {
-    local device=$1
-    local ip=$2
-    local logfile="/var/log/network/$ip.log"
-    
-    if [ -f "$logfile" ]; then
-        echo "--- $device ($ip) ---"
-        tail -2 "$logfile" | while read line; do
-            # Colorear según tipo de log
-            if [[ "$line" == *"ERROR"* ]] || [[ "$line" == *"CRITICAL"* ]]; then
-                echo -e "\033[0;31m$line\033[0m"
-            elif [[ "$line" == *"WARNING"* ]] || [[ "$line" == *"WARN"* ]]; then
-                echo -e "\033[0;33m$line\033[0m"
-            else
-                echo -e "\033[0;32m$line\033[0m"
-            fi
-        done
-        echo
-    fi
+# Mostrar una entrada JSON ({"timestamp", "device", "severity", "mnemonic", "text"})
+show_entry() {
+    local entry=$1
+    local line
+    line=$(echo "$entry" | sed -E 's/.*"timestamp": "([^"]*)", "device": "([^"]*)".*"text": "(.*)"}$/\1 \2 \3/')
+
+    # Colorear según severidad
+    case "$entry" in
+        *'"severity": "emerg"'*|*'"severity": "alert"'*|*'"severity": "crit"'*|*'"severity": "err"'*)
+            echo -e "\033[0;31m$line\033[0m" ;;
+        *'"severity": "warning"'*)
+            echo -e "\033[0;33m$line\033[0m" ;;
+        *)
+            echo -e "\033[0;32m$line\033[0m" ;;
+    esac
 }
 
-# Monitoreo continuo
-while true; do
-    clear
-    echo "=== LOGS DE RED - $(date) ==="
-    echo
-    
-    # Mostrar logs de dispositivos principales
-    show_device_logs "R1" "192.168.1.241"
-    show_device_logs "R3" "172.16.0.1"
-    show_device_logs "Switch7" "172.16.0.2"
-    
-    sleep 5
+curl -sN "$URL" | while read -r line; do
+    case "$line" in
+        event:*) event="${line#event: }" ;;
+        data:*)
+            if [ "$event" = "dropped" ]; then
+                echo "... líneas descartadas por el servidor: ${line#data: }"
+            else
+                show_entry "${line#data: }"
+            fi ;;
+        "") event="" ;;
+    esac
 done
@@ -6,15 +6,14 @@ Parte III - Administración de Redes
 API para gestión remota de dispositivos de red con Dashboard Interactivo
 """
 
-from flask import Flask, jsonify, request, render_template_string
+from flask import Flask, Response, jsonify, request, render_template_string
 from flask_restful import Api, Resource
 import os
 import sys
-import yaml
 import json
 import logging
-import subprocess
 import datetime
+import functools
 
 # Ajustar path para importar módulos locales
 BASE_DIR = '/root/network_automation'
@@ -27,6 +26,26 @@ LOG_DIR = os.path.join(BASE_DIR, 'logs')
 # Asegurar que podemos importar scripts
 sys.path.append(SCRIPTS_DIR)
 
+from session_pool import get_pool
+from operations import get_service
+from jobs import get_job_manager
+from inventory import get_inventory
+from interface_cache import get_interface_cache, DEFAULT_TTL
+from backup_store import get_backup_store
+from config_diff import diff_snapshots, changes_since
+import reachability
+import snmp_collector
+from timeseries import get_timeseries_store, parse_range, MonitorPoller, POLL_INTERVAL
+from syslog_server import get_syslog_server, syslog_settings
+from log_index import get_log_index, parse_severity, to_epoch
+from log_stream import get_log_broker, format_record, KEEPALIVE_INTERVAL
+from metrics_cache import get_metrics_cache
+import zabbix_sender
+from jinja2 import TemplateError
+from config_templates import render_configs, dry_run
+from config_push import succeeded as push_succeeded
+from device_ops import check_show_commands, check_ip, check_host
+
 # Configuración de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -47,14 +66,39 @@ DEVICES_FILE = os.path.join(CONFIG_DIR, 'devices.yaml')
 
 # Función para cargar dispositivos
 def load_devices():
-    """Cargar dispositivos desde archivo YAML"""
+    """Cargar dispositivos desde el inventario en caché (se recarga si cambia el YAML)"""
+    try:
+        return get_inventory().data
+    except Exception as e:
+        logger.error(f"Error cargando devices.yaml: {e}")
+        return None
+
+def find_device(device_name):
+    """Buscar (device_type, info) de un dispositivo en el índice del inventario"""
     try:
-        with open(DEVICES_FILE, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return get_inventory().get(device_name)
     except Exception as e:
         logger.error(f"Error cargando devices.yaml: {e}")
         return None
 
+def submit_job(operation, func, *args, params=None, total=None, success=None):
+    """
+    Encolar una operación de flota y responder 202 con el ID del trabajo.
+
+    total es el número de dispositivos afectados (por defecto, todo el
+    inventario) y success decide el éxito de cada dispositivo (ver jobs.Job).
+    """
+    if total is None:
+        total = get_service().device_count()
+    job = get_job_manager().submit(operation, func, *args, params=params, total=total, success=success)
+    response = jsonify({
+        "status": "accepted",
+        "job_id": job.id,
+        "status_url": f"/api/jobs/{job.id}"
+    })
+    response.status_code = 202
+    return response
+
 # Plantilla HTML mejorada para el dashboard interactivo
 INTERACTIVE_DASHBOARD = """
 <!DOCTYPE html>
@@ -427,6 +471,37 @@ INTERACTIVE_DASHBOARD = """
                     <div id="result-container" class="result-area">Selecciona una operación para ver los resultados...</div>
                 </div>
             </div>
+            
+            <div class="card">
+                <div class="card-header">Logs en Vivo</div>
+                <div class="card-body">
+                    <div class="row">
+                        <div class="col">
+                            <div class="form-group">
+                                <select id="log-device">
+                                    <option value="">Todos los dispositivos</option>
+                                    {% for device_type, devices in device_data.items() %}
+                                        {% for name in devices %}
+                                        <option value="{{ name }}">{{ name }}</option>
+                                        {% endfor %}
+                                    {% endfor %}
+                                </select>
+                            </div>
+                        </div>
+                        <div class="col">
+                            <div class="form-group">
+                                <select id="log-severity">
+                                    <option value="">Todas las severidades</option>
+                                    <option value="3">err y más graves</option>
+                                    <option value="4">warning y más graves</option>
+                                    <option value="5">notice y más graves</option>
+                                </select>
+                            </div>
+                        </div>
+                    </div>
+                    <div id="live-logs" class="result-area"></div>
+                </div>
+            </div>
         </div>
         
         <!-- Tab Dispositivos -->
@@ -440,6 +515,7 @@ INTERACTIVE_DASHBOARD = """
                                 <th>Tipo</th>
                                 <th>Nombre</th>
                                 <th>Dirección IP</th>
+                                <th>Estado</th>
                                 <th>Acciones</th>
                             </tr>
                         </thead>
@@ -450,6 +526,7 @@ INTERACTIVE_DASHBOARD = """
                                     <td>{{ device_type.capitalize() }}</td>
                                     <td>{{ name }}</td>
                                     <td>{{ info.ip }}</td>
+                                    <td><span class="badge reachability" data-device="{{ name }}">...</span></td>
                                     <td>
                                         <button class="device-info" data-device="{{ name }}">Info</button>
                                         <button class="device-interfaces" data-device="{{ name }}">Interfaces</button>
@@ -569,6 +646,45 @@ INTERACTIVE_DASHBOARD = """
                         </div>
                     </div>
                     
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method get">GET</span> /api/reachability
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Comprobar el puerto SSH (TCP/22) de todos los dispositivos a la vez (?device= para uno solo)</p>
+                            <div class="endpoint-example">curl http://{{ request.host }}/api/reachability</div>
+                        </div>
+                    </div>
+                    
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method get">GET</span> /api/monitor
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Sondeo SNMP v2c de uptime, estado y contadores de interfaces (IF-MIB) sin abrir sesiones SSH (?device= para uno solo)</p>
+                            <div class="endpoint-example">curl http://{{ request.host }}/api/monitor?device=R1</div>
+                        </div>
+                    </div>
+                    
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method get">GET</span> /api/monitor/&lt;device_name&gt;/&lt;interfaz&gt;
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Histórico de tráfico (bps) y errores por segundo de una interfaz (?range=30m, 6h, 7d...; la resolución se elige según el rango)</p>
+                            <div class="endpoint-example">curl "http://{{ request.host }}/api/monitor/R1/GigabitEthernet0/1?range=6h"</div>
+                        </div>
+                    </div>
+                    
                     <div class="endpoint-card">
                         <div class="endpoint-header">
                             <div>
@@ -577,7 +693,7 @@ INTERACTIVE_DASHBOARD = """
                             <span>⯆</span>
                         </div>
                         <div class="endpoint-body">
-                            <p>Obtener interfaces de todos los dispositivos</p>
+                            <p>Escanear interfaces de todos los dispositivos (devuelve un ID de trabajo)</p>
                             <div class="endpoint-example">curl http://{{ request.host }}/api/interfaces</div>
                         </div>
                     </div>
@@ -590,8 +706,9 @@ INTERACTIVE_DASHBOARD = """
                             <span>⯆</span>
                         </div>
                         <div class="endpoint-body">
-                            <p>Obtener interfaces de un dispositivo específico</p>
-                            <div class="endpoint-example">curl http://{{ request.host }}/api/interfaces/R1</div>
+                            <p>Obtener interfaces de un dispositivo específico (desde caché; cabeceras X-Cache y Age, ?fresh=1 consulta el equipo)</p>
+                            <div class="endpoint-example">curl -i http://{{ request.host }}/api/interfaces/R1
+curl http://{{ request.host }}/api/interfaces/R1?fresh=1</div>
                         </div>
                     </div>
                     
@@ -603,8 +720,9 @@ INTERACTIVE_DASHBOARD = """
                             <span>⯆</span>
                         </div>
                         <div class="endpoint-body">
-                            <p>Realizar backup de configuraciones</p>
-                            <div class="endpoint-example">curl -X POST http://{{ request.host }}/api/backup</div>
+                            <p>Realizar backup de configuraciones (devuelve un ID de trabajo)</p>
+                            <div class="endpoint-example">curl -X POST http://{{ request.host }}/api/backup
+curl -X POST -H "Content-Type: application/json" -d '{"incremental": true}' http://{{ request.host }}/api/backup</div>
                         </div>
                     </div>
                     
@@ -616,11 +734,89 @@ INTERACTIVE_DASHBOARD = """
                             <span>⯆</span>
                         </div>
                         <div class="endpoint-body">
-                            <p>Realizar backup de un dispositivo específico</p>
+                            <p>Realizar backup de un dispositivo específico (devuelve un ID de trabajo)</p>
                             <div class="endpoint-example">curl -X POST http://{{ request.host }}/api/backup/R1</div>
                         </div>
                     </div>
                     
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method get">GET</span> /api/backups
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Listar backups almacenados (filtros ?device=&amp;from=&amp;to=&amp;limit=)</p>
+                            <div class="endpoint-example">curl "http://{{ request.host }}/api/backups?device=R1&amp;from=2025-05-01&amp;to=2025-05-31"</div>
+                        </div>
+                    </div>
+                    
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method get">GET</span> /api/backups/&lt;device_name&gt;/&lt;id&gt;
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Descargar la configuración de un backup</p>
+                            <div class="endpoint-example">curl -O -J http://{{ request.host }}/api/backups/R1/1</div>
+                        </div>
+                    </div>
+                    
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method get">GET</span> /api/backups/&lt;device_name&gt;/diff
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Cambios entre dos backups (?from=&amp;to= por ID o fecha; por defecto el último cambio)</p>
+                            <div class="endpoint-example">curl "http://{{ request.host }}/api/backups/R1/diff?from=2025-05-01&amp;to=2025-05-20"</div>
+                        </div>
+                    </div>
+                    
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method get">GET</span> /api/backups/changes
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Qué dispositivos cambiaron su configuración desde una fecha</p>
+                            <div class="endpoint-example">curl "http://{{ request.host }}/api/backups/changes?since=2025-05-19"</div>
+                        </div>
+                    </div>
+                    
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method get">GET</span> /api/logs
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Búsqueda indexada en los logs de red (activos, rotados .gz y del receptor syslog). Filtros: device, severity (esa y más graves), mnemonic (OSPF-5-ADJCHG u OSPF), from/to (fecha o 30m, 6h, 7d) y q (palabras del mensaje)</p>
+                            <div class="endpoint-example">curl "http://{{ request.host }}/api/logs?mnemonic=OSPF-5-ADJCHG&amp;from=7d"</div>
+                        </div>
+                    </div>
+                    
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method get">GET</span> /api/logs/stream
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Logs en vivo como Server-Sent Events, filtrados por device y severity (esa y más graves); tail=N envía antes las últimas N líneas</p>
+                            <div class="endpoint-example">curl -N "http://{{ request.host }}/api/logs/stream?device=R1&amp;severity=4"</div>
+                        </div>
+                    </div>
+                    
                     <div class="endpoint-card">
                         <div class="endpoint-header">
                             <div>
@@ -629,11 +825,50 @@ INTERACTIVE_DASHBOARD = """
                             <span>⯆</span>
                         </div>
                         <div class="endpoint-body">
-                            <p>Verificar conectividad a una IP desde todos los dispositivos</p>
+                            <p>Verificar conectividad a una IP desde todos los dispositivos (devuelve un ID de trabajo)</p>
                             <div class="endpoint-example">curl -X POST -H "Content-Type: application/json" -d '{"target": "8.8.8.8"}' http://{{ request.host }}/api/ping</div>
                         </div>
                     </div>
                     
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method get">GET</span> /api/zabbix
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Todos los valores de la caché de métricas en un JSON para el item maestro network.metrics del agente de Zabbix; los demás items son dependientes con JSONPath (scripts/metrics_cache.py --userparams y --items)</p>
+                            <div class="endpoint-example">curl http://{{ request.host }}/api/zabbix</div>
+                        </div>
+                    </div>
+                    
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method get">GET</span> /api/zabbix/&lt;clave&gt;
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Valor en texto plano de un item de Zabbix desde la caché en memoria (network.log.r1, network.log.count.r1, network.device.up.r1, network.devices.discovery...), para pruebas</p>
+                            <div class="endpoint-example">curl http://{{ request.host }}/api/zabbix/network.log.count.r1</div>
+                        </div>
+                    </div>
+                    
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method post">POST</span> /api/ping/matrix
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Matriz de conectividad de todos los dispositivos a varios destinos, con tasa de éxito y RTT min/avg/max ("all": loopbacks de todos los dispositivos; devuelve un ID de trabajo)</p>
+                            <div class="endpoint-example">curl -X POST -H "Content-Type: application/json" -d '{"targets": "all", "repeat": 3}' http://{{ request.host }}/api/ping/matrix</div>
+                        </div>
+                    </div>
+                    
                     <div class="endpoint-card">
                         <div class="endpoint-header">
                             <div>
@@ -642,10 +877,63 @@ INTERACTIVE_DASHBOARD = """
                             <span>⯆</span>
                         </div>
                         <div class="endpoint-body">
-                            <p>Configurar NTP en todos los dispositivos</p>
+                            <p>Configurar NTP en todos los dispositivos (devuelve un ID de trabajo)</p>
                             <div class="endpoint-example">curl -X POST -H "Content-Type: application/json" -d '{"server": "172.16.0.10"}' http://{{ request.host }}/api/ntp</div>
                         </div>
                     </div>
+                    
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method post">POST</span> /api/config
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Aplicar una plantilla Jinja2 con variables por dispositivo (canario, verificación y rollback; devuelve un ID de trabajo). Con "dry_run": true devuelve las diferencias con el último backup sin conectarse</p>
+                            <div class="endpoint-example">curl -X POST -H "Content-Type: application/json" -d '{"template": "ntp server {{ '{{' }} ntp {{ '}}' }}", "defaults": {"ntp": "172.16.0.10"}, "dry_run": true}' http://{{ request.host }}/api/config</div>
+                        </div>
+                    </div>
+                    
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method post">POST</span> /api/snapshot
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Ejecutar varios comandos en una sola sesión por dispositivo y guardar las salidas juntas (devuelve un ID de trabajo). Solo se admiten comandos show</p>
+                            <div class="endpoint-example">curl -X POST -H "Content-Type: application/json" -d '{"commands": ["show running-config", "show ip interface brief"]}' http://{{ request.host }}/api/snapshot</div>
+                        </div>
+                    </div>
+                    
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method get">GET</span> /api/jobs
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Listar trabajos en segundo plano (filtro opcional ?status=pending|running|done|failed|cancelled)</p>
+                            <div class="endpoint-example">curl http://{{ request.host }}/api/jobs?status=running</div>
+                        </div>
+                    </div>
+                    
+                    <div class="endpoint-card">
+                        <div class="endpoint-header">
+                            <div>
+                                <span class="method get">GET</span> /api/jobs/&lt;job_id&gt;
+                            </div>
+                            <span>⯆</span>
+                        </div>
+                        <div class="endpoint-body">
+                            <p>Consultar progreso y resultados por dispositivo de un trabajo; DELETE lo cancela</p>
+                            <div class="endpoint-example">curl http://{{ request.host }}/api/jobs/&lt;job_id&gt;
+curl -X DELETE http://{{ request.host }}/api/jobs/&lt;job_id&gt;</div>
+                        </div>
+                    </div>
                 </div>
             </div>
         </div>
@@ -709,6 +997,21 @@ INTERACTIVE_DASHBOARD = """
             }
         }
         
+        // Esperar a que termine un trabajo en segundo plano mostrando el progreso
+        async function waitForJob(result, resultContainer) {
+            if (!result.job_id) return result;
+            
+            while (true) {
+                const job = await callApi(`/api/jobs/${result.job_id}`);
+                if (job.error || ['done', 'failed', 'cancelled'].includes(job.status)) {
+                    return job;
+                }
+                resultContainer.textContent = `Trabajo ${job.id} (${job.operation}): ` +
+                    `${job.progress.completed}/${job.progress.total} dispositivos...`;
+                await new Promise(resolve => setTimeout(resolve, 2000));
+            }
+        }
+        
         // Acciones rápidas
         document.getElementById('quick-backup').addEventListener('click', async () => {
             const resultContainer = document.getElementById('result-container');
@@ -717,7 +1020,7 @@ INTERACTIVE_DASHBOARD = """
             loading.style.display = 'block';
             resultContainer.textContent = 'Realizando backup de todos los dispositivos...';
             
-            const result = await callApi('/api/backup', 'POST');
+            const result = await waitForJob(await callApi('/api/backup', 'POST'), resultContainer);
             
             loading.style.display = 'none';
             resultContainer.textContent = JSON.stringify(result, null, 2);
@@ -730,7 +1033,7 @@ INTERACTIVE_DASHBOARD = """
             loading.style.display = 'block';
             resultContainer.textContent = 'Escaneando interfaces...';
             
-            const result = await callApi('/api/interfaces');
+            const result = await waitForJob(await callApi('/api/interfaces'), resultContainer);
             
             loading.style.display = 'none';
             resultContainer.textContent = JSON.stringify(result, null, 2);
@@ -743,7 +1046,7 @@ INTERACTIVE_DASHBOARD = """
             loading.style.display = 'block';
             resultContainer.textContent = 'Realizando ping a 8.8.8.8...';
             
-            const result = await callApi('/api/ping', 'POST', { target: '8.8.8.8' });
+            const result = await waitForJob(await callApi('/api/ping', 'POST', { target: '8.8.8.8' }), resultContainer);
             
             loading.style.display = 'none';
             resultContainer.textContent = JSON.stringify(result, null, 2);
@@ -756,12 +1059,59 @@ INTERACTIVE_DASHBOARD = """
             loading.style.display = 'block';
             resultContainer.textContent = 'Configurando NTP en 172.16.0.10...';
             
-            const result = await callApi('/api/ntp', 'POST', { server: '172.16.0.10' });
+            const result = await waitForJob(await callApi('/api/ntp', 'POST', { server: '172.16.0.10' }), resultContainer);
             
             loading.style.display = 'none';
             resultContainer.textContent = JSON.stringify(result, null, 2);
         });
         
+        // Estado de alcanzabilidad (TCP/22) en la tabla de dispositivos
+        async function updateReachability() {
+            const result = await callApi('/api/reachability');
+            if (!result || !result.devices) return;
+            document.querySelectorAll('.reachability').forEach(badge => {
+                const status = result.devices[badge.getAttribute('data-device')];
+                if (!status) return;
+                badge.className = 'badge reachability ' + (status.reachable ? 'badge-success' : 'badge-danger');
+                badge.textContent = status.reachable ? `SSH ${status.latency_ms} ms` : 'Inalcanzable';
+            });
+        }
+        updateReachability();
+        setInterval(updateReachability, 60000);
+        
+        // Logs en vivo (Server-Sent Events de /api/logs/stream)
+        let logSource = null;
+        function startLogStream() {
+            if (logSource) logSource.close();
+            const params = new URLSearchParams({ tail: 20 });
+            const device = document.getElementById('log-device').value;
+            const severity = document.getElementById('log-severity').value;
+            if (device) params.set('device', device);
+            if (severity) params.set('severity', severity);
+            
+            const area = document.getElementById('live-logs');
+            area.textContent = '';
+            logSource = new EventSource(`/api/logs/stream?${params}`);
+            logSource.onmessage = event => {
+                const entry = JSON.parse(event.data);
+                const line = document.createElement('div');
+                line.textContent = `${entry.timestamp} ${entry.device} ${entry.text}`;
+                if (['emerg', 'alert', 'crit', 'err'].includes(entry.severity)) line.style.color = 'var(--danger)';
+                else if (entry.severity === 'warning') line.style.color = 'var(--warning)';
+                area.appendChild(line);
+                while (area.childElementCount > 500) area.removeChild(area.firstElementChild);
+                area.scrollTop = area.scrollHeight;
+            };
+            logSource.addEventListener('dropped', event => {
+                const line = document.createElement('div');
+                line.textContent = `... ${JSON.parse(event.data).dropped} líneas descartadas (cliente lento)`;
+                area.appendChild(line);
+            });
+        }
+        document.getElementById('log-device').addEventListener('change', startLogStream);
+        document.getElementById('log-severity').addEventListener('change', startLogStream);
+        startLogStream();
+        
         // Manejo de dispositivos
         document.querySelectorAll('.device-info').forEach(btn => {
             btn.addEventListener('click', async () => {
@@ -804,7 +1154,7 @@ INTERACTIVE_DASHBOARD = """
                 loading.style.display = 'block';
                 resultContainer.textContent = `Realizando backup de ${deviceName}...`;
                 
-                const result = await callApi(`/api/backup/${deviceName}`, 'POST');
+                const result = await waitForJob(await callApi(`/api/backup/${deviceName}`, 'POST'), resultContainer);
                 
                 loading.style.display = 'none';
                 resultContainer.textContent = JSON.stringify(result, null, 2);
@@ -957,21 +1307,21 @@ INTERACTIVE_DASHBOARD = """
                     if (params.device) {
                         result = await callApi(`/api/interfaces/${params.device}`);
                     } else {
-                        result = await callApi('/api/interfaces');
+                        result = await waitForJob(await callApi('/api/interfaces'), resultContainer);
                     }
                     break;
                 case 'ping-test':
-                    result = await callApi('/api/ping', 'POST', { target: params.target });
+                    result = await waitForJob(await callApi('/api/ping', 'POST', { target: params.target }), resultContainer);
                     break;
                 case 'backup':
                     if (params.device) {
-                        result = await callApi(`/api/backup/${params.device}`, 'POST');
+                        result = await waitForJob(await callApi(`/api/backup/${params.device}`, 'POST'), resultContainer);
                     } else {
-                        result = await callApi('/api/backup', 'POST');
+                        result = await waitForJob(await callApi('/api/backup', 'POST'), resultContainer);
                     }
                     break;
                 case 'ntp':
-                    result = await callApi('/api/ntp', 'POST', { server: params.server });
+                    result = await waitForJob(await callApi('/api/ntp', 'POST', { server: params.server }), resultContainer);
                     break;
             }
             
@@ -1016,7 +1366,10 @@ class HealthResource(Resource):
             "status": "online",
             "timestamp": datetime.datetime.now().isoformat(),
             "service": "Network Automation API",
-            "version": "1.0.0"
+            "version": "1.0.0",
+            "ssh_sessions": get_pool().stats(),
+            "syslog": get_syslog_server().stats,
+            "log_stream": get_log_broker().stats()
         })
 
 class DevicesResource(Resource):
@@ -1049,51 +1402,102 @@ class DevicesResource(Resource):
 class DeviceResource(Resource):
     def get(self, device_name):
         """Obtener información de un dispositivo específico"""
-        data = load_devices()
-        if not data:
-            return jsonify({"error": "No se pudieron cargar dispositivos"})
+        device = find_device(device_name)
+        if not device:
+            return jsonify({"error": f"Dispositivo {device_name} no encontrado"})
         
-        # Buscar en routers y switches
-        for device_type in ['routers', 'switches']:
-            if device_name in data['devices'][device_type]:
-                info = data['devices'][device_type][device_name]
-                return jsonify({
-                    "name": device_name,
-                    "type": device_type[:-1],  # Quitar 's' final
-                    "ip": info['ip'],
-                    "device_type": info['type']
-                })
-        
-        return jsonify({"error": f"Dispositivo {device_name} no encontrado"})
+        device_type, info = device
+        return jsonify({
+            "name": device_name,
+            "type": device_type[:-1],  # Quitar 's' final
+            "ip": info['ip'],
+            "device_type": info['type']
+        })
 
-class InterfacesResource(Resource):
+class ReachabilityResource(Resource):
     def get(self):
-        """Obtener interfaces de todos los dispositivos"""
+        """Pre-flight TCP/22 de todos los dispositivos (?device= para uno solo, ?timeout= en segundos)"""
         try:
-            # Ejecutar comando de escaneo de interfaces
-            cmd = [sys.executable, os.path.join(SCRIPTS_DIR, "network_admin.py"), "--interfaces"]
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            stdout, stderr = process.communicate()
-            
-            # Leer archivo de log para recuperar información
-            with open(os.path.join(LOG_DIR, "network_admin.log"), "r") as f:
-                logs = f.readlines()
+            device_name = request.args.get('device')
+            if device_name:
+                device = find_device(device_name)
+                if not device:
+                    return jsonify({"error": f"Dispositivo {device_name} no encontrado"})
+                devices = [(device_name, device[1])]
+            else:
+                devices = get_inventory().devices()
+            timeout = min(float(request.args.get('timeout', reachability.PROBE_TIMEOUT)), 10)
             
-            # Extraer información de logs
-            interfaces = {}
-            current_device = None
-            for line in logs:
-                if "Escaneadas " in line and " interfaces de " in line:
-                    parts = line.split("Escaneadas ")[1].split(" interfaces de ")
-                    if len(parts) == 2:
-                        count = parts[0].strip()
-                        device = parts[1].strip()
-                        interfaces[device] = count
+            start = datetime.datetime.now()
+            results = reachability.check(devices, timeout=timeout)
+            elapsed = (datetime.datetime.now() - start).total_seconds()
+            return jsonify({
+                "devices": results,
+                "reachable": sum(1 for result in results.values() if result["reachable"]),
+                "unreachable": sum(1 for result in results.values() if not result["reachable"]),
+                "elapsed": round(elapsed, 3)
+            })
+        except ValueError as e:
+            return jsonify({"error": str(e)})
+        except Exception as e:
+            logger.error(f"Error comprobando alcanzabilidad: {e}")
+            return jsonify({"error": str(e)})
+
+class MonitorResource(Resource):
+    def get(self):
+        """Sondeo SNMP (GETBULK) de uptime e interfaces de la flota (?device= para uno solo)"""
+        try:
+            device_name = request.args.get('device')
+            if device_name:
+                device = find_device(device_name)
+                if not device:
+                    return jsonify({"error": f"Dispositivo {device_name} no encontrado"})
+                devices = [(device_name, device[1])]
+            else:
+                devices = get_inventory().devices()
             
+            start = datetime.datetime.now()
+            results = snmp_collector.poll(devices)
+            elapsed = (datetime.datetime.now() - start).total_seconds()
+            get_timeseries_store().ingest(results)
             return jsonify({
-                "devices": interfaces,
-                "details": stdout.decode('utf-8', errors='replace')
+                "devices": results,
+                "polled": sum(1 for result in results.values() if "error" not in result),
+                "failed": sum(1 for result in results.values() if "error" in result),
+                "elapsed": round(elapsed, 3)
             })
+        except snmp_collector.SnmpError as e:
+            return jsonify({"error": str(e)})
+        except Exception as e:
+            logger.error(f"Error en el sondeo SNMP: {e}")
+            return jsonify({"error": str(e)})
+
+class MonitorSeriesResource(Resource):
+    def get(self, device_name, interface):
+        """Tasas de tráfico y errores de una interfaz (?range=30m|6h|7d, por defecto 1h)"""
+        try:
+            seconds = parse_range(request.args.get('range'))
+            store = get_timeseries_store()
+            result = store.query(device_name, interface, seconds)
+            if result is None:
+                return jsonify({
+                    "error": f"No hay datos de {device_name} {interface}",
+                    "interfaces": store.interfaces(device_name)
+                })
+            result["range"] = seconds
+            return jsonify(result)
+        except ValueError as e:
+            return jsonify({"error": str(e)})
+        except Exception as e:
+            logger.error(f"Error consultando series de {device_name} {interface}: {e}")
+            return jsonify({"error": str(e)})
+
+class InterfacesResource(Resource):
+    def get(self):
+        """Escanear interfaces de todos los dispositivos"""
+        try:
+            # Encolar el escaneo como trabajo en segundo plano
+            return submit_job("interfaces", get_service().interfaces)
         except Exception as e:
             logger.error(f"Error obteniendo interfaces: {e}")
             return jsonify({"error": str(e)})
@@ -1102,55 +1506,42 @@ class DeviceInterfacesResource(Resource):
     def get(self, device_name):
         """Obtener interfaces de un dispositivo específico"""
         try:
-            # Import aquí para evitar problemas de circularidad
-            sys.path.append(SCRIPTS_DIR)
-            from network_admin import get_interfaces, load_devices
-            
-            # Cargar datos del dispositivo
-            data = load_devices()
-            if not data:
-                return jsonify({"error": "No se pudieron cargar dispositivos"})
-            
-            # Buscar dispositivo
-            device_info = None
-            device_type = None
-            for dtype in ['routers', 'switches']:
-                if device_name in data['devices'][dtype]:
-                    device_info = data['devices'][dtype][device_name]
-                    device_type = dtype
-                    break
-            
-            if not device_info:
+            # Buscar dispositivo en el índice del inventario
+            device = find_device(device_name)
+            if not device:
                 return jsonify({"error": f"Dispositivo {device_name} no encontrado"})
+            device_type, device_info = device
             
-            # Obtener interfaces
-            interfaces = get_interfaces(device_name, device_info)
+            # Obtener interfaces desde la caché (?fresh=1 fuerza consulta al equipo)
+            fresh = request.args.get('fresh') == '1'
+            ttl = (load_devices() or {}).get('cache', {}).get('interfaces_ttl', DEFAULT_TTL)
+            interfaces, age, cache_state = get_interface_cache(ttl).get(device_name, device_info, fresh=fresh)
             if not interfaces:
                 return jsonify({"error": f"No se pudieron obtener interfaces de {device_name}"})
             
-            return jsonify({
+            response = jsonify({
                 "device": device_name,
                 "type": device_type,
-                "interfaces": interfaces
+                "interfaces": [record.to_dict() for record in interfaces],
+                "cache": {"state": cache_state, "age": round(age, 1)}
             })
+            response.headers['X-Cache'] = cache_state
+            response.headers['Age'] = str(int(age))
+            return response
         except Exception as e:
             logger.error(f"Error obteniendo interfaces de {device_name}: {e}")
             return jsonify({"error": str(e)})
 
 class BackupResource(Resource):
     def post(self):
-        """Realizar backup de todos los dispositivos"""
+        """Realizar backup de todos los dispositivos ({"incremental": true} omite los que no cambiaron)"""
         try:
-            # Ejecutar comando de backup
-            cmd = [sys.executable, os.path.join(SCRIPTS_DIR, "network_admin.py"), "--backup"]
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            stdout, stderr = process.communicate()
+            request_data = request.get_json(silent=True) or {}
+            incremental = bool(request_data.get('incremental', False))
             
-            return jsonify({
-                "status": "success",
-                "message": "Backup iniciado",
-                "output": stdout.decode('utf-8', errors='replace')
-            })
+            # Encolar backup como trabajo en segundo plano
+            return submit_job("backup", functools.partial(get_service().backup, incremental=incremental),
+                              params={"incremental": incremental})
         except Exception as e:
             logger.error(f"Error realizando backup: {e}")
             return jsonify({"error": str(e)})
@@ -1159,39 +1550,162 @@ class DeviceBackupResource(Resource):
     def post(self, device_name):
         """Realizar backup de un dispositivo específico"""
         try:
-            # Import aquí para evitar problemas de circularidad
-            sys.path.append(SCRIPTS_DIR)
-            from network_admin import backup_device_config, load_devices
-            
-            # Cargar datos del dispositivo
-            data = load_devices()
-            if not data:
-                return jsonify({"error": "No se pudieron cargar dispositivos"})
-            
-            # Buscar dispositivo
-            device_info = None
-            for dtype in ['routers', 'switches']:
-                if device_name in data['devices'][dtype]:
-                    device_info = data['devices'][dtype][device_name]
-                    break
-            
-            if not device_info:
+            # Buscar dispositivo en el índice del inventario
+            device = find_device(device_name)
+            if not device:
                 return jsonify({"error": f"Dispositivo {device_name} no encontrado"})
+            device_type, device_info = device
             
-            # Realizar backup
-            result = backup_device_config(device_name, device_info)
-            if not result:
-                return jsonify({"error": f"Error realizando backup de {device_name}"})
-            
-            return jsonify({
-                "status": "success",
-                "device": device_name,
-                "backup_file": result
-            })
+            # Encolar el backup como trabajo en segundo plano
+            return submit_job("backup", get_service().backup_device, device_name, device_info,
+                              params={"device": device_name}, total=1)
         except Exception as e:
             logger.error(f"Error realizando backup de {device_name}: {e}")
             return jsonify({"error": str(e)})
 
+class BackupsResource(Resource):
+    def get(self):
+        """Listar snapshots de backup (?device=&from=&to=&limit=&offset=)"""
+        try:
+            snapshots = get_backup_store().query(
+                device_name=request.args.get('device'),
+                start=request.args.get('from'),
+                end=request.args.get('to'),
+                limit=min(int(request.args.get('limit', 100)), 1000),
+                offset=int(request.args.get('offset', 0))
+            )
+            for snapshot in snapshots:
+                snapshot["download_url"] = f"/api/backups/{snapshot['device']}/{snapshot['id']}"
+            return jsonify({"backups": snapshots, "count": len(snapshots)})
+        except ValueError as e:
+            return jsonify({"error": str(e)})
+        except Exception as e:
+            logger.error(f"Error listando backups: {e}")
+            return jsonify({"error": str(e)})
+
+class BackupSnapshotResource(Resource):
+    def get(self, device_name, snapshot_id):
+        """Descargar la configuración de un snapshot (descomprimida en streaming)"""
+        try:
+            store = get_backup_store()
+            snapshot = store.get(snapshot_id)
+            if not snapshot or snapshot["device"] != device_name:
+                return jsonify({"error": f"Backup {snapshot_id} de {device_name} no encontrado"})
+            
+            filename = f"{device_name}_{snapshot['timestamp'].replace(':', '').replace('-', '')}.txt"
+            return Response(
+                store.iter_body(snapshot["hash"]),
+                mimetype='text/plain',
+                headers={"Content-Disposition": f"attachment; filename={filename}"}
+            )
+        except Exception as e:
+            logger.error(f"Error descargando backup {snapshot_id} de {device_name}: {e}")
+            return jsonify({"error": str(e)})
+
+class BackupDiffResource(Resource):
+    def get(self, device_name):
+        """Diferencias entre dos backups de un dispositivo (?from=&to= por ID o fecha)"""
+        try:
+            result = diff_snapshots(device_name, request.args.get('from'), request.args.get('to'))
+            if result is None:
+                return jsonify({"error": f"No hay backups de {device_name} para comparar"})
+            return jsonify(result)
+        except ValueError as e:
+            return jsonify({"error": str(e)})
+        except Exception as e:
+            logger.error(f"Error comparando backups de {device_name}: {e}")
+            return jsonify({"error": str(e)})
+
+class BackupChangesResource(Resource):
+    def get(self):
+        """Dispositivos cuya configuración cambió desde ?since="""
+        since = request.args.get('since')
+        if not since:
+            return jsonify({"error": "Se requiere parámetro 'since'"})
+        try:
+            return jsonify(changes_since(since))
+        except ValueError as e:
+            return jsonify({"error": str(e)})
+        except Exception as e:
+            logger.error(f"Error generando informe de cambios: {e}")
+            return jsonify({"error": str(e)})
+
+class LogsResource(Resource):
+    def get(self):
+        """Buscar en los logs de red (?device=&severity=&mnemonic=&from=&to=&q=&limit=&offset=)"""
+        try:
+            entries = get_log_index().search(
+                device=request.args.get('device'),
+                severity=parse_severity(request.args.get('severity')),
+                mnemonic=request.args.get('mnemonic'),
+                start=to_epoch(request.args.get('from')),
+                end=to_epoch(request.args.get('to'), end_of_day=True),
+                q=request.args.get('q'),
+                limit=min(int(request.args.get('limit', 100)), 1000),
+                offset=int(request.args.get('offset', 0))
+            )
+            return jsonify({"logs": entries, "count": len(entries)})
+        except ValueError as e:
+            return jsonify({"error": str(e)})
+        except Exception as e:
+            logger.error(f"Error buscando en los logs: {e}")
+            return jsonify({"error": str(e)})
+
+class LogStreamResource(Resource):
+    def get(self):
+        """Logs en vivo como Server-Sent Events (?device=&severity=&tail= con las últimas N líneas)"""
+        try:
+            device_name = request.args.get('device') or None
+            severity = parse_severity(request.args.get('severity'))
+            tail = min(int(request.args.get('tail', 0)), 500)
+            
+            # Suscribirse antes de leer el histórico para no perder líneas entre ambos
+            broker = get_log_broker()
+            subscription = broker.subscribe(device_name, severity)
+            history = get_log_index().search(device=device_name, severity=severity, limit=tail) if tail else []
+        except ValueError as e:
+            return jsonify({"error": str(e)})
+        except Exception as e:
+            logger.error(f"Error abriendo el flujo de logs: {e}")
+            return jsonify({"error": str(e)})
+        
+        def events():
+            try:
+                for entry in reversed(history):
+                    yield f"data: {json.dumps(entry)}\n\n"
+                dropped = 0
+                while True:
+                    record = subscription.get(timeout=KEEPALIVE_INTERVAL)
+                    if subscription.dropped != dropped:
+                        dropped = subscription.dropped
+                        yield f"event: dropped\ndata: {json.dumps({'dropped': dropped})}\n\n"
+                    if record is None:
+                        yield ": keepalive\n\n"
+                    else:
+                        yield f"data: {json.dumps(format_record(record))}\n\n"
+            finally:
+                broker.unsubscribe(subscription)
+        
+        return Response(events(), mimetype='text/event-stream',
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+class ZabbixItemsResource(Resource):
+    def get(self):
+        """Todos los valores de la caché de métricas en JSON (item maestro network.metrics)"""
+        try:
+            return jsonify(get_metrics_cache().snapshot())
+        except Exception as e:
+            logger.error(f"Error obteniendo los valores para Zabbix: {e}")
+            return jsonify({"error": str(e)})
+
+class ZabbixItemResource(Resource):
+    def get(self, key):
+        """Valor de un item de Zabbix desde la caché de métricas (texto plano)"""
+        value = get_metrics_cache().value(key)
+        if value is None:
+            return Response("ZBX_NOTSUPPORTED", status=404, mimetype='text/plain')
+        return Response(value, mimetype='text/plain')
+
 class PingResource(Resource):
     def post(self):
         """Verificar conectividad desde dispositivos a una IP"""
@@ -1201,22 +1715,42 @@ class PingResource(Resource):
             if not request_data or 'target' not in request_data:
                 return jsonify({"error": "Se requiere parámetro 'target'"})
             
-            target_ip = request_data['target']
+            try:
+                target_ip = check_ip(request_data['target'])
+            except ValueError as e:
+                return jsonify({"error": str(e)})
             
-            # Ejecutar comando de ping
-            cmd = [sys.executable, os.path.join(SCRIPTS_DIR, "network_admin.py"), "--ping", target_ip]
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            stdout, stderr = process.communicate()
-            
-            return jsonify({
-                "status": "success",
-                "target": target_ip,
-                "output": stdout.decode('utf-8', errors='replace')
-            })
+            # Encolar ping como trabajo en segundo plano
+            return submit_job("ping", get_service().ping, target_ip, params={"target": target_ip})
         except Exception as e:
             logger.error(f"Error ejecutando ping: {e}")
             return jsonify({"error": str(e)})
 
+class PingMatrixResource(Resource):
+    def post(self):
+        """Matriz de conectividad N×M (targets: lista de IPs o "all" para todos los loopbacks)"""
+        try:
+            request_data = request.get_json(silent=True) or {}
+            targets = request_data.get('targets', 'all')
+            if targets != 'all' and not (isinstance(targets, list) and targets):
+                return jsonify({"error": "El parámetro 'targets' debe ser una lista de IPs o \"all\""})
+            if targets != 'all':
+                # Los destinos se escriben en el CLI de cada equipo: solo IPs
+                targets = [check_ip(ip) for ip in targets]
+            options = {}
+            for key in ('repeat', 'timeout'):
+                if key in request_data:
+                    options[key] = int(request_data[key])
+            
+            # Encolar la matriz como trabajo en segundo plano
+            return submit_job("ping_matrix", functools.partial(get_service().ping_matrix, targets, **options),
+                              params={"targets": targets, **options})
+        except ValueError as e:
+            return jsonify({"error": str(e)})
+        except Exception as e:
+            logger.error(f"Error ejecutando matriz de conectividad: {e}")
+            return jsonify({"error": str(e)})
+
 class NTPResource(Resource):
     def post(self):
         """Configurar NTP en dispositivos"""
@@ -1226,32 +1760,139 @@ class NTPResource(Resource):
             if not request_data or 'server' not in request_data:
                 return jsonify({"error": "Se requiere parámetro 'server'"})
             
-            ntp_server = request_data['server']
+            try:
+                ntp_server = check_host(request_data['server'])
+            except ValueError as e:
+                return jsonify({"error": str(e)})
             
-            # Ejecutar comando de NTP
-            cmd = [sys.executable, os.path.join(SCRIPTS_DIR, "network_admin.py"), "--ntp", ntp_server]
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            stdout, stderr = process.communicate()
-            
-            return jsonify({
-                "status": "success",
-                "ntp_server": ntp_server,
-                "output": stdout.decode('utf-8', errors='replace')
-            })
+            # Encolar configuración NTP como trabajo en segundo plano
+            return submit_job("ntp", get_service().ntp, ntp_server, params={"server": ntp_server},
+                              success=push_succeeded)
         except Exception as e:
             logger.error(f"Error configurando NTP: {e}")
             return jsonify({"error": str(e)})
 
+class ConfigResource(Resource):
+    def post(self):
+        """
+        Configuración por plantilla: {"template", "variables": {device: {...}},
+        "defaults", "devices", "dry_run", "canary", "wave_size"}
+        """
+        try:
+            request_data = request.get_json(silent=True) or {}
+            template = request_data.get('template')
+            if not template:
+                return jsonify({"error": "Se requiere parámetro 'template'"})
+            
+            # Dispositivos destino: los indicados o todos los del inventario
+            names = request_data.get('devices')
+            if names:
+                devices = []
+                for name in names:
+                    device = find_device(name)
+                    if not device:
+                        return jsonify({"error": f"Dispositivo {name} no encontrado"})
+                    devices.append((name, device[1]))
+            else:
+                devices = get_inventory().devices()
+            
+            rendered, errors = render_configs(template, devices, request_data.get('variables'),
+                                              request_data.get('defaults'))
+            if errors:
+                return jsonify({"error": "La plantilla no se pudo renderizar", "devices": errors})
+            
+            if request_data.get('dry_run'):
+                return jsonify({"dry_run": True, "devices": dry_run(rendered)})
+            
+            # Encolar el cambio transaccional como trabajo en segundo plano
+            options = {key: int(request_data[key]) for key in ('canary', 'wave_size') if key in request_data}
+            return submit_job("config", functools.partial(get_service().push, rendered, **options),
+                              params={"devices": list(rendered), **options}, total=len(rendered),
+                              success=push_succeeded)
+        except TemplateError as e:
+            return jsonify({"error": f"Plantilla no válida: {e}"})
+        except ValueError as e:
+            return jsonify({"error": str(e)})
+        except Exception as e:
+            logger.error(f"Error aplicando configuración: {e}")
+            return jsonify({"error": str(e)})
+
+class SnapshotResource(Resource):
+    def post(self):
+        """Snapshot de todos los dispositivos: varios comandos en una sola sesión por equipo"""
+        try:
+            request_data = request.get_json(silent=True) or {}
+            commands = request_data.get('commands')
+            if commands is not None and (not isinstance(commands, list)
+                                         or not all(isinstance(command, str) for command in commands)):
+                return jsonify({"error": "El parámetro 'commands' debe ser una lista de comandos"})
+            if commands:
+                # Los comandos se ejecutan en modo privilegiado: solo se admiten show
+                try:
+                    check_show_commands(commands)
+                except ValueError as e:
+                    return jsonify({"error": str(e)})
+            
+            # Encolar snapshot como trabajo en segundo plano
+            return submit_job("snapshot", functools.partial(get_service().snapshot, commands),
+                              params={"commands": commands})
+        except Exception as e:
+            logger.error(f"Error obteniendo snapshot: {e}")
+            return jsonify({"error": str(e)})
+
+class JobsResource(Resource):
+    def get(self):
+        """Listar trabajos (opcionalmente filtrados por ?status=)"""
+        status = request.args.get('status')
+        jobs = get_job_manager().list(status=status)
+        return jsonify({"jobs": [job.to_dict(details=False) for job in jobs]})
+
+class JobResource(Resource):
+    def get(self, job_id):
+        """Consultar progreso y resultados por dispositivo de un trabajo"""
+        job = get_job_manager().get(job_id)
+        if not job:
+            return jsonify({"error": f"Trabajo {job_id} no encontrado"})
+        return jsonify(job.to_dict())
+    
+    def delete(self, job_id):
+        """Cancelar un trabajo"""
+        job = get_job_manager().cancel(job_id)
+        if not job:
+            return jsonify({"error": f"Trabajo {job_id} no encontrado"})
+        return jsonify(job.to_dict(details=False))
+
 # Registrar recursos
 api.add_resource(HealthResource, '/api/health')
 api.add_resource(DevicesResource, '/api/devices')
 api.add_resource(DeviceResource, '/api/devices/<string:device_name>')
+api.add_resource(ReachabilityResource, '/api/reachability')
+api.add_resource(MonitorResource, '/api/monitor')
+api.add_resource(MonitorSeriesResource, '/api/monitor/<string:device_name>/<path:interface>')
 api.add_resource(InterfacesResource, '/api/interfaces')
 api.add_resource(DeviceInterfacesResource, '/api/interfaces/<string:device_name>')
 api.add_resource(BackupResource, '/api/backup')
 api.add_resource(DeviceBackupResource, '/api/backup/<string:device_name>')
+api.add_resource(BackupsResource, '/api/backups')
+api.add_resource(BackupSnapshotResource, '/api/backups/<string:device_name>/<int:snapshot_id>')
+api.add_resource(BackupDiffResource, '/api/backups/<string:device_name>/diff')
+api.add_resource(BackupChangesResource, '/api/backups/changes')
+api.add_resource(LogsResource, '/api/logs')
+api.add_resource(LogStreamResource, '/api/logs/stream')
+api.add_resource(ZabbixItemsResource, '/api/zabbix')
+api.add_resource(ZabbixItemResource, '/api/zabbix/<string:key>')
 api.add_resource(PingResource, '/api/ping')
+api.add_resource(PingMatrixResource, '/api/ping/matrix')
 api.add_resource(NTPResource, '/api/ntp')
+api.add_resource(ConfigResource, '/api/config')
+api.add_resource(SnapshotResource, '/api/snapshot')
+api.add_resource(JobsResource, '/api/jobs')
+api.add_resource(JobResource, '/api/jobs/<string:job_id>')
+
+def on_poll(results):
+    """Tras cada sondeo SNMP periódico: caché de métricas y envío a Zabbix"""
+    get_metrics_cache().update_poll(results)
+    zabbix_sender.report_poll(results)
 
 # Punto de entrada principal
 if __name__ == '__main__':
@@ -1265,5 +1906,21 @@ if __name__ == '__main__':
     else:
         logger.warning("No se pudo cargar la configuración de dispositivos")
     
+    # Sondeo SNMP periódico para el histórico de interfaces (solo en el
+    # proceso que sirve peticiones, no en el del recargador de debug)
+    poll_interval = ((devices or {}).get('timeseries') or {}).get('poll_interval', POLL_INTERVAL)
+    if poll_interval and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        MonitorPoller(get_timeseries_store(), poll_interval, on_poll=on_poll).start()
+    
+    # Receptor syslog integrado (mismo criterio que el sondeo SNMP)
+    if syslog_settings().get('enabled') and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        get_syslog_server().start_in_thread()
+    
+    # Difusión de logs en vivo para /api/logs/stream (syslog integrado o
+    # inotify) y caché de métricas para Zabbix alimentada por ella
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        get_metrics_cache().start(get_log_broker())
+        get_log_broker().start()
+    
     # Iniciar aplicación
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Backend asyncio para operaciones de red
+Parte III - Administración de Redes
+
+Ejecuta los planes de device_ops (get_interfaces, backup_device_config,
+test_connectivity, ping_targets, snapshot_device...) sobre asyncssh con
+un semáforo que limita las sesiones simultáneas. Un solo proceso puede
+mantener miles de sesiones abiertas sin crear un hilo del sistema
+operativo por dispositivo. La lógica de cada operación es la misma que
+usa network_admin con netmiko; aquí solo cambia cómo se envían comandos.
+"""
+
+import re
+import asyncio
+import logging
+
+import asyncssh
+
+import device_ops
+from fleet import OperationCancelled
+
+logger = logging.getLogger('network_admin.async')
+
+# Valores por defecto
+DEFAULT_CONCURRENCY = 500
+CONNECT_TIMEOUT = 10
+COMMAND_TIMEOUT = 60
+DEVICE_TIMEOUT = 120
+
+# Prompt antes de conocer el nombre del equipo (solo para el login)
+PROMPT_RE = re.compile(r"[\w\-.:/()]+[>#]\s*$")
+
+class AsyncIOSSession:
+    """Sesión interactiva mínima con un equipo Cisco IOS sobre asyncssh"""
+
+    def __init__(self, device_info):
+        self.device_info = device_info
+        self.conn = None
+        self.process = None
+
+    async def __aenter__(self):
+        info = self.device_info
+        self.conn = await asyncio.wait_for(
+            asyncssh.connect(
+                info['ip'],
+                username=info['username'],
+                password=info['password'],
+                known_hosts=None
+            ),
+            timeout=CONNECT_TIMEOUT
+        )
+        self.process = await self.conn.create_process(term_type='vt100')
+        prompt = await self._read_until(PROMPT_RE)
+
+        # A partir de aquí solo el prompt real del equipo (R1#, R1(config-if)#)
+        # termina una lectura, no una línea de salida que acabe en # o >
+        hostname = prompt.replace('\r', '').rstrip().split('\n')[-1][:-1]
+        self.prompt_re = re.compile(r"(?:^|\n)" + re.escape(hostname) + r"(?:\([\w\-.]+\))?[>#]\s*$")
+
+        # Entrar en modo privilegiado si hace falta
+        if prompt.rstrip().endswith('>'):
+            self.process.stdin.write('enable\n')
+            output = await self._read_until(re.compile(r"[Pp]assword:\s*$|#\s*$"))
+            if not output.rstrip().endswith('#'):
+                self.process.stdin.write(info.get('secret', info['password']) + '\n')
+                await self._read_until_prompt()
+
+        await self.send_command('terminal length 0')
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            self.process.stdin.write('exit\n')
+        except Exception:
+            pass
+        self.conn.close()
+        await self.conn.wait_closed()
+
+    async def _read_until(self, pattern, timeout=COMMAND_TIMEOUT):
+        buffer = ''
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not pattern.search(buffer):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"Timeout esperando respuesta de {self.device_info['ip']}")
+            chunk = await asyncio.wait_for(self.process.stdout.read(65536), timeout=remaining)
+            if not chunk:
+                raise ConnectionError(f"Sesión cerrada por {self.device_info['ip']}")
+            buffer += chunk
+        return buffer
+
+    async def _read_until_prompt(self, timeout=COMMAND_TIMEOUT):
+        return await self._read_until(self.prompt_re, timeout)
+
+    async def send_command(self, command, timeout=COMMAND_TIMEOUT):
+        """Enviar un comando y devolver su salida sin eco ni prompt"""
+        self.process.stdin.write(command + '\n')
+        output = await self._read_until_prompt(timeout)
+        lines = output.replace('\r', '').split('\n')
+        # Quitar eco del comando y el prompt final
+        if lines and command in lines[0]:
+            lines = lines[1:]
+        return '\n'.join(lines[:-1])
+
+    async def send_config_set(self, commands):
+        """Aplicar comandos en modo configuración"""
+        output = [await self.send_command('configure terminal')]
+        for command in commands:
+            output.append(await self.send_command(command))
+        output.append(await self.send_command('end'))
+        return '\n'.join(output)
+
+    async def save_config(self):
+        return await self.send_command('write memory')
+
+async def run_plan(plan, session):
+    """Ejecutar un plan de device_ops sobre una AsyncIOSSession"""
+    try:
+        request = next(plan)
+        while True:
+            if request is device_ops.SAVE:
+                output = await session.save_config()
+            elif isinstance(request, device_ops.Config):
+                output = await session.send_config_set(request.commands)
+            else:
+                output = await session.send_command(request)
+            request = plan.send(output)
+    except StopIteration as done:
+        return done.value
+
+def _operation(plan_factory):
+    """Operación asyncio (name, info, *args) a partir de un plan de device_ops"""
+    async def operation(device_name, device_info, *args):
+        async with AsyncIOSSession(device_info) as session:
+            return await run_plan(plan_factory(device_name, *args), session)
+    operation.__name__ = plan_factory.__name__
+    return operation
+
+OPERATIONS = {
+    plan.__name__: _operation(plan)
+    for plan in (device_ops.get_interfaces, device_ops.backup_device_config, device_ops.incremental_backup_device,
+                 device_ops.test_connectivity, device_ops.ping_targets, device_ops.snapshot_device)
+}
+
+async def run_fleet(operation, devices, *args, concurrency=None, timeout=DEVICE_TIMEOUT, on_result=None, cancel=None):
+    """
+    Ejecutar una operación asyncio en todos los dispositivos.
+
+    Un semáforo limita las sesiones abiertas a la vez. Devuelve tuplas
+    (name, result, error) en el orden de entrada, igual que FleetExecutor.
+    """
+    semaphore = asyncio.Semaphore(concurrency or DEFAULT_CONCURRENCY)
+
+    async def run_one(name, info):
+        async with semaphore:
+            if cancel is not None and cancel.is_set():
+                item = (name, None, OperationCancelled("Operación cancelada"))
+            else:
+                try:
+                    result = await asyncio.wait_for(operation(name, info, *args), timeout=timeout)
+                    item = (name, result, None)
+                except Exception as e:
+                    logger.error(f"Error ejecutando {operation.__name__} en {name}: {e!r}")
+                    item = (name, None, e)
+            if on_result:
+                on_result(*item)
+            return item
+
+    return await asyncio.gather(*(run_one(name, info) for name, info in devices))
+
+def run(operation_name, devices, *args, concurrency=None, timeout=DEVICE_TIMEOUT, on_result=None, cancel=None):
+    """Punto de entrada síncrono: ejecuta la operación con asyncio.run"""
+    operation = OPERATIONS[operation_name]
+    return asyncio.run(run_fleet(operation, list(devices), *args, concurrency=concurrency,
+                                 timeout=timeout, on_result=on_result, cancel=cancel))
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Almacén de backups direccionado por contenido
+Parte III - Administración de Redes
+
+Cada configuración se guarda una sola vez, tal como la devolvió el
+equipo, comprimida con gzip y con el hash SHA-256 de su versión
+normalizada como nombre (sin las líneas de fecha/uptime que cambian
+aunque la configuración no cambie). Los snapshots de cada
+dispositivo son punteros (timestamp -> hash) en un catálogo SQLite indexado
+por dispositivo y fecha, así que repetir un backup sin cambios no escribe de
+nuevo el cuerpo y las búsquedas no recorren el directorio.
+"""
+
+import os
+import re
+import gzip
+import sqlite3
+import hashlib
+import logging
+import datetime
+import threading
+
+logger = logging.getLogger('network_admin.backup_store')
+
+BASE_DIR = '/root/network_automation'
+BACKUP_DIR = os.path.join(BASE_DIR, 'backups')
+
+# Líneas volátiles que no forman parte de la configuración
+VOLATILE_LINES = re.compile(
+    r"^(Building configuration"
+    r"|Current configuration\s*:"
+    r"|! Last configuration change"
+    r"|! NVRAM config last updated"
+    r"|! No configuration change since last restart"
+    r"|ntp clock-period)"
+)
+
+# Backups antiguos: {device}_{YYYYmmdd_HHMMSS}.txt
+LEGACY_FILE = re.compile(r"^(?P<device>.+)_(?P<stamp>\d{8}_\d{6})\.txt$")
+
+TIME_FORMATS = ["%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%d", "%Y%m%d_%H%M%S"]
+
+CHUNK_SIZE = 64 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    device TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_device_ts ON snapshots (device, ts);
+CREATE INDEX IF NOT EXISTS snapshots_ts ON snapshots (ts);
+CREATE TABLE IF NOT EXISTS markers (
+    device TEXT PRIMARY KEY,
+    marker TEXT NOT NULL
+);
+"""
+
+def normalize_config(text):
+    """Quitar líneas volátiles, retornos de carro y espacios finales"""
+    lines = []
+    for line in text.replace('\r', '').split('\n'):
+        line = line.rstrip()
+        if VOLATILE_LINES.match(line):
+            continue
+        lines.append(line)
+    return '\n'.join(lines).strip('\n') + '\n'
+
+def config_hash(normalized):
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+def parse_time(value, end_of_day=False):
+    """
+    Convertir una fecha de la API/CLI al formato ISO del catálogo.
+
+    Con end_of_day=True una fecha sin hora ("2025-05-20") se toma como el
+    final de ese día, para que un rango ?to= incluya el día completo.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.strftime(TIME_FORMATS[0])
+    for fmt in TIME_FORMATS:
+        try:
+            parsed = datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if end_of_day and fmt == "%Y-%m-%d":
+            parsed = parsed.replace(hour=23, minute=59, second=59)
+        return parsed.strftime(TIME_FORMATS[0])
+    raise ValueError(f"Fecha no válida: {value}")
+
+def _row_to_snapshot(row):
+    return {"id": row[0], "device": row[1], "timestamp": row[2], "hash": row[3], "size": row[4]}
+
+class BackupStore:
+    """Objetos de configuración únicos más un catálogo SQLite de snapshots"""
+
+    def __init__(self, root=BACKUP_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.catalog_file = os.path.join(root, 'catalog.db')
+        self._lock = threading.Lock()
+
+        os.makedirs(root, exist_ok=True)
+        is_new = not os.path.exists(self.catalog_file)
+        self._db = sqlite3.connect(self.catalog_file, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        if is_new:
+            self.migrate_legacy()
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.gz")
+
+    def _write_object(self, digest, body):
+        """Escribir el cuerpo comprimido si no existe; devuelve True si era nuevo"""
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.{threading.get_ident()}"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+        return True
+
+    def save(self, device_name, config_text, timestamp=None):
+        """
+        Registrar un snapshot de device_name.
+
+        Devuelve el snapshot: {id, device, timestamp, hash, size, new}, donde
+        new indica si el cuerpo de la configuración no estaba ya almacenado.
+        El hash se calcula sobre la configuración normalizada, pero se
+        guarda el texto original para poder restaurarlo tal cual.
+        """
+        timestamp = parse_time(timestamp or datetime.datetime.now().replace(microsecond=0))
+        digest = config_hash(normalize_config(config_text))
+        new = self._write_object(digest, config_text)
+
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO snapshots (device, ts, hash, size) VALUES (?, ?, ?, ?)",
+                (device_name, timestamp, digest, len(config_text))
+            )
+        snapshot = {
+            "id": cursor.lastrowid,
+            "device": device_name,
+            "timestamp": timestamp,
+            "hash": digest,
+            "size": len(config_text),
+            "new": new
+        }
+        if new:
+            logger.info(f"Nueva configuración de {device_name} ({digest[:12]})")
+        else:
+            logger.info(f"Configuración de {device_name} sin cambios ({digest[:12]})")
+        return snapshot
+
+    def query(self, device_name=None, start=None, end=None, limit=100, offset=0):
+        """Snapshots filtrados por dispositivo y rango de fechas, del más reciente al más antiguo"""
+        clauses, params = [], []
+        if device_name:
+            clauses.append("device = ?")
+            params.append(device_name)
+        if start:
+            clauses.append("ts >= ?")
+            params.append(parse_time(start))
+        if end:
+            clauses.append("ts <= ?")
+            params.append(parse_time(end, end_of_day=True))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.extend([limit, offset])
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, device, ts, hash, size FROM snapshots {where} "
+                f"ORDER BY ts DESC, id DESC LIMIT ? OFFSET ?",
+                params
+            ).fetchall()
+        return [_row_to_snapshot(row) for row in rows]
+
+    def snapshots(self, device_name):
+        """Snapshots de un dispositivo, del más antiguo al más reciente"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, device, ts, hash, size FROM snapshots WHERE device = ? ORDER BY ts, id",
+                (device_name,)
+            ).fetchall()
+        return [_row_to_snapshot(row) for row in rows]
+
+    def devices(self):
+        """Dispositivos con al menos un snapshot"""
+        with self._lock:
+            rows = self._db.execute("SELECT DISTINCT device FROM snapshots ORDER BY device").fetchall()
+        return [row[0] for row in rows]
+
+    def get(self, snapshot_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, device, ts, hash, size FROM snapshots WHERE id = ?", (snapshot_id,)
+            ).fetchone()
+        return _row_to_snapshot(row) if row else None
+
+    def latest(self, device_name, before=None):
+        """Último snapshot de un dispositivo (opcionalmente anterior o igual a before)"""
+        snapshots = self.query(device_name, end=before, limit=1)
+        return snapshots[0] if snapshots else None
+
+    def get_marker(self, device_name):
+        """Último marcador de cambios registrado para el modo incremental"""
+        with self._lock:
+            row = self._db.execute("SELECT marker FROM markers WHERE device = ?", (device_name,)).fetchone()
+        return row[0] if row else None
+
+    def set_marker(self, device_name, marker):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO markers (device, marker) VALUES (?, ?)", (device_name, marker)
+            )
+
+    def read(self, digest):
+        """Cuerpo de una configuración, tal como se obtuvo del equipo"""
+        with gzip.open(self.object_path(digest), 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def iter_body(self, digest, chunk_size=CHUNK_SIZE):
+        """Leer el cuerpo descomprimido por bloques (para respuestas en streaming)"""
+        with gzip.open(self.object_path(digest), 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def migrate_legacy(self):
+        """Importar al catálogo los backups {device}_{timestamp}.txt originales"""
+        imported = 0
+        for filename in sorted(os.listdir(self.root)):
+            match = LEGACY_FILE.match(filename)
+            if not match:
+                continue
+            with open(os.path.join(self.root, filename), errors='replace') as f:
+                self.save(match.group('device'), f.read(), timestamp=match.group('stamp'))
+            imported += 1
+        if imported:
+            logger.info(f"Importados {imported} backups anteriores al catálogo")
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_backup_store():
+    """Obtener el almacén de backups compartido del proceso"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BackupStore()
+        return _store
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de los parsers de comandos show
+Parte III - Administración de Redes
+
+Mide cuánto cuesta parsear salidas representativas de IOS (un switch de 48
+puertos, una tabla de rutas grande, etc.) y estima el coste total para una
+flota de N dispositivos, para compararlo con el tiempo de recogida por SSH.
+
+Uso: python bench_parsers.py [--devices 500] [--repeat 200]
+"""
+
+import sys
+import timeit
+import argparse
+
+import parsers
+
+def sample_ip_interface_brief(ports=48):
+    lines = ["Interface              IP-Address      OK? Method Status                Protocol"]
+    lines.append("Vlan1                  172.16.0.4      YES NVRAM  up                    up")
+    for port in range(1, ports + 1):
+        status = "up                    up" if port % 3 else "administratively down down"
+        lines.append(f"GigabitEthernet1/0/{port:<4} unassigned      YES unset  {status}")
+    lines.append("Loopback0              10.255.0.4      YES manual up                    up")
+    return "\n".join(lines)
+
+def sample_interfaces(ports=48):
+    blocks = []
+    for port in range(1, ports + 1):
+        blocks.append(f"""GigabitEthernet1/0/{port} is up, line protocol is up (connected)
+  Hardware is Gigabit Ethernet, address is 5254.0012.{port:04x} (bia 5254.0012.{port:04x})
+  Description: Acceso puerto {port}
+  MTU 1500 bytes, BW 1000000 Kbit/sec, DLY 10 usec,
+     reliability 255/255, txload 1/255, rxload 1/255
+  5 minute input rate {port * 1000} bits/sec, 3 packets/sec
+  5 minute output rate {port * 2000} bits/sec, 5 packets/sec
+     {port * 12345} packets input, {port * 999999} bytes, 0 no buffer
+     0 input errors, 0 CRC, 0 frame, 0 overrun, 0 ignored
+     {port * 23456} packets output, {port * 888888} bytes, 0 underruns
+     0 output errors, 0 collisions, 1 interface resets""")
+    return "\n".join(blocks)
+
+SAMPLE_VERSION = """Cisco IOS Software, IOSv Software (VIOS-ADVENTERPRISEK9-M), Version 15.9(3)M4, RELEASE SOFTWARE (fc3)
+Technical Support: http://www.cisco.com/techsupport
+R1 uptime is 2 days, 3 hours, 11 minutes
+System returned to ROM by reload
+System restarted at 05:12:31 ECT Mon May 19 2025
+System image file is "flash0:/vios-adventerprisek9-m"
+Cisco IOSv (revision 1.0) with  with 460137K/62464K bytes of memory.
+Processor board ID 9VD4ZLDSJ5YH4NUIXZ0TL
+Configuration register is 0x0
+"""
+
+def sample_ip_route(routes=1000):
+    lines = ["Codes: L - local, C - connected, S - static, R - RIP, M - mobile, B - BGP",
+             "       O - OSPF, IA - OSPF inter area",
+             "",
+             "Gateway of last resort is 192.168.1.1 to network 0.0.0.0",
+             "",
+             "S*    0.0.0.0/0 [1/0] via 192.168.1.1",
+             "      10.0.0.0/8 is variably subnetted, 1000 subnets, 2 masks"]
+    for index in range(routes):
+        lines.append(f"O        10.{index // 256}.{index % 256}.0/24 [110/{index % 50 + 2}] via 192.168.1.2, 1d02h, GigabitEthernet0/1")
+        if index % 10 == 0:
+            lines.append(f"                   [110/{index % 50 + 2}] via 192.168.1.6, 1d02h, GigabitEthernet0/2")
+    lines.append("C        192.168.1.0/30 is directly connected, GigabitEthernet0/1")
+    lines.append("L        192.168.1.1/32 is directly connected, GigabitEthernet0/1")
+    return "\n".join(lines)
+
+SAMPLE_CDP = """Capability Codes: R - Router, T - Trans Bridge, B - Source Route Bridge
+                  S - Switch, H - Host, I - IGMP, r - Repeater, P - Phone,
+                  D - Remote, C - CVTA, M - Two-port Mac Relay
+
+Device ID        Local Intrfce     Holdtme    Capability  Platform  Port ID
+R2               Gig 0/1           150              R B   IOSv      Gig 0/0
+Switch5.universidad.local
+                 Gig 0/2           137              R S I IOSv      Gig 0/1
+Switch8          Gig 0/3           171              S I   IOSv      Gig 1/0/24
+
+Total cdp entries displayed : 3
+"""
+
+SAMPLE_NTP = """  address         ref clock       st   when   poll reach  delay  offset   disp
+*~172.16.0.10     .LOCL.           1     23     64   377  1.234   0.567  0.890
++~192.168.1.246   172.16.0.10      2     40     64   377  2.001  -0.120  1.100
+ ~10.255.0.9      .INIT.          16      -   1024     0  0.000   0.000 15937.
+ * sys.peer, # selected, + candidate, - outlyer, x falseticker, ~ configured
+"""
+
+SAMPLE_PING = """Type escape sequence to abort.
+Sending 5, 100-byte ICMP Echos to 8.8.8.8, timeout is 2 seconds:
+!!!!!
+Success rate is 100 percent (5/5), round-trip min/avg/max = 1/2/4 ms
+"""
+
+SAMPLES = [
+    ('show ip interface brief', sample_ip_interface_brief()),
+    ('show interfaces', sample_interfaces()),
+    ('show version', SAMPLE_VERSION),
+    ('show ip route', sample_ip_route()),
+    ('show cdp neighbors', SAMPLE_CDP),
+    ('show ntp associations', SAMPLE_NTP),
+    ('ping', SAMPLE_PING),
+]
+
+def run_parser(command, output):
+    if command == 'ping':
+        return parsers.parse_ping(output)
+    return parsers.parse(command, output)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de parsers de comandos show")
+    parser.add_argument("--devices", type=int, default=500, help="Tamaño de flota para la estimación")
+    parser.add_argument("--repeat", type=int, default=200, help="Repeticiones por muestra")
+    args = parser.parse_args()
+
+    print(f"{'Comando':<26} {'Registros':>9} {'KB':>7} {'µs/parse':>10} {'MB/s':>8}")
+    total_us = 0.0
+    for command, output in SAMPLES:
+        result = run_parser(command, output)
+        count = len(result) if isinstance(result, list) else int(result is not None)
+        seconds = min(timeit.repeat(lambda: run_parser(command, output), number=args.repeat, repeat=3))
+        per_parse_us = seconds / args.repeat * 1e6
+        total_us += per_parse_us
+        size_kb = len(output) / 1024
+        throughput = len(output) / (per_parse_us / 1e6) / 1e6
+        print(f"{command:<26} {count:>9} {size_kb:>7.1f} {per_parse_us:>10.1f} {throughput:>8.1f}")
+
+    fleet_ms = total_us * args.devices / 1000
+    print(f"\nTodas las plantillas por dispositivo: {total_us / 1000:.2f} ms")
+    print(f"Estimación para {args.devices} dispositivos: {fleet_ms:.0f} ms "
+          f"(frente a ~0.5-1 s de login SSH por dispositivo)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
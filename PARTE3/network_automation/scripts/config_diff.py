@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Diferencias entre snapshots de configuración
+Parte III - Administración de Redes
+
+Interpreta las configuraciones IOS de forma jerárquica (por indentación),
+de modo que un cambio dentro de "interface Gi0/1" o "router ospf 1" se
+muestra con su contexto. Como los snapshots se direccionan por hash, el
+resultado de cada par se memoriza y repetir la consulta no cuesta nada.
+"""
+
+import logging
+from functools import lru_cache
+
+from backup_store import get_backup_store, normalize_config, parse_time
+
+logger = logging.getLogger('network_admin.config_diff')
+
+DIFF_CACHE_SIZE = 1024
+
+def parse_config(text):
+    """
+    Convertir una configuración IOS en un árbol {línea: {hijos}}.
+
+    Las líneas "!" y vacías se ignoran; la jerarquía se deduce de la
+    indentación, como hace IOS al mostrar la running-config.
+    """
+    root = {}
+    stack = [(-1, root)]
+    for raw in text.split('\n'):
+        line = raw.rstrip()
+        stripped = line.strip()
+        if not stripped or stripped == '!':
+            continue
+        indent = len(line) - len(line.lstrip(' '))
+        while stack[-1][0] >= indent:
+            stack.pop()
+        children = {}
+        stack[-1][1][stripped] = children
+        stack.append((indent, children))
+    return root
+
+def _flatten(tree, depth=0):
+    """Líneas de un subárbol con su indentación, para mostrar secciones completas"""
+    lines = []
+    for line, children in tree.items():
+        lines.append(' ' * depth + line)
+        lines.extend(_flatten(children, depth + 1))
+    return lines
+
+def diff_trees(old, new, path=()):
+    """
+    Comparar dos árboles y devolver la lista de cambios.
+
+    Cada cambio es {"path": [secciones padre], "change": "added"|"removed",
+    "line": línea, "section": [líneas hijas]} y las secciones presentes en
+    ambos lados se comparan recursivamente.
+    """
+    changes = []
+    for line, children in old.items():
+        if line not in new:
+            changes.append({"path": list(path), "change": "removed", "line": line,
+                            "section": _flatten(children)})
+    for line, children in new.items():
+        if line not in old:
+            changes.append({"path": list(path), "change": "added", "line": line,
+                            "section": _flatten(children)})
+        elif children or old[line]:
+            changes.extend(diff_trees(old[line], children, path + (line,)))
+    return changes
+
+def summarize(changes):
+    """Resumen de una lista de cambios: totales y secciones de primer nivel afectadas"""
+    sections = []
+    for change in changes:
+        section = change["path"][0] if change["path"] else change["line"]
+        if section not in sections:
+            sections.append(section)
+    return {
+        "added": sum(1 for change in changes if change["change"] == "added"),
+        "removed": sum(1 for change in changes if change["change"] == "removed"),
+        "sections": sections
+    }
+
+@lru_cache(maxsize=DIFF_CACHE_SIZE)
+def diff_hashes(old_hash, new_hash):
+    """Diff memorizado entre dos cuerpos del almacén (por hash)"""
+    if old_hash == new_hash:
+        return ()
+    store = get_backup_store()
+    changes = diff_trees(parse_config(normalize_config(store.read(old_hash))),
+                           parse_config(normalize_config(store.read(new_hash))))
+    # Tupla para que el valor memorizado no se modifique desde fuera
+    return tuple(changes)
+
+def resolve_snapshot(device_name, ref):
+    """
+    Encontrar un snapshot de device_name a partir de un ID o de una fecha.
+
+    Con una fecha se usa el último snapshot anterior o igual a ella.
+    """
+    store = get_backup_store()
+    if ref is None or ref == '':
+        return store.latest(device_name)
+    if str(ref).isdigit():
+        snapshot = store.get(int(ref))
+        return snapshot if snapshot and snapshot["device"] == device_name else None
+    return store.latest(device_name, before=ref)
+
+def previous_change(device_name, snapshot):
+    """Último snapshot anterior a snapshot con una configuración distinta"""
+    for candidate in reversed(get_backup_store().snapshots(device_name)):
+        if candidate["timestamp"] <= snapshot["timestamp"] and candidate["hash"] != snapshot["hash"]:
+            return candidate
+    return None
+
+def diff_snapshots(device_name, from_ref=None, to_ref=None):
+    """
+    Diff entre dos snapshots de un dispositivo.
+
+    Por defecto to es el último snapshot y from el último anterior con una
+    configuración distinta. Devuelve None si no se encuentran los snapshots.
+    """
+    new = resolve_snapshot(device_name, to_ref)
+    if new is None:
+        return None
+    old = resolve_snapshot(device_name, from_ref) if from_ref else previous_change(device_name, new)
+    if old is None:
+        return {"device": device_name, "from": None, "to": new, "changes": [], "summary": summarize([])}
+
+    changes = list(diff_hashes(old["hash"], new["hash"]))
+    return {
+        "device": device_name,
+        "from": old,
+        "to": new,
+        "changes": changes,
+        "summary": summarize(changes)
+    }
+
+def changes_since(since, devices=None):
+    """
+    Informe de flota: dispositivos cuya configuración cambió desde since.
+
+    Compara, por dispositivo, el último snapshot anterior o igual a since con
+    el último snapshot actual.
+    """
+    store = get_backup_store()
+    since = parse_time(since)
+    report = {"since": since, "changed": [], "unchanged": [], "no_baseline": []}
+    for device_name in devices or store.devices():
+        current = store.latest(device_name)
+        baseline = store.latest(device_name, before=since)
+        if current is None:
+            continue
+        if baseline is None:
+            report["no_baseline"].append(device_name)
+        elif baseline["hash"] == current["hash"]:
+            report["unchanged"].append(device_name)
+        else:
+            changes = diff_hashes(baseline["hash"], current["hash"])
+            report["changed"].append({
+                "device": device_name,
+                "from": baseline,
+                "to": current,
+                "summary": summarize(changes)
+            })
+    return report
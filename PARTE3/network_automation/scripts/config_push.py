@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Motor de cambios de configuración transaccionales
+Parte III - Administración de Redes
+
+Aplica un conjunto de comandos a una lista de dispositivos en oleadas
+paralelas (opcionalmente empezando por uno o varios canarios). En cada
+equipo se guarda la running-config antes del cambio, se aplican los
+comandos, se verifica el resultado y, si algo falla, se deshace el cambio
+a partir de la diferencia entre la configuración anterior y la actual.
+El "write memory" se hace al final y solo en los equipos correctos, en
+una última oleada paralela, en lugar de una vez por comando o por equipo.
+"""
+
+import re
+import time
+import logging
+
+import network_admin
+from session_pool import get_pool
+from inventory import get_inventory
+from fleet import DeviceUnreachable, OperationCancelled
+from backup_store import normalize_config
+from config_diff import parse_config, diff_trees
+
+logger = logging.getLogger('network_admin.config_push')
+
+# Valores por defecto
+DEFAULT_CANARY = 1
+DEFAULT_MAX_FAILURES = 0
+
+# Mensajes de error de IOS en la salida del modo configuración
+IOS_ERROR_MARKERS = ('% Invalid', '% Incomplete', '% Ambiguous', '% Unknown', '% Error')
+
+# Comandos con contraseña: IOS los muestra cifrados o con hash ("enable
+# secret 9 $9$...", "password 7 0822..."), así que solo se verifica el
+# comando hasta la palabra clave
+SECRET_RE = re.compile(r"^(?P<prefix>.*?\b(?:secret|password|key-string))\s+\S.*$")
+# Comandos de ejecución única que no quedan en la running-config
+UNVERIFIABLE_PREFIXES = ('crypto key generate', 'crypto key zeroize', 'do ')
+
+# Estados por dispositivo
+APPLIED = 'applied'
+ROLLED_BACK = 'rolled_back'
+FAILED = 'failed'
+ABORTED = 'aborted'
+UNREACHABLE = 'unreachable'
+
+class PushError(Exception):
+    """El cambio no se aplicó o no pasó la verificación"""
+
+def _config_lines(tree):
+    """Todas las líneas de un árbol de configuración, a cualquier profundidad"""
+    lines = set()
+    for line, children in tree.items():
+        lines.add(line)
+        lines |= _config_lines(children)
+    return lines
+
+def verify_commands(commands, tree):
+    """
+    Comandos de commands que no se reflejan en la running-config.
+
+    Un comando "X" debe aparecer en la configuración; "no X" se da por
+    aplicado si "X" ya no aparece (o IOS lo muestra tal cual, como
+    "no ip domain-lookup"). Los comandos deben escribirse completos, tal
+    como los muestra la running-config (sin abreviaturas).
+
+    IOS reescribe algunos comandos al guardarlos: los que llevan contraseña
+    (enable secret, username ... secret/password, password, key-string) se
+    comprueban solo hasta la palabra clave, y los de ejecución única
+    (crypto key generate, do ...) y la negación de contraseñas no se
+    comprueban.
+    """
+    lines = _config_lines(tree)
+    missing = []
+    for command in commands:
+        command = command.strip()
+        if not command or command in ('exit', 'end', '!') or command.startswith(UNVERIFIABLE_PREFIXES):
+            continue
+        secret = SECRET_RE.match(command)
+        if secret:
+            prefix = secret.group('prefix')
+            if not command.startswith('no ') and not any(line.startswith(prefix + ' ') for line in lines):
+                missing.append(command)
+            continue
+        if command.startswith('no '):
+            if command not in lines and command[3:] in lines:
+                missing.append(command)
+        elif command not in lines:
+            missing.append(command)
+    return missing
+
+def rollback_commands(before, after):
+    """
+    Comandos que devuelven la configuración after a before.
+
+    Se calculan con diff_trees: lo añadido se niega con "no" y lo eliminado
+    se vuelve a configurar, entrando en la sección correspondiente.
+    """
+    changes = diff_trees(before, after)
+    added = {(tuple(change["path"]), change["line"]) for change in changes if change["change"] == "added"}
+    commands = []
+    # Primero deshacer lo añadido y después restaurar lo eliminado
+    for change in sorted(changes, key=lambda change: change["change"] != "added"):
+        line = change["line"]
+        if change["change"] == "removed" and line.startswith('no ') and (tuple(change["path"]), line[3:]) in added:
+            continue  # ya restaurado al negar la línea añadida
+        commands.extend(change["path"])
+        if change["change"] == "added":
+            commands.append(line[3:] if line.startswith('no ') else f"no {line}")
+        else:
+            commands.append(line)
+            commands.extend(change["section"])
+        commands.extend(["exit"] * len(change["path"]))
+    return commands
+
+def _running_tree(connection):
+    return parse_config(normalize_config(connection.send_command('show running-config')))
+
+def _check_output(output):
+    for line in output.splitlines():
+        if line.strip().startswith(IOS_ERROR_MARKERS):
+            raise PushError(f"IOS rechazó el comando: {line.strip()}")
+
+def push_device(device_name, device_info, commands, verify=True):
+    """
+    Aplicar commands en un dispositivo como una transacción.
+
+    Devuelve {"status": applied|rolled_back, "error", "rollback"} o lanza
+    PushError si el cambio falló y tampoco se pudo deshacer.
+    """
+    with get_pool().session(device_name, device_info) as connection:
+        before = _running_tree(connection)
+        try:
+            _check_output(connection.send_config_set(commands))
+            if verify:
+                missing = verify_commands(commands, _running_tree(connection))
+                if missing:
+                    raise PushError(f"Comandos no reflejados en la configuración: {', '.join(missing)}")
+            logger.info(f"Cambio aplicado en {device_name} ({len(commands)} comandos)")
+            return {"status": APPLIED, "error": None, "rollback": None}
+        except Exception as e:
+            logger.error(f"Error aplicando cambio en {device_name}: {e}; deshaciendo")
+            rollback = rollback_commands(before, _running_tree(connection))
+            if rollback:
+                connection.send_config_set(rollback)
+            leftover = diff_trees(before, _running_tree(connection))
+            if leftover:
+                raise PushError(f"{e}; el rollback dejó {len(leftover)} diferencias")
+            return {"status": ROLLED_BACK, "error": str(e), "rollback": rollback}
+
+def succeeded(result):
+    """Éxito de un resultado de push_device: solo si el cambio quedó aplicado"""
+    return isinstance(result, dict) and result.get("status") == APPLIED
+
+def save_device(device_name, device_info):
+    """Guardar la running-config en la NVRAM (write memory)"""
+    with get_pool().session(device_name, device_info) as connection:
+        connection.save_config()
+    return True
+
+def _push_planned(device_name, device_info, plan, verify):
+    return push_device(device_name, device_info, plan[device_name], verify)
+
+def push_settings():
+    """Opciones config_push de devices.yaml (workers, canary, wave_size, max_failures)"""
+    return (get_inventory().data or {}).get('config_push') or {}
+
+def push_config(commands, devices=None, canary=None, wave_size=None, max_failures=None,
+                verify=True, save=True, workers=None, verbose=True, on_result=None, cancel=None, preflight=None):
+    """
+    Aplicar un cambio de configuración a la flota en oleadas.
+
+    commands es una lista de comandos común o un dict {device: [comandos]};
+    devices limita los destinos (por defecto, todos o las claves del dict).
+    Los canary primeros dispositivos se cambian solos; después el resto va
+    en oleadas de wave_size (por defecto, todos a la vez). Si los fallos
+    superan max_failures se detiene el despliegue y los pendientes quedan
+    como "aborted". Con save=True se hace write memory al final en los
+    dispositivos con el cambio aplicado. El motor usa siempre el pool de
+    sesiones.
+
+    Las opciones no indicadas se toman de config_push en devices.yaml;
+    workers limita los dispositivos que se cambian a la vez y preflight se
+    pasa tal cual a run_on_devices (False equivale a --no-preflight).
+    """
+    start = time.monotonic()
+    inventory = get_inventory()
+    settings = push_settings()
+    canary = settings.get('canary', DEFAULT_CANARY) if canary is None else canary
+    wave_size = wave_size or settings.get('wave_size')
+    max_failures = settings.get('max_failures', DEFAULT_MAX_FAILURES) if max_failures is None else max_failures
+    workers = workers or settings.get('workers')
+    if devices is None:
+        devices = list(commands) if isinstance(commands, dict) else [name for name, info in inventory.devices()]
+    plan = commands if isinstance(commands, dict) else {name: list(commands) for name in devices}
+
+    targets, results = [], {}
+    for name in devices:
+        device = inventory.get(name)
+        if device is None:
+            results[name] = {"status": FAILED, "error": "Dispositivo no encontrado en el inventario"}
+        else:
+            targets.append((name, device[1]))
+
+    infos = dict(targets)
+    waves = []
+    if canary:
+        waves.append(targets[:canary])
+        targets = targets[canary:]
+    size = wave_size or len(targets) or 1
+    waves.extend(targets[i:i + size] for i in range(0, len(targets), size))
+    waves = [wave for wave in waves if wave]
+
+    failures = 0
+    for index, wave in enumerate(waves):
+        aborted = failures > max_failures or (cancel is not None and cancel.is_set())
+        if aborted:
+            for name, info in wave:
+                results[name] = {"status": ABORTED, "error": "Despliegue detenido"}
+                if on_result:
+                    on_result(name, None, OperationCancelled("Despliegue detenido"))
+            continue
+
+        logger.info(f"Oleada {index + 1}/{len(waves)}: {len(wave)} dispositivos")
+        wave_results = network_admin.run_on_devices(_push_planned, wave, plan, verify, workers=workers,
+                                                    on_result=on_result, cancel=cancel, preflight=preflight)
+        for name, result, error in wave_results:
+            if isinstance(error, DeviceUnreachable):
+                results[name] = {"status": UNREACHABLE, "error": str(error)}
+            elif isinstance(error, OperationCancelled):
+                results[name] = {"status": ABORTED, "error": str(error)}
+            elif error is not None:
+                results[name] = {"status": FAILED, "error": str(error)}
+                failures += 1
+            else:
+                results[name] = result
+                if result["status"] != APPLIED:
+                    failures += 1
+        if index == 0 and canary and not any(results[name]["status"] == APPLIED for name, info in wave):
+            logger.error("El cambio no se aplicó en el canario; se detiene el despliegue")
+            failures = max(failures, max_failures + 1)
+
+    # Guardar en bloque solo los dispositivos con el cambio aplicado
+    applied = [(name, info) for name, info in infos.items() if results[name]["status"] == APPLIED]
+    if save and applied:
+        logger.info(f"Guardando configuración en {len(applied)} dispositivos...")
+        for name, saved, error in network_admin.run_on_devices(save_device, applied, workers=workers,
+                                                               preflight=False):
+            results[name]["saved"] = bool(saved)
+            if error is not None:
+                results[name]["error"] = f"write memory: {error}"
+
+    summary = {}
+    for result in results.values():
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    report = {
+        "devices": results,
+        "summary": summary,
+        "waves": len(waves),
+        "elapsed": round(time.monotonic() - start, 3)
+    }
+    if verbose:
+        print_push_summary(report)
+    return report
+
+def print_push_summary(report):
+    """Mostrar resumen de un despliegue de configuración"""
+    print("\nResumen de cambio de configuración:")
+    print(f"Oleadas: {report['waves']} ({report['elapsed']}s)")
+    for status, count in report["summary"].items():
+        print(f"  {status}: {count}")
+
+    for name, result in report["devices"].items():
+        mark = "✓" if result["status"] == APPLIED else "✗"
+        detail = f" - {result['error']}" if result.get("error") else ""
+        print(f"  {mark} {name}: {result['status']}{detail}")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Configuración por plantillas Jinja2
+Parte III - Administración de Redes
+
+Genera los comandos de cada dispositivo a partir de una plantilla y de sus
+variables, y permite un "dry-run" que compara el resultado con el último
+backup de cada equipo sin conectarse a él. La plantilla se compila una sola
+vez por petición y se renderiza para cada dispositivo.
+
+Variables disponibles en la plantilla: device (nombre), ip, device_type,
+las de "defaults" y las de "variables[device]" (estas tienen prioridad).
+Las plantillas llegan por la API, así que se renderizan en el entorno
+aislado de Jinja2 (sin acceso a atributos internos de Python).
+"""
+
+import re
+import copy
+import logging
+
+from jinja2 import StrictUndefined, TemplateError
+from jinja2.sandbox import SandboxedEnvironment
+
+from backup_store import get_backup_store, normalize_config
+from config_diff import parse_config, diff_trees, summarize
+
+logger = logging.getLogger('network_admin.config_templates')
+
+# StrictUndefined: una variable que falta es un error, no una línea vacía
+_environment = SandboxedEnvironment(undefined=StrictUndefined, trim_blocks=True, lstrip_blocks=True)
+
+# Comandos globales que abren un submodo de IOS: las líneas sin indentar
+# que los siguen pertenecen a esa sección, como al escribirlas en el CLI
+SECTION_RE = re.compile(
+    r"^(interface|router|line|vlan \d|ip access-list|ipv6 access-list|ip dhcp pool|ip vrf|vrf definition"
+    r"|class-map|policy-map|route-map|key chain|track|controller|archive|crypto map|crypto isakmp policy)\b"
+)
+# Comandos globales que, escritos dentro de un submodo, IOS ejecuta en el
+# modo global (y con ello se sale del submodo)
+GLOBAL_RE = re.compile(
+    r"^(hostname|ntp|logging|snmp-server|username|enable|service|banner|spanning-tree|vtp|aaa|clock"
+    r"|access-list|boot|alias|privilege|errdisable|monitor session|mac address-table|cdp run|lldp run|crypto key"
+    r"|ip (route|domain|name-server|ssh|http|ftp|tftp|scp|default-gateway|routing|cef|dhcp excluded-address)"
+    r"|ipv6 (route|unicast-routing))\b"
+)
+
+def template_lines(text):
+    """Comandos de un texto renderizado (sin líneas vacías ni '!'), conservando la indentación"""
+    return [line.rstrip() for line in text.split('\n') if line.strip() and line.strip() != '!']
+
+def render_configs(template_text, devices, variables=None, defaults=None):
+    """
+    Renderizar la plantilla para cada dispositivo (tuplas (name, info)).
+
+    Devuelve (rendered, errors): {device: [comandos]} y {device: mensaje}
+    para los que no se pudieron renderizar. Un error de sintaxis de la
+    plantilla se lanza como TemplateError.
+    """
+    template = _environment.from_string(template_text)
+    variables = variables or {}
+    rendered, errors = {}, {}
+    for name, info in devices:
+        context = {"device": name, "ip": info['ip'], "device_type": info.get('type')}
+        context.update(defaults or {})
+        context.update(variables.get(name, {}))
+        try:
+            rendered[name] = template_lines(template.render(**context))
+        except TemplateError as e:
+            errors[name] = str(e)
+    if errors:
+        logger.error(f"Plantilla no renderizada en {len(errors)} dispositivos: {', '.join(sorted(errors))}")
+    return rendered, errors
+
+def apply_commands(tree, commands):
+    """
+    Simular sobre un árbol de configuración el efecto de unos comandos.
+
+    La jerarquía se deduce de la indentación, igual que en parse_config.
+    Sin indentación se sigue la lógica del CLI: tras "interface X" (o
+    cualquier comando de SECTION_RE) las líneas siguientes son de esa
+    sección hasta "exit", "end", otra sección o un comando global
+    (GLOBAL_RE). "no X" elimina X de su sección.
+    """
+    tree = copy.deepcopy(tree)
+    stack = [(-1, tree)]
+    section = False   # hay una sección abierta por un comando sin indentar
+    for command in commands:
+        stripped = command.strip()
+        if stripped == 'end':
+            del stack[1:]
+            section = False
+            continue
+        name = stripped[3:] if stripped.startswith('no ') else stripped
+        indent = len(command) - len(command.lstrip(' '))
+        if indent == 0:
+            if section and stripped != 'exit' and not SECTION_RE.match(name) and not GLOBAL_RE.match(name):
+                indent = 1
+            else:
+                section = bool(SECTION_RE.match(stripped))
+        while stack[-1][0] >= indent:
+            stack.pop()
+        parent = stack[-1][1]
+        if stripped == 'exit':
+            # Salir de la sección actual
+            if len(stack) > 1:
+                stack.pop()
+            section = section and len(stack) > 1
+            continue
+        if stripped.startswith('no '):
+            parent.pop(stripped[3:], None)
+            continue
+        stack.append((indent, parent.setdefault(stripped, {})))
+    return tree
+
+def dry_run(rendered):
+    """
+    Comparar los comandos de cada dispositivo con su último backup.
+
+    Devuelve {device: {"baseline", "commands", "changes", "summary"}};
+    sin backup previo, baseline y changes son None.
+    """
+    store = get_backup_store()
+    report = {}
+    for name, commands in rendered.items():
+        snapshot = store.latest(name)
+        if snapshot is None:
+            report[name] = {"baseline": None, "commands": commands, "changes": None, "summary": None}
+            continue
+        before = parse_config(normalize_config(store.read(snapshot["hash"])))
+        changes = diff_trees(before, apply_commands(before, commands))
+        report[name] = {
+            "baseline": {"id": snapshot["id"], "timestamp": snapshot["timestamp"]},
+            "commands": commands,
+            "changes": changes,
+            "summary": summarize(changes)
+        }
+    return report
@@ -4,15 +4,14 @@ Script template para automatizacion de red
 Universidad - Parte III del proyecto
 """
 
-import yaml
 from netmiko import ConnectHandler
 import sys
 import argparse
+from inventory import get_inventory
 
 def load_devices():
     """Cargar configuracion de dispositivos"""
-    with open('/root/network_automation/configs/devices.yaml', 'r') as f:
-        return yaml.safe_load(f)
+    return get_inventory().data
 
 def connect_device(device_config):
     """Conectar a dispositivo usando netmiko"""
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Operaciones por dispositivo comunes a los backends síncrono y asyncio
+Parte III - Administración de Redes
+
+Cada operación se escribe una sola vez como un generador que pide
+comandos y recibe sus salidas: un str es un comando de modo privilegiado,
+Config(commands) un bloque de configuración y SAVE guarda la
+configuración. El backend de netmiko (run_plan) y el de asyncssh
+(async_backend.run_plan) solo ejecutan lo que el generador pide, de modo
+que el análisis de salidas y el guardado de backups y snapshots no se
+duplica entre ambos.
+"""
+
+import os
+import re
+import gzip
+import json
+import logging
+import datetime
+import ipaddress
+from typing import List, NamedTuple, Optional
+from dataclasses import dataclass, asdict
+
+from backup_store import get_backup_store
+import parsers
+
+logger = logging.getLogger('network_admin.ops')
+
+BASE_DIR = '/root/network_automation'
+SNAPSHOT_DIR = os.path.join(BASE_DIR, 'snapshots')
+
+# Comandos de un snapshot si devices.yaml no define snapshot.commands
+SNAPSHOT_COMMANDS = [
+    'show running-config',
+    'show version',
+    'show ip interface brief',
+    'show cdp neighbors',
+    'show ntp associations',
+]
+
+# Un snapshot solo admite comandos show de una línea y sin filtros que
+# escriban en el equipo o en servidores externos (| redirect, | append, | tee)
+SHOW_COMMAND_RE = re.compile(r"show\s+[^\r\n]+")
+UNSAFE_FILTER_RE = re.compile(r"\|\s*(redirect|append|tee)\b", re.I)
+
+# Nombre de host DNS (etiquetas alfanuméricas con guiones) para servidores
+# que se escriben en comandos de configuración
+HOSTNAME_RE = re.compile(r"(?=.{1,253}\Z)[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?"
+                         r"(?:\.[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?)*")
+
+# Comandos baratos cuya salida cambia cuando cambia la configuración o el
+# equipo se reinicia (solo transfieren un par de líneas)
+CHANGE_CHECK_COMMANDS = [
+    'show running-config | include ^! (Last|No) configuration change',
+    'show version | include restarted|returned to ROM',
+]
+
+# Pings cortos para la matriz de conectividad: pocos paquetes y timeout
+# de 1 s, de modo que un destino caído no retiene la sesión 10 s
+MATRIX_PING_REPEAT = 3
+MATRIX_PING_TIMEOUT = 1
+
+class Config(NamedTuple):
+    """Petición de un plan: aplicar comandos en modo configuración"""
+    commands: List[str]
+
+# Petición de un plan: guardar la configuración (write memory)
+SAVE = object()
+
+def run_plan(plan, session):
+    """
+    Ejecutar un plan sobre una sesión síncrona (netmiko) y devolver su resultado.
+
+    La sesión debe ofrecer send_command, send_config_set y save_config.
+    """
+    try:
+        request = next(plan)
+        while True:
+            if request is SAVE:
+                output = session.save_config()
+            elif isinstance(request, Config):
+                output = session.send_config_set(request.commands)
+            else:
+                output = session.send_command(request)
+            request = plan.send(output)
+    except StopIteration as done:
+        return done.value
+
+# -- Análisis y guardado --------------------------------------------------
+
+@dataclass
+class InterfaceRecord:
+    """Interfaz de un dispositivo según 'show ip interface brief'"""
+    device: str
+    name: str
+    ip: Optional[str]
+    status: str
+    protocol: str
+
+    def to_dict(self):
+        return asdict(self)
+
+def parse_interfaces(output, device_name=None):
+    """
+    Analizar la salida de 'show ip interface brief' en InterfaceRecord.
+
+    Las interfaces sin dirección se incluyen con ip=None.
+    """
+    return [
+        InterfaceRecord(
+            device=device_name,
+            name=interface.name,
+            ip=interface.ip,
+            status=interface.status,
+            protocol=interface.protocol
+        )
+        for interface in parsers.parse_ip_interface_brief(output)
+    ]
+
+def parse_ping(output):
+    """Analizar la salida de un ping de IOS (tasa de éxito y RTT min/avg/max en ms)"""
+    ping = parsers.parse_ping(output)
+    if ping is None:
+        return {"success": False, "output": output}
+    return {
+        "success": ping.success_rate > 0,
+        "success_rate": ping.success_rate,
+        "rtt_min": ping.rtt_min,
+        "rtt_avg": ping.rtt_avg,
+        "rtt_max": ping.rtt_max,
+        "output": output
+    }
+
+def save_backup(device_name, output):
+    """
+    Guardar la configuración obtenida en el almacén de backups.
+
+    El cuerpo solo se escribe si la configuración cambió; se devuelve la
+    ruta del objeto que contiene la configuración del snapshot.
+    """
+    store = get_backup_store()
+    snapshot = store.save(device_name, output)
+    backup_file = store.object_path(snapshot["hash"])
+    logger.info(f"Backup de {device_name} registrado ({snapshot['timestamp']}) en {backup_file}")
+    return backup_file
+
+def change_marker(outputs):
+    """Construir el marcador de cambios a partir de las salidas de CHANGE_CHECK_COMMANDS"""
+    return '\n'.join(output.strip() for output in outputs)
+
+def check_ip(value):
+    """
+    Validar una IP destino antes de usarla en un comando del CLI.
+
+    Devuelve la IP en forma canónica; lanza ValueError si no es una IP.
+    """
+    try:
+        return str(ipaddress.ip_address(str(value).strip()))
+    except ValueError:
+        raise ValueError(f"IP destino no válida: {value!r}")
+
+def check_host(value):
+    """
+    Validar un servidor (IP o nombre de host) antes de usarlo en un comando
+    de configuración.
+
+    Devuelve la IP canónica o el nombre; lanza ValueError en otro caso, por
+    ejemplo si contiene espacios o saltos de línea.
+    """
+    try:
+        return check_ip(value)
+    except ValueError:
+        pass
+    if not isinstance(value, str) or not HOSTNAME_RE.fullmatch(value):
+        raise ValueError(f"Servidor no válido (IP o nombre de host): {value!r}")
+    return value
+
+def check_show_commands(commands):
+    """Lanzar ValueError si algún comando no es un show de solo lectura"""
+    for command in commands:
+        if not isinstance(command, str) or not SHOW_COMMAND_RE.fullmatch(command) or UNSAFE_FILTER_RE.search(command):
+            raise ValueError(f"Comando no permitido en un snapshot (solo 'show ...'): {command!r}")
+
+def save_snapshot(device_name, outputs):
+    """
+    Guardar juntas las salidas de un snapshot.
+
+    Se escribe snapshots/<device>/<timestamp>.json.gz con {comando: salida}
+    (timestamp con microsegundos, para que dos snapshots del mismo segundo
+    no se sobrescriban);
+    si incluye la running-config, además se registra en el almacén de backups.
+    Devuelve {"snapshot_file", "backup_file", "commands"}.
+    """
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    device_dir = os.path.join(SNAPSHOT_DIR, device_name)
+    os.makedirs(device_dir, exist_ok=True)
+    snapshot_file = os.path.join(device_dir, f"{timestamp}.json.gz")
+    with gzip.open(snapshot_file, 'wt', encoding='utf-8') as f:
+        json.dump({"device": device_name, "timestamp": timestamp, "outputs": outputs}, f)
+
+    backup_file = None
+    if 'show running-config' in outputs:
+        backup_file = save_backup(device_name, outputs['show running-config'])
+
+    logger.info(f"Snapshot de {device_name} ({len(outputs)} comandos) guardado en {snapshot_file}")
+    return {"snapshot_file": snapshot_file, "backup_file": backup_file, "commands": list(outputs)}
+
+# -- Planes ---------------------------------------------------------------
+
+def get_interfaces(device_name):
+    """Interfaces de un dispositivo ('show ip interface brief')"""
+    output = yield "show ip interface brief"
+    return parse_interfaces(output, device_name)
+
+def backup_device_config(device_name):
+    """Backup de la running-config en el almacén de backups"""
+    output = yield 'show running-config'
+    return save_backup(device_name, output)
+
+def incremental_backup_device(device_name):
+    """
+    Backup incremental: solo descarga la configuración si cambió.
+
+    Compara el marcador de CHANGE_CHECK_COMMANDS con el último registrado y
+    devuelve {"skipped": bool, "backup_file": ruta o None}.
+    """
+    store = get_backup_store()
+    outputs = []
+    for command in CHANGE_CHECK_COMMANDS:
+        outputs.append((yield command))
+    marker = change_marker(outputs)
+    if marker and marker == store.get_marker(device_name):
+        logger.info(f"{device_name} sin cambios desde el último backup, omitido")
+        return {"skipped": True, "backup_file": None}
+    output = yield 'show running-config'
+    backup_file = save_backup(device_name, output)
+    store.set_marker(device_name, marker)
+    return {"skipped": False, "backup_file": backup_file}
+
+def test_connectivity(device_name, target_ip):
+    """Ping desde el dispositivo a una IP destino"""
+    output = yield f"ping {check_ip(target_ip)}"
+    return parse_ping(output)
+
+def ping_targets(device_name, targets, repeat=MATRIX_PING_REPEAT, timeout=MATRIX_PING_TIMEOUT):
+    """
+    Ping a varios destinos desde un dispositivo en una sola sesión.
+
+    Devuelve {destino: {success, success_rate, rtt_min, rtt_avg, rtt_max}};
+    el propio dispositivo no se prueba.
+    """
+    row = {}
+    for target in targets:
+        if target["name"] == device_name:
+            continue
+        command = f"ping {check_ip(target['ip'])} repeat {int(repeat)} timeout {int(timeout)}"
+        result = parse_ping((yield command))
+        result.pop("output")
+        row[target["name"]] = result
+    return row
+
+def ntp_commands(ntp_server):
+    """
+    Comandos para configurar un servidor NTP.
+
+    Se aplican con config_push (verificación, rollback y un solo write
+    memory al final); lanza ValueError si ntp_server no es válido.
+    """
+    return [f"ntp server {check_host(ntp_server)}"]
+
+def snapshot_device(device_name, commands=None):
+    """Todas las salidas del snapshot en una sola sesión (solo comandos show)"""
+    commands = commands or SNAPSHOT_COMMANDS
+    check_show_commands(commands)
+    outputs = {}
+    for command in commands:
+        outputs[command] = yield command
+    return save_snapshot(device_name, outputs)
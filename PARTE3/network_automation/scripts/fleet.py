@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Motor de ejecución paralela sobre la flota de dispositivos
+Parte III - Administración de Redes
+
+Ejecuta una operación por dispositivo sobre un pool de hilos compartido con
+un límite configurable de workers, un timeout por dispositivo y resultados
+devueltos en el mismo orden en que se entregaron los dispositivos.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger('network_admin.fleet')
+
+# Valores por defecto
+DEFAULT_WORKERS = 20
+DEVICE_TIMEOUT = 120
+
+class DeviceTimeout(Exception):
+    """El dispositivo no respondió dentro del tiempo asignado"""
+
+class OperationCancelled(Exception):
+    """La operación se canceló antes de llegar a este dispositivo"""
+
+class DeviceUnreachable(Exception):
+    """El dispositivo no aceptó conexiones en el puerto SSH durante el pre-flight"""
+
+class FleetExecutor:
+    """Pool de hilos compartido para operaciones sobre varios dispositivos"""
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, device_timeout=DEVICE_TIMEOUT):
+        self.max_workers = max_workers
+        self.device_timeout = device_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fleet')
+
+    def map_devices(self, func, devices, *args, timeout=None, on_result=None, cancel=None, **kwargs):
+        """
+        Ejecutar func(name, info, *args, **kwargs) en paralelo para cada dispositivo.
+
+        devices es una lista de tuplas (name, info). Devuelve una lista de
+        tuplas (name, result, error) en el mismo orden de entrada. El timeout
+        se mide desde que el dispositivo empieza a ejecutarse, no desde que
+        se encola; un dispositivo que lo supera se marca como fallido aunque
+        su hilo siga ocupado hasta que netmiko lo libere.
+
+        on_result(name, result, error) se llama al terminar cada dispositivo;
+        si cancel (threading.Event) se activa, los dispositivos que aún no
+        empezaron se marcan con OperationCancelled.
+        """
+        timeout = timeout or self.device_timeout
+        devices = list(devices)
+        started = {}
+
+        def run(index, name, info):
+            if cancel is not None and cancel.is_set():
+                raise OperationCancelled("Operación cancelada")
+            started[index] = time.monotonic()
+            return func(name, info, *args, **kwargs)
+
+        futures = {
+            self._pool.submit(run, index, name, info): index
+            for index, (name, info) in enumerate(devices)
+        }
+        results = [None] * len(devices)
+        pending = set(futures)
+
+        while pending:
+            done, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures[future]
+                name = devices[index][0]
+                try:
+                    results[index] = (name, future.result(), None)
+                except OperationCancelled as e:
+                    results[index] = (name, None, e)
+                except Exception as e:
+                    logger.error(f"Error ejecutando operación en {name}: {e}")
+                    results[index] = (name, None, e)
+                if on_result:
+                    on_result(*results[index])
+
+            # Marcar los dispositivos que exceden su timeout
+            now = time.monotonic()
+            for future in list(pending):
+                index = futures[future]
+                if index in started and now - started[index] > timeout:
+                    name = devices[index][0]
+                    logger.error(f"Timeout ({timeout}s) en {name}")
+                    results[index] = (name, None, DeviceTimeout(f"Timeout de {timeout}s"))
+                    pending.discard(future)
+                    if on_result:
+                        on_result(*results[index])
+
+        return results
+
+    def shutdown(self, wait=True):
+        """Cerrar el pool de hilos"""
+        self._pool.shutdown(wait=wait)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor(max_workers=None):
+    """Obtener el executor compartido, recreándolo si cambia el límite de workers"""
+    global _executor
+    with _executor_lock:
+        if _executor is None or (max_workers and max_workers != _executor.max_workers):
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = FleetExecutor(max_workers=max_workers or DEFAULT_WORKERS)
+        return _executor
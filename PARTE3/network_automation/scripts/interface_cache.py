@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Caché de estado de interfaces con stale-while-revalidate
+Parte III - Administración de Redes
+
+Guarda por dispositivo el último resultado de get_interfaces. Dentro del
+TTL se sirve directamente; pasado el TTL se sirve el valor anterior y se
+lanza una sola actualización en segundo plano, de modo que la carga sobre
+las líneas vty no depende de cuántos dashboards estén abiertos.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('network_admin.interface_cache')
+
+# Valores por defecto
+DEFAULT_TTL = 30
+REFRESH_WORKERS = 4
+
+# Estado de la respuesta (cabecera X-Cache)
+HIT = 'HIT'
+STALE = 'STALE'
+MISS = 'MISS'
+BYPASS = 'BYPASS'
+
+class _Entry:
+    def __init__(self):
+        self.value = None
+        self.fetched_at = None
+        self.lock = threading.Lock()       # serializa las consultas al equipo
+        self.refreshing = False
+
+class InterfaceCache:
+    """Caché por dispositivo de resultados de interfaces"""
+
+    def __init__(self, fetch, ttl=DEFAULT_TTL, refresh_workers=REFRESH_WORKERS):
+        self.fetch = fetch
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._refresh_pool = ThreadPoolExecutor(max_workers=refresh_workers,
+                                                thread_name_prefix='iface-refresh')
+
+    def _entry(self, device_name):
+        with self._lock:
+            return self._entries.setdefault(device_name, _Entry())
+
+    def _load(self, device_name, device_info, entry, since=None):
+        """
+        Consultar el equipo y guardar el resultado.
+
+        Si otro hilo ya actualizó la entrada mientras se esperaba el lock
+        (fetched_at posterior a since), se reutiliza ese resultado.
+        """
+        with entry.lock:
+            if since is not None and entry.fetched_at is not None and entry.fetched_at > since:
+                return entry.value
+            value = self.fetch(device_name, device_info)
+            if value is not None:
+                entry.value = value
+                entry.fetched_at = time.monotonic()
+            return value
+
+    def _refresh(self, device_name, device_info, entry):
+        try:
+            self._load(device_name, device_info, entry)
+        except Exception as e:
+            logger.error(f"Error actualizando interfaces de {device_name}: {e}")
+        finally:
+            entry.refreshing = False
+
+    def get(self, device_name, device_info, fresh=False):
+        """
+        Devolver (interfaces, age, state).
+
+        age son los segundos desde la consulta al equipo y state uno de
+        HIT, STALE, MISS o BYPASS (fresh=True ignora la caché).
+        """
+        entry = self._entry(device_name)
+        requested = time.monotonic()
+
+        if fresh or entry.fetched_at is None:
+            value = self._load(device_name, device_info, entry, since=None if fresh else requested)
+            return value, 0, BYPASS if fresh else MISS
+
+        age = time.monotonic() - entry.fetched_at
+        if age <= self.ttl:
+            return entry.value, age, HIT
+
+        # Valor caducado: servirlo y revalidar en segundo plano una sola vez
+        with self._lock:
+            start_refresh = not entry.refreshing
+            entry.refreshing = True
+        if start_refresh:
+            self._refresh_pool.submit(self._refresh, device_name, device_info, entry)
+        return entry.value, age, STALE
+
+    def invalidate(self, device_name=None):
+        """Olvidar un dispositivo (o todos)"""
+        with self._lock:
+            if device_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(device_name, None)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_interface_cache(ttl=None):
+    """Obtener la caché compartida del proceso (usa network_admin.get_interfaces)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from network_admin import get_interfaces
+            _cache = InterfaceCache(get_interfaces, ttl=ttl or DEFAULT_TTL)
+        elif ttl:
+            _cache.ttl = ttl
+        return _cache
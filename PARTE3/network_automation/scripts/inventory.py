@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Inventario de dispositivos en caché
+Parte III - Administración de Redes
+
+Parsea devices.yaml una sola vez y lo vuelve a leer solo cuando cambia el
+archivo (mtime/tamaño y, si estos cambian, el hash del contenido). Mantiene
+índices por nombre y por IP para búsquedas O(1).
+"""
+
+import os
+import yaml
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger('network_admin.inventory')
+
+BASE_DIR = '/root/network_automation'
+DEVICES_FILE = os.path.join(BASE_DIR, 'configs', 'devices.yaml')
+
+DEVICE_TYPES = ['routers', 'switches']
+
+class Inventory:
+    """Vista en caché e indexada de devices.yaml"""
+
+    def __init__(self, path=DEVICES_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stat = None
+        self._digest = None
+        self._data = None
+        self._by_name = {}
+        self._by_ip = {}
+
+    def _refresh(self):
+        """Recargar el archivo si cambió desde la última lectura"""
+        st = os.stat(self.path)
+        stat_key = (st.st_mtime_ns, st.st_size)
+        if stat_key == self._stat:
+            return
+
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        self._stat = stat_key
+        if digest == self._digest:
+            return
+
+        data = yaml.safe_load(raw)
+        by_name = {}
+        by_ip = {}
+        for device_type in DEVICE_TYPES:
+            for name, info in (data.get('devices', {}).get(device_type) or {}).items():
+                by_name[name] = (device_type, info)
+                by_ip[info['ip']] = name
+        # Direcciones adicionales (p. ej. origen de syslog), sin pisar las de gestión
+        for name, (device_type, info) in by_name.items():
+            for address in info.get('addresses') or []:
+                by_ip.setdefault(address, name)
+
+        self._data = data
+        self._by_name = by_name
+        self._by_ip = by_ip
+        self._digest = digest
+        logger.info(f"Inventario cargado: {len(by_name)} dispositivos")
+
+    def _current(self):
+        with self._lock:
+            self._refresh()
+            return self
+
+    @property
+    def data(self):
+        """Contenido completo de devices.yaml"""
+        return self._current()._data
+
+    def get(self, name):
+        """Devolver (device_type, info) de un dispositivo o None"""
+        return self._current()._by_name.get(name)
+
+    def name_for_ip(self, ip):
+        """Nombre del dispositivo con esa IP (de gestión o de addresses) o None"""
+        return self._current()._by_ip.get(ip)
+
+    def devices(self, device_type=None):
+        """Lista de tuplas (name, info), routers primero y luego switches"""
+        by_name = self._current()._by_name
+        return [
+            (name, info) for name, (dtype, info) in by_name.items()
+            if device_type is None or dtype == device_type
+        ]
+
+    def __len__(self):
+        return len(self._current()._by_name)
+
+_inventory = None
+_inventory_lock = threading.Lock()
+
+def get_inventory():
+    """Obtener el inventario compartido del proceso"""
+    global _inventory
+    with _inventory_lock:
+        if _inventory is None:
+            _inventory = Inventory()
+        return _inventory
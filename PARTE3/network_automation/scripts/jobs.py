@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Cola de trabajos para operaciones largas sobre la flota
+Parte III - Administración de Redes
+
+Las operaciones (backup, NTP, ping...) se encolan y devuelven un ID de
+trabajo al instante. Un pool acotado de workers, compartido por todos los
+tipos de operación, las ejecuta en segundo plano mientras la API consulta
+el progreso y los resultados por dispositivo.
+"""
+
+import uuid
+import logging
+import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('network_admin.jobs')
+
+# Valores por defecto
+JOB_WORKERS = 4
+MAX_FINISHED_JOBS = 200
+
+# Estados de un trabajo
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+def _now():
+    return datetime.datetime.now().isoformat()
+
+def to_json(value):
+    """Convertir resultados (p. ej. registros con to_dict) en tipos JSON"""
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    return value
+
+def default_success(result):
+    """
+    Éxito de un resultado por dispositivo con la convención de network_admin:
+    None o False es un fallo; un dict con clave "success" (ping) decide por sí mismo.
+    """
+    if isinstance(result, dict) and "success" in result:
+        return bool(result["success"])
+    return result is not None and result is not False
+
+class Job:
+    """Trabajo en segundo plano con progreso y resultados por dispositivo"""
+
+    def __init__(self, operation, params, total=0, success=default_success):
+        self.id = uuid.uuid4().hex
+        self.operation = operation
+        self.params = params
+        self.status = PENDING
+        self.total = total
+        self.completed = 0
+        self.devices = OrderedDict()
+        self.result = None
+        self.error = None
+        self.created = _now()
+        self.started = None
+        self.finished = None
+        self.success = success
+        self.cancel_event = threading.Event()
+        self.future = None
+        self._lock = threading.Lock()
+
+    def record(self, name, result, error):
+        """Callback on_result: registrar el resultado de un dispositivo"""
+        with self._lock:
+            self.completed += 1
+            if error is not None:
+                self.devices[name] = {"success": False, "error": str(error)}
+            else:
+                self.devices[name] = {"success": self.success(result), "result": to_json(result)}
+
+    def is_finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def to_dict(self, details=True):
+        with self._lock:
+            data = {
+                "id": self.id,
+                "operation": self.operation,
+                "params": self.params,
+                "status": self.status,
+                "progress": {"completed": self.completed, "total": self.total},
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+            }
+            if self.error:
+                data["error"] = self.error
+            if details:
+                data["devices"] = dict(self.devices)
+                data["result"] = self.result
+            return data
+
+class JobManager:
+    """Gestor de trabajos con capacidad acotada compartida"""
+
+    def __init__(self, max_workers=JOB_WORKERS, max_finished=MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, operation, func, *args, params=None, total=0, success=None):
+        """
+        Encolar func(*args, on_result=..., cancel=...) y devolver el Job.
+
+        func debe aceptar los callbacks on_result y cancel de FleetExecutor.
+        success(result) decide si el resultado de un dispositivo es un éxito
+        (por defecto, default_success).
+        """
+        job = Job(operation, params or {}, total=total, success=success or default_success)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+        job.future = self._pool.submit(self._execute, job, func, *args)
+        logger.info(f"Trabajo {job.id} ({operation}) encolado")
+        return job
+
+    def _execute(self, job, func, *args):
+        if job.cancel_event.is_set():
+            # Cancelado cuando el worker ya lo había sacado de la cola
+            # (future.cancel() ya no lo marca en ese caso)
+            job.status = CANCELLED
+            job.finished = _now()
+            logger.info(f"Trabajo {job.id} ({job.operation}) terminado: {job.status}")
+            return
+        job.status = RUNNING
+        job.started = _now()
+        try:
+            job.result = to_json(func(*args, on_result=job.record, cancel=job.cancel_event))
+            job.status = CANCELLED if job.cancel_event.is_set() else DONE
+        except Exception as e:
+            logger.error(f"Error en trabajo {job.id} ({job.operation}): {e}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished = _now()
+            logger.info(f"Trabajo {job.id} ({job.operation}) terminado: {job.status}")
+
+    def _trim(self):
+        """Descartar los trabajos terminados más antiguos"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished()]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, status=None):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in reversed(jobs) if status is None or job.status == status]
+
+    def cancel(self, job_id):
+        """
+        Cancelar un trabajo.
+
+        Un trabajo pendiente no llega a ejecutarse; uno en curso deja de
+        lanzar dispositivos nuevos y termina los que ya estaban en marcha.
+        """
+        job = self.get(job_id)
+        if job is None or job.is_finished():
+            return job
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            job.status = CANCELLED
+            job.finished = _now()
+        logger.info(f"Cancelación solicitada para el trabajo {job_id}")
+        return job
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_job_manager():
+    """Obtener el gestor de trabajos compartido del proceso"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Índice de búsqueda de logs de red
+Parte III - Administración de Redes
+
+Indexa de forma incremental los segmentos del receptor syslog
+(logstore/segments/*.jsonl), los archivos de rsyslog en /var/log/network
+(*.log) y los comprimidos por syslog_maintenance.sh (*.log.gz). Cada
+línea se guarda una vez en un catálogo SQLite con índices por fecha,
+dispositivo, severidad y mnemónico, y su texto en un índice invertido
+FTS5; así una búsqueda como "todos los %OSPF-5-ADJCHG de la última
+semana" no descomprime ni recorre ningún archivo.
+
+De cada archivo se recuerda hasta qué byte se indexó, su inodo y sus
+primeros bytes (la "cabecera"): en los activos solo se lee lo añadido, y
+cuando un .log se comprime se reconoce el .gz por su cabecera y se
+continúa desde ese mismo punto, sin duplicar entradas, aunque rsyslog ya
+haya vuelto a crear el .log.
+
+Uso: python log_index.py [--device R1] [--mnemonic OSPF-5-ADJCHG] [--since 7d] [texto]
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import datetime
+import threading
+
+from inventory import get_inventory
+from backup_store import parse_time
+from syslog_server import parse_syslog, SEVERITIES, LOGSTORE_DIR
+
+logger = logging.getLogger('network_admin.log_index')
+
+NETWORK_LOG_DIR = '/var/log/network'
+INDEX_FILE = os.path.join(LOGSTORE_DIR, 'index.db')
+
+# Frecuencia máxima de actualización del índice al consultar (segundos)
+REFRESH_INTERVAL = 2
+BATCH_SIZE = 5000
+# Bytes iniciales que identifican un archivo (empiezan con fecha y host)
+HEAD_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    inode INTEGER NOT NULL DEFAULT 0,
+    head BLOB NOT NULL DEFAULT x''
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    source INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    device TEXT,
+    severity INTEGER,
+    mnemonic TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries (ts);
+CREATE INDEX IF NOT EXISTS entries_device_ts ON entries (device, ts);
+CREATE INDEX IF NOT EXISTS entries_severity_ts ON entries (severity, ts);
+CREATE INDEX IF NOT EXISTS entries_mnemonic_ts ON entries (mnemonic, ts);
+CREATE INDEX IF NOT EXISTS entries_source ON entries (source);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_text USING fts5 (text, content='entries', content_rowid='id');
+"""
+
+ISO_TIME_RE = re.compile(r"(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.\d+)?(?:Z|[+-]\d\d:\d\d)?) (.*)", re.S)
+TRADITIONAL_TIME_RE = re.compile(r"([A-Z][a-z]{2}) +(\d{1,2}) (\d\d):(\d\d):(\d\d) (.*)", re.S)
+MONTHS = {name: index for index, name in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], 1)}
+
+def parse_severity(value):
+    """Severidad por número (0-7) o nombre (err, warning...)"""
+    if value is None or value == '':
+        return None
+    if str(value).isdigit() and 0 <= int(value) <= 7:
+        return int(value)
+    if value in SEVERITIES:
+        return SEVERITIES.index(value)
+    raise ValueError(f"Severidad no válida: {value} (0-7 o {', '.join(SEVERITIES)})")
+
+def to_epoch(value, end_of_day=False):
+    """Fecha de la API (ISO o relativa como 30m/6h/7d) a segundos epoch"""
+    if value is None or value == '':
+        return None
+    relative = re.match(r"^(\d+)([mhd])$", str(value))
+    if relative:
+        return time.time() - int(relative.group(1)) * {'m': 60, 'h': 3600, 'd': 86400}[relative.group(2)]
+    return datetime.datetime.strptime(parse_time(value, end_of_day), "%Y-%m-%dT%H:%M:%S").timestamp()
+
+def format_entry(ts, device, severity, mnemonic, text):
+    """Entrada de log tal como la devuelve la API"""
+    return {
+        "timestamp": datetime.datetime.fromtimestamp(ts).isoformat(timespec='seconds'),
+        "device": device,
+        "severity": SEVERITIES[severity] if severity is not None else None,
+        "mnemonic": mnemonic,
+        "text": text
+    }
+
+def parse_file_line(line, default_device, reference):
+    """
+    Interpretar una línea de rsyslog ("May 19 05:12:31 <ip> mensaje" o con
+    fecha RFC 3339). reference (mtime del archivo) da el año que falta en
+    el formato tradicional.
+    """
+    iso = ISO_TIME_RE.match(line)
+    if iso:
+        stamp = iso.group(1).replace('Z', '+00:00')
+        try:
+            ts = datetime.datetime.fromisoformat(stamp).timestamp()
+        except ValueError:
+            ts = reference
+        rest = iso.group(2)
+    else:
+        traditional = TRADITIONAL_TIME_RE.match(line)
+        if not traditional or traditional.group(1) not in MONTHS:
+            return None
+        month, day, hour, minute, second, rest = traditional.groups()
+        year = datetime.datetime.fromtimestamp(reference).year
+        try:
+            moment = datetime.datetime(year, MONTHS[month], int(day), int(hour), int(minute), int(second))
+        except ValueError:
+            return None
+        # Líneas de diciembre en un archivo modificado en enero
+        if moment.timestamp() > reference + 2 * 86400:
+            moment = moment.replace(year=year - 1)
+        ts = moment.timestamp()
+
+    host, _, message = rest.partition(' ')
+    record = parse_syslog(message, host, ts)
+    record["device"] = default_device
+    record["host"] = host
+    record["text"] = message
+    if record["mnemonic"] is None:
+        record["severity"] = None   # sin prioridad en el archivo: severidad desconocida
+    return record
+
+class LogIndex:
+    """Catálogo SQLite + FTS5 de las líneas de log de todas las fuentes"""
+
+    def __init__(self, path=INDEX_FILE, segments_dir=None, log_dir=NETWORK_LOG_DIR):
+        self.path = path
+        self.segments_dir = segments_dir or os.path.join(LOGSTORE_DIR, 'segments')
+        self.log_dir = log_dir
+        self._lock = threading.Lock()
+        self._refreshed = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(sources)")}
+        if 'inode' not in columns:
+            # Índice creado antes de guardar la identidad de cada archivo
+            self._db.execute("ALTER TABLE sources ADD COLUMN inode INTEGER NOT NULL DEFAULT 0")
+            self._db.execute("ALTER TABLE sources ADD COLUMN head BLOB NOT NULL DEFAULT x''")
+
+    # -- Fuentes ------------------------------------------------------------
+
+    def _discover(self):
+        """Rutas de todas las fuentes existentes"""
+        paths = []
+        for directory, suffixes in ((self.segments_dir, ('.jsonl',)), (self.log_dir, ('.log', '.log.gz'))):
+            if not os.path.isdir(directory):
+                continue
+            for filename in sorted(os.listdir(directory)):
+                if filename.endswith(suffixes):
+                    paths.append(os.path.join(directory, filename))
+        return paths
+
+    def _device_for_file(self, path):
+        """Dispositivo de un archivo de rsyslog (<ip>.log o <ip>.log.gz)"""
+        filename = os.path.basename(path)
+        ip = filename[:-len('.log.gz')] if filename.endswith('.log.gz') else filename[:-len('.log')]
+        return get_inventory().name_for_ip(ip) or ip
+
+    def _head(self, path):
+        """Primeros HEAD_SIZE bytes del contenido (descomprimido en los .gz)"""
+        opener = gzip.open if path.endswith('.gz') else open
+        try:
+            with opener(path, 'rb') as f:
+                return f.read(HEAD_SIZE)
+        except (OSError, EOFError):
+            return b''
+
+    def _same_file(self, path, st, source):
+        """¿Sigue path siendo el archivo que se indexó como source?"""
+        source_id, _, size, mtime, offset, inode, head = source
+        if not inode:
+            return st.st_size >= offset   # fuente anterior a guardar el inodo
+        if st.st_ino != inode:
+            return False
+        if st.st_size == size and int(st.st_mtime) == mtime:
+            return True
+        # El inodo de un archivo borrado se puede reutilizar: comprobar la cabecera
+        return st.st_size >= offset and self._head(path)[:len(head)] == head
+
+    def _read_lines(self, path, offset):
+        """Líneas completas desde offset (descomprimido en los .gz); devuelve (líneas, nuevo offset)"""
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        if not path.endswith('.gz'):
+            data = data[:end]   # la última línea del archivo activo puede estar a medias
+        else:
+            end = len(data)
+        return data.decode('utf-8', errors='replace').splitlines(), offset + end
+
+    def _records(self, path, lines, reference):
+        if path.endswith('.jsonl'):
+            for line in lines:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+        else:
+            device = self._device_for_file(path)
+            for line in lines:
+                record = parse_file_line(line, device, reference)
+                if record is not None:
+                    yield record
+
+    def _insert(self, source_id, records):
+        rows = [(source_id, record["ts"], record.get("device"), record.get("severity"),
+                 record.get("mnemonic"), record["text"]) for record in records]
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch = rows[start:start + BATCH_SIZE]
+            cursor = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM entries")
+            first_id = cursor.fetchone()[0] + 1
+            self._db.executemany(
+                "INSERT INTO entries (id, source, ts, device, severity, mnemonic, text) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(first_id + index,) + row for index, row in enumerate(batch)]
+            )
+            self._db.executemany(
+                "INSERT INTO entries_text (rowid, text) VALUES (?, ?)",
+                [(first_id + index, row[-1]) for index, row in enumerate(batch)]
+            )
+        return len(rows)
+
+    def _drop_source(self, source_id):
+        """Quitar del índice las entradas de una fuente (archivo borrado o truncado)"""
+        self._db.execute(
+            "INSERT INTO entries_text (entries_text, rowid, text) "
+            "SELECT 'delete', id, text FROM entries WHERE source = ?", (source_id,)
+        )
+        self._db.execute("DELETE FROM entries WHERE source = ?", (source_id,))
+
+    def refresh(self, force=False):
+        """
+        Indexar lo nuevo de cada fuente.
+
+        Devuelve el número de entradas añadidas. Sin force, no hace nada si
+        la última actualización fue hace menos de REFRESH_INTERVAL segundos.
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed < REFRESH_INTERVAL:
+                return 0
+            added = 0
+            known = {row[1]: row for row in self._db.execute(
+                "SELECT id, path, size, mtime, offset, inode, head FROM sources")}
+            paths = self._discover()
+            existing = set(paths)
+            new_archives = [path for path in paths if path.endswith('.gz') and path not in known]
+
+            with self._db:
+                # Fuentes activas que ya no son el archivo indexado: rotadas
+                # (su contenido está ahora en un .gz nuevo con la misma
+                # cabecera) o sustituidas por otro archivo
+                for path, source in list(known.items()):
+                    if path.endswith('.gz'):
+                        continue
+                    st = os.stat(path) if path in existing else None
+                    if st is not None and self._same_file(path, st, source):
+                        continue
+                    source_id, head = source[0], source[6]
+                    archive = next((candidate for candidate in new_archives
+                                    if head and self._head(candidate)[:len(head)] == head), None)
+                    if archive is not None:
+                        # Continuar en el .gz desde el mismo offset
+                        self._db.execute("UPDATE sources SET path = ? WHERE id = ?", (archive, source_id))
+                        known[archive] = (source_id, archive, -1, -1, source[4], 0, head)
+                        new_archives.remove(archive)
+                        del known[path]
+                    elif st is not None:
+                        # Sustituido sin rastro del anterior: reindexar desde el principio
+                        self._drop_source(source_id)
+                        known[path] = (source_id, path, -1, -1, 0, st.st_ino, b'')
+
+                for path in paths:
+                    st = os.stat(path)
+                    source = known.get(path)
+                    if source is None:
+                        cursor = self._db.execute(
+                            "INSERT INTO sources (path, size, mtime, offset) VALUES (?, 0, 0, 0)", (path,)
+                        )
+                        source = (cursor.lastrowid, path, 0, 0, 0, 0, b'')
+                    source_id, _, size, mtime, offset, inode, head = source
+                    if st.st_size == size and int(st.st_mtime) == mtime and st.st_ino == inode:
+                        continue
+                    if not path.endswith('.gz') and st.st_size < offset:
+                        # Archivo truncado en el sitio: reindexar desde el principio
+                        self._drop_source(source_id)
+                        offset = 0
+                        head = b''
+
+                    lines, new_offset = self._read_lines(path, offset)
+                    added += self._insert(source_id, self._records(path, lines, st.st_mtime))
+                    if len(head) < HEAD_SIZE:
+                        head = self._head(path)
+                    self._db.execute(
+                        "UPDATE sources SET size = ?, mtime = ?, offset = ?, inode = ?, head = ? WHERE id = ?",
+                        (st.st_size, int(st.st_mtime), new_offset, st.st_ino, head, source_id)
+                    )
+
+                # Archivos eliminados (retención de syslog_maintenance.sh)
+                for path, source in known.items():
+                    if path not in existing:
+                        self._drop_source(source[0])
+                        self._db.execute("DELETE FROM sources WHERE id = ?", (source[0],))
+
+            self._refreshed = time.monotonic()
+            if added:
+                logger.info(f"Índice de logs: {added} entradas nuevas")
+            return added
+
+    # -- Consultas ----------------------------------------------------------
+
+    def search(self, device=None, severity=None, mnemonic=None, start=None, end=None, q=None,
+               limit=100, offset=0):
+        """
+        Buscar entradas, de la más reciente a la más antigua.
+
+        severity incluye esa severidad y las más graves (como en IOS);
+        mnemonic puede ser completo (OSPF-5-ADJCHG) o solo la facilidad
+        (OSPF); q son palabras que deben aparecer todas en el mensaje;
+        start/end son segundos epoch.
+        """
+        self.refresh()
+        clauses, params = [], []
+        if device:
+            clauses.append("e.device = ?")
+            params.append(device)
+        if severity is not None:
+            clauses.append("e.severity <= ?")
+            params.append(severity)
+        if mnemonic:
+            mnemonic = mnemonic.lstrip('%').upper()
+            if '-' in mnemonic:
+                clauses.append("e.mnemonic = ?")
+                params.append(mnemonic)
+            else:
+                clauses.append("e.mnemonic LIKE ?")
+                params.append(f"{mnemonic}-%")
+        if start is not None:
+            clauses.append("e.ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("e.ts <= ?")
+            params.append(end)
+        source = "entries e"
+        if q:
+            # Cada palabra como frase literal, para que la sintaxis FTS5 no se interprete
+            terms = ' '.join('"{}"'.format(term.replace('"', '""')) for term in q.split())
+            source = "entries_text t JOIN entries e ON e.id = t.rowid"
+            clauses.append("entries_text MATCH ?")
+            params.append(terms)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.extend([limit, offset])
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT e.ts, e.device, e.severity, e.mnemonic, e.text FROM {source} {where} "
+                f"ORDER BY e.ts DESC, e.id DESC LIMIT ? OFFSET ?",
+                params
+            ).fetchall()
+        return [format_entry(*row) for row in rows]
+
+    def device_counts(self, error_severity=3):
+        """{device: (entradas, entradas con severidad <= error_severity, último ts)}"""
+        self.refresh()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT device, COUNT(*), SUM(severity <= ?), MAX(ts) FROM entries GROUP BY device",
+                (error_severity,)
+            ).fetchall()
+        return {device: (count, errors or 0, last) for device, count, errors, last in rows}
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            sources = self._db.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
+        return {"entries": entries, "sources": sources}
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_log_index():
+    """Obtener el índice de logs compartido del proceso"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            settings = (get_inventory().data or {}).get('syslog') or {}
+            _index = LogIndex(log_dir=settings.get('log_dir', NETWORK_LOG_DIR))
+        return _index
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Búsqueda en los logs de red")
+    parser.add_argument("query", nargs="*", help="Palabras que deben aparecer en el mensaje")
+    parser.add_argument("--device", help="Dispositivo")
+    parser.add_argument("--severity", help="Severidad máxima (0-7 o nombre)")
+    parser.add_argument("--mnemonic", help="Mnemónico Cisco (OSPF-5-ADJCHG) o facilidad (OSPF)")
+    parser.add_argument("--since", help="Desde (fecha o relativo: 30m, 6h, 7d)")
+    parser.add_argument("--limit", type=int, default=50, help="Máximo de resultados")
+    args = parser.parse_args()
+
+    index = get_log_index()
+    start = time.monotonic()
+    added = index.refresh(force=True)
+    print(f"Índice actualizado: {added} entradas nuevas en {time.monotonic() - start:.2f}s ({index.stats()})")
+
+    start = time.monotonic()
+    results = index.search(device=args.device, severity=parse_severity(args.severity), mnemonic=args.mnemonic,
+                           start=to_epoch(args.since), q=' '.join(args.query) or None, limit=args.limit)
+    for entry in reversed(results):
+        print(f"{entry['timestamp']} {entry['device']} {entry['text']}")
+    print(f"\n{len(results)} resultados en {(time.monotonic() - start) * 1000:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Difusión en vivo de los logs de red
+Parte III - Administración de Redes
+
+Un único LogBroker reparte cada línea nueva entre todos los clientes
+suscritos (el endpoint SSE /api/logs/stream), cada uno con sus filtros de
+dispositivo y severidad y una cola acotada: un cliente lento pierde sus
+mensajes más antiguos, nunca frena al resto ni hace crecer la memoria.
+
+Las líneas llegan por eventos, sin sondeos periódicos: del receptor
+syslog integrado (add_listener) o, si este está desactivado, de inotify
+sobre /var/log/network, que avisa cuando rsyslog escribe en un <ip>.log.
+"""
+
+import os
+import time
+import queue
+import ctypes
+import ctypes.util
+import select
+import struct
+import logging
+import threading
+
+from inventory import get_inventory
+from log_index import parse_file_line, format_entry, NETWORK_LOG_DIR
+from syslog_server import get_syslog_server, syslog_settings
+
+logger = logging.getLogger('network_admin.log_stream')
+
+# Mensajes pendientes por cliente antes de descartar los más antiguos
+CLIENT_QUEUE_SIZE = 1000
+# Segundos sin mensajes tras los que se envía un comentario SSE de keepalive
+KEEPALIVE_INTERVAL = 15
+
+# Constantes de inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CREATE = 0x00000100
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct('iIII')
+
+def format_record(record):
+    """Registro del receptor o de un archivo en el formato de /api/logs"""
+    return format_entry(record["ts"], record.get("device"), record.get("severity"),
+                        record.get("mnemonic"), record["text"])
+
+class Subscription:
+    """Cola acotada de un cliente con sus filtros"""
+
+    def __init__(self, device=None, severity=None, size=CLIENT_QUEUE_SIZE):
+        self.device = device
+        self.severity = severity
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=size)
+
+    def matches(self, record):
+        if self.device and record.get("device") != self.device:
+            return False
+        if self.severity is not None and (record.get("severity") is None or record["severity"] > self.severity):
+            return False
+        return True
+
+    def put(self, record):
+        """Encolar sin bloquear; si la cola está llena se descarta el más antiguo"""
+        while True:
+            try:
+                self._queue.put_nowait(record)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Siguiente registro o None si no llega ninguno en timeout segundos"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class LogBroker:
+    """Reparte los registros de log entre las suscripciones activas"""
+
+    def __init__(self):
+        self._subscriptions = set()
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._started = False
+        self.published = 0
+
+    def subscribe(self, device=None, severity=None):
+        subscription = Subscription(device, severity)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def add_listener(self, callback):
+        """Registrar callback(records) que recibe todos los lotes sin filtrar"""
+        self.listeners.append(callback)
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, records):
+        """Entregar un lote de registros a cada suscripción que los acepte"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        self.published += len(records)
+        for callback in self.listeners:
+            try:
+                callback(records)
+            except Exception as e:
+                logger.error(f"Error en un suscriptor de logs: {e}")
+        for subscription in subscriptions:
+            for record in records:
+                if subscription.matches(record):
+                    subscription.put(record)
+
+    def stats(self):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        return {
+            "clients": len(subscriptions),
+            "published": self.published,
+            "dropped": sum(subscription.dropped for subscription in subscriptions)
+        }
+
+    def start(self):
+        """
+        Conectar la fuente de logs: el receptor syslog si está activo o, si
+        no, inotify sobre los archivos de rsyslog.
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        settings = syslog_settings()
+        if settings.get('enabled'):
+            get_syslog_server().add_listener(self.publish)
+            logger.info("Difusión de logs conectada al receptor syslog")
+        else:
+            FileWatcher(settings.get('log_dir', NETWORK_LOG_DIR), self.publish).start()
+
+class FileWatcher:
+    """Sigue los *.log de un directorio con inotify y publica las líneas nuevas"""
+
+    def __init__(self, directory, callback):
+        self.directory = directory
+        self.callback = callback
+        self._offsets = {}
+        self._partial = {}
+        self._stop = threading.Event()
+
+    def start(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if not hasattr(libc, 'inotify_init1') or not os.path.isdir(self.directory):
+            logger.error(f"No se pueden seguir los logs de {self.directory} (sin inotify o sin directorio)")
+            return False
+        fd = libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0 or libc.inotify_add_watch(fd, self.directory.encode(), IN_MODIFY | IN_CREATE | IN_MOVED_TO) < 0:
+            logger.error(f"Error de inotify en {self.directory}: {os.strerror(ctypes.get_errno())}")
+            return False
+        # Solo interesa lo que se escriba a partir de ahora
+        for filename in os.listdir(self.directory):
+            if filename.endswith('.log'):
+                self._offsets[filename] = os.path.getsize(os.path.join(self.directory, filename))
+        threading.Thread(target=self._loop, args=(fd,), name='log-watcher', daemon=True).start()
+        logger.info(f"Siguiendo {self.directory} con inotify")
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self, fd):
+        try:
+            while not self._stop.is_set():
+                # El timeout solo sirve para comprobar stop(); los avisos llegan por el descriptor
+                readable, _, _ = select.select([fd], [], [], 1.0)
+                if not readable:
+                    continue
+                changed = set()
+                data = os.read(fd, 65536)
+                position = 0
+                while position < len(data):
+                    _, mask, _, length = EVENT_HEADER.unpack_from(data, position)
+                    name = data[position + EVENT_HEADER.size:position + EVENT_HEADER.size + length]
+                    position += EVENT_HEADER.size + length
+                    filename = name.rstrip(b'\0').decode(errors='replace')
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._offsets[filename] = 0
+                        self._partial.pop(filename, None)
+                    if mask & IN_Q_OVERFLOW:
+                        # Se perdieron avisos: revisar todos los archivos conocidos
+                        changed.update(self._offsets)
+                    elif filename.endswith('.log'):
+                        changed.add(filename)
+                for filename in changed:
+                    self._read_new(filename)
+        except Exception as e:
+            logger.error(f"Error siguiendo los logs de {self.directory}: {e}")
+        finally:
+            os.close(fd)
+
+    def _read_new(self, filename):
+        path = os.path.join(self.directory, filename)
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                offset = self._offsets.get(filename, 0)
+                if size < offset:
+                    offset = 0   # truncado o rotado
+                    self._partial.pop(filename, None)
+                f.seek(offset)
+                data = self._partial.pop(filename, b'') + f.read()
+                self._offsets[filename] = f.tell()
+        except FileNotFoundError:
+            self._offsets.pop(filename, None)
+            return
+        lines = data.split(b'\n')
+        if lines[-1]:
+            self._partial[filename] = lines[-1]
+        ip = filename[:-len('.log')]
+        device = get_inventory().name_for_ip(ip) or ip
+        now = time.time()
+        records = []
+        for line in lines[:-1]:
+            record = parse_file_line(line.decode('utf-8', errors='replace'), device, now)
+            if record is not None:
+                records.append(record)
+        if records:
+            self.callback(records)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_log_broker():
+    """Obtener el difusor de logs compartido del proceso"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = LogBroker()
+        return _broker
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Caché de métricas para Zabbix
+Parte III - Administración de Redes
+
+Mantiene en memoria, por dispositivo, las últimas líneas de log, los
+contadores de líneas y errores y el estado del último sondeo SNMP. Los
+valores se actualizan por eventos (LogBroker y MonitorPoller), así que
+consultar un item de Zabbix es una búsqueda en un diccionario en lugar de
+un tail/wc sobre el archivo de log.
+
+El agente de Zabbix tiene un único item maestro (network.metrics) que
+obtiene GET /api/zabbix con todos los valores en un JSON; el resto de
+items (network.log.r1, network.log.count.r1...) son items dependientes
+de Zabbix que extraen su valor con un preprocesado JSONPath, así que
+cada sondeo del agente es una sola petición HTTP y ningún comando por
+item:
+
+    python metrics_cache.py --userparams > /etc/zabbix/zabbix_agentd.d/network_logs.conf
+    python metrics_cache.py --items      # items dependientes a crear en Zabbix
+"""
+
+import re
+import sys
+import json
+import logging
+import argparse
+import threading
+from collections import deque
+
+from inventory import get_inventory
+from log_index import get_log_index, format_entry
+
+logger = logging.getLogger('network_admin.metrics_cache')
+
+API_URL = 'http://127.0.0.1:5000'
+LOG_LINES = 10
+ALL_LOG_LINES = 20
+ERROR_SEVERITY = 3   # err y más graves
+
+# Claves por dispositivo: network.<métrica>.<dispositivo en minúsculas>
+DEVICE_KEY_RE = re.compile(
+    r"^network\.(log\.count|log\.errors|log\.last|device\.up|device\.uptime|device\.interfaces_down|log)\.([^.]+)$"
+)
+
+# Métricas por dispositivo (clave network.<métrica>.<dispositivo>)
+DEVICE_METRICS = ['log', 'log.count', 'log.errors', 'log.last', 'device.up', 'device.uptime',
+                  'device.interfaces_down']
+GLOBAL_KEYS = ['network.log.all', 'network.devices.active']
+MASTER_KEY = 'network.metrics'
+DISCOVERY_KEY = 'network.devices.discovery'
+
+def format_line(record):
+    entry = format_entry(record["ts"], record.get("device"), record.get("severity"),
+                         record.get("mnemonic"), record["text"])
+    return f"{entry['timestamp']} {entry['device']} {entry['text']}"
+
+class MetricsCache:
+    """Resúmenes por dispositivo que se sirven a Zabbix sin tocar disco"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._logs = {}
+        self._all = deque(maxlen=ALL_LOG_LINES)
+        self._counts = {}
+        self._errors = {}
+        self._last = {}
+        self._state = {}
+        self._names = {}
+        # Registros del LogBroker recibidos mientras se carga el índice
+        self._pending = None
+        self.lookups = 0
+
+    def seed(self):
+        """
+        Cargar contadores y últimas líneas del índice de logs (al arrancar).
+
+        El índice ya contiene las líneas en disco que el LogBroker entregó
+        mientras se cargaba: de los registros retenidos en ese tiempo solo
+        se suman, por dispositivo, los posteriores al último ts indexado.
+        """
+        index = get_log_index()
+        counts = index.device_counts(error_severity=ERROR_SEVERITY)
+        logs = {}
+        for device_name, (count, errors, last) in counts.items():
+            logs[device_name] = [f"{entry['timestamp']} {entry['device']} {entry['text']}"
+                                 for entry in reversed(index.search(device=device_name, end=last, limit=LOG_LINES))]
+        with self._lock:
+            for device_name, (count, errors, last) in counts.items():
+                self._counts[device_name] = count
+                self._errors[device_name] = errors
+                self._last[device_name] = last
+                self._logs[device_name] = deque(logs[device_name], maxlen=LOG_LINES)
+            pending, self._pending = self._pending or [], None
+            for record in pending:
+                if record["ts"] > counts.get(record.get("device"), (0, 0, 0))[2]:
+                    self._add(record)
+        logger.info(f"Caché de métricas cargada: {len(counts)} dispositivos con logs")
+
+    def _add(self, record):
+        """Sumar un registro a los valores de su dispositivo (con el lock tomado)"""
+        device_name = record.get("device")
+        self._logs.setdefault(device_name, deque(maxlen=LOG_LINES)).append(format_line(record))
+        self._counts[device_name] = self._counts.get(device_name, 0) + 1
+        if record.get("severity") is not None and record["severity"] <= ERROR_SEVERITY:
+            self._errors[device_name] = self._errors.get(device_name, 0) + 1
+        self._last[device_name] = max(self._last.get(device_name, 0), record["ts"])
+
+    def update_logs(self, records):
+        """Listener del LogBroker: incorporar un lote de registros"""
+        with self._lock:
+            for record in records:
+                self._all.append(format_line(record))
+                if self._pending is not None:
+                    self._pending.append(record)
+                else:
+                    self._add(record)
+
+    def update_poll(self, results):
+        """Callback del MonitorPoller: estado del último sondeo SNMP"""
+        with self._lock:
+            for device_name, result in results.items():
+                if "error" in result:
+                    self._state[device_name] = {"up": 0, "uptime": None, "interfaces_down": None}
+                    continue
+                self._state[device_name] = {
+                    "up": 1,
+                    "uptime": int(result["uptime"]) if result.get("uptime") is not None else None,
+                    "interfaces_down": sum(1 for interface in result["interfaces"].values()
+                                           if interface["oper_status"] != 'up')
+                }
+
+    def discovery(self):
+        """Descubrimiento de bajo nivel (LLD) de Zabbix con los dispositivos de devices.yaml"""
+        return json.dumps({"data": [
+            {"{#DEVICE}": name, "{#DEVICEKEY}": name.lower(), "{#IP}": info['ip'], "{#TYPE}": info.get('type')}
+            for name, info in get_inventory().devices()
+        ]})
+
+    def value(self, key):
+        """
+        Valor de un item de Zabbix o None si la clave no existe.
+
+        Claves por dispositivo (sufijo = nombre en minúsculas): network.log,
+        network.log.count, network.log.errors, network.log.last (epoch),
+        network.device.up, network.device.uptime y
+        network.device.interfaces_down. Globales: network.log.all,
+        network.devices.active y network.devices.discovery.
+        """
+        self.lookups += 1
+        if key == 'network.devices.discovery':
+            return self.discovery()
+        with self._lock:
+            if key == 'network.log.all':
+                return '\n'.join(self._all)
+            if key == 'network.devices.active':
+                return str(sum(1 for count in self._counts.values() if count))
+
+            match = DEVICE_KEY_RE.match(key)
+            if not match:
+                return None
+            metric, device_key = match.groups()
+            if device_key not in self._names:
+                self._names = {name.lower(): name for name, _ in get_inventory().devices()}
+            device_name = self._names.get(device_key)
+            if device_name is None:
+                return None
+            if metric == 'log':
+                return '\n'.join(self._logs.get(device_name, ()))
+            if metric == 'log.count':
+                return str(self._counts.get(device_name, 0))
+            if metric == 'log.errors':
+                return str(self._errors.get(device_name, 0))
+            if metric == 'log.last':
+                return str(int(self._last.get(device_name, 0)))
+            state = self._state.get(device_name)
+            if state is None:
+                return ''
+            value = state[metric.split('.', 1)[1]]
+            return '' if value is None else str(value)
+
+    def snapshot(self):
+        """
+        Todos los valores en un único diccionario (item maestro de Zabbix).
+
+        Las claves son las de value(); el descubrimiento va como objeto
+        {"data": [...]} para que la regla LLD dependiente lo lea tal cual.
+        """
+        values = {key: self.value(key) for key in item_keys()}
+        values[DISCOVERY_KEY] = json.loads(self.discovery())
+        return values
+
+    def start(self, broker):
+        """Suscribirse al LogBroker y cargar el estado inicial en segundo plano"""
+        with self._lock:
+            self._pending = []
+        broker.add_listener(self.update_logs)
+        threading.Thread(target=self._seed_safely, name='metrics-seed', daemon=True).start()
+
+    def _seed_safely(self):
+        try:
+            self.seed()
+        except Exception as e:
+            logger.error(f"Error cargando la caché de métricas: {e}")
+            # Sin índice, contar al menos lo recibido desde el arranque
+            with self._lock:
+                pending, self._pending = self._pending or [], None
+                for record in pending:
+                    self._add(record)
+
+def item_keys():
+    """Claves de los items dependientes: las globales y las de cada dispositivo de devices.yaml"""
+    return GLOBAL_KEYS + [f"network.{metric}.{name.lower()}"
+                          for name, _ in get_inventory().devices() for metric in DEVICE_METRICS]
+
+def jsonpath(key):
+    """Preprocesado JSONPath que extrae una clave del JSON del item maestro"""
+    return f"$['{key}']"
+
+def userparams(api_url=API_URL):
+    """
+    Configuración del agente de Zabbix: solo el item maestro.
+
+    Los demás items se crean en Zabbix como "Item dependiente" de
+    network.metrics con el JSONPath de items() (no hay un comando por item).
+    """
+    return '\n'.join([
+        "# Generado por metrics_cache.py --userparams",
+        "# Un único item maestro con todos los valores de la caché de la API en JSON; el resto",
+        "# de items son dependientes de network.metrics (ver metrics_cache.py --items)",
+        "",
+        f'UserParameter={MASTER_KEY},curl -sf -m 3 "{api_url}/api/zabbix"',
+    ]) + '\n'
+
+def items():
+    """Items dependientes de network.metrics: una línea 'clave<TAB>JSONPath' por item"""
+    lines = [f"{key}\t{jsonpath(key)}" for key in item_keys()]
+    lines.append(f"{DISCOVERY_KEY}\t{jsonpath(DISCOVERY_KEY)}\t(regla de descubrimiento dependiente)")
+    return '\n'.join(lines) + '\n'
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_metrics_cache():
+    """Obtener la caché de métricas compartida del proceso"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MetricsCache()
+        return _cache
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Caché de métricas de red para Zabbix")
+    parser.add_argument("--userparams", action="store_true", help="Generar la configuración del agente de Zabbix (item maestro)")
+    parser.add_argument("--items", action="store_true", help="Listar los items dependientes (clave y JSONPath)")
+    parser.add_argument("--api-url", default=API_URL, help=f"URL de la API (por defecto {API_URL})")
+    parser.add_argument("--devices", action="store_true", help="Listar las claves de dispositivo (nombre en minúsculas)")
+    args = parser.parse_args()
+
+    if args.userparams:
+        sys.stdout.write(userparams(args.api_url))
+    elif args.items:
+        sys.stdout.write(items())
+    elif args.devices:
+        print('\n'.join(name.lower() for name, _ in get_inventory().devices()))
+    else:
+        parser.print_help()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
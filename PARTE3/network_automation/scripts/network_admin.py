@@ -8,17 +8,21 @@ Este script proporciona funciones para administrar dispositivos de red:
 - Escaneo de interfaces
 - Diagnóstico de conectividad
 - Gestión básica de configuraciones
+- Snapshots de varios comandos en una sola sesión
 """
 
 import os
 import sys
-import yaml
 import logging
 import argparse
 import datetime
-import netmiko
-import re
-from concurrent.futures import ThreadPoolExecutor
+from fleet import get_executor, DEFAULT_WORKERS, DeviceUnreachable
+from session_pool import get_pool
+from inventory import get_inventory
+import reachability
+import device_ops
+from device_ops import SNAPSHOT_COMMANDS, MATRIX_PING_REPEAT, MATRIX_PING_TIMEOUT, check_ip
+import zabbix_sender
 
 # Configuración de logging
 logging.basicConfig(
@@ -38,113 +42,143 @@ BACKUP_DIR = os.path.join(BASE_DIR, 'backups')
 DEVICES_FILE = os.path.join(CONFIG_DIR, 'devices.yaml')
 
 def load_devices():
-    """Cargar configuración de dispositivos desde YAML"""
+    """Cargar configuración de dispositivos desde el inventario en caché"""
     try:
-        with open(DEVICES_FILE, 'r') as f:
-            return yaml.safe_load(f)
+        return get_inventory().data
     except Exception as e:
         logger.error(f"Error cargando configuración: {e}")
         return None
 
-def connect_to_device(device_info):
-    """Establecer conexión SSH a un dispositivo"""
+def run_plan(device_name, device_info, plan):
+    """Ejecutar un plan de device_ops en una sesión del pool"""
+    with get_pool().session(device_name, device_info) as conn:
+        return device_ops.run_plan(plan, conn)
+
+def backup_device_config(device_name, device_info):
+    """Realiza backup de la configuración de un dispositivo"""
     try:
-        device_params = {
-            'device_type': device_info['type'],
-            'host': device_info['ip'],
-            'username': device_info['username'],
-            'password': device_info['password'],
-            'timeout': 10,
-            'session_log': None
-        }
-        
-        logger.info(f"Conectando a {device_info['ip']}...")
-        
-        # Intentar conexión con parámetros específicos para Cisco legacy
-        connection = netmiko.ConnectHandler(**device_params)
-        logger.info(f"Conexión exitosa a {device_info['ip']}")
-        return connection
+        # Reutilizar sesión del pool (ya en modo privilegiado y sin paginación)
+        logger.info(f"Conectando a {device_name} ({device_info['ip']})...")
+        return run_plan(device_name, device_info, device_ops.backup_device_config(device_name))
     except Exception as e:
-        logger.error(f"Error conectando a {device_info['ip']}: {e}")
+        logger.error(f"Error realizando backup de {device_name}: {e}")
         return None
 
-def backup_device_config(device_name, device_info):
-    """Realiza backup de la configuración de un dispositivo"""
+def incremental_backup_device(device_name, device_info):
+    """
+    Backup incremental: solo descarga la configuración si cambió.
+
+    Devuelve {"skipped": bool, "backup_file": ruta o None}
+    (ver device_ops.incremental_backup_device).
+    """
     try:
-        from netmiko import ConnectHandler
-        import datetime
-        import os
-        
-        # Directorio para backups
-        backup_dir = "/root/network_automation/backups"
-        os.makedirs(backup_dir, exist_ok=True)
-        
-        # Crear nombre de archivo con timestamp
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_file = os.path.join(backup_dir, f"{device_name}_{timestamp}.txt")
-        
-        # Información de conexión
-        device = {
-            'device_type': device_info['type'],
-            'ip': device_info['ip'],
-            'username': device_info['username'],
-            'password': device_info['password'],
-            'secret': device_info.get('secret', device_info['password']),  # Usar password como secret si no está especificado
-        }
-        
-        # Conectar al dispositivo
-        print(f"Conectando a {device_name} ({device_info['ip']})...")
-        with ConnectHandler(**device) as conn:
-            # Entrar en modo privilegiado
-            conn.enable()
-            
-            # Obtener configuración running (cambiar el comando según sea necesario)
-            # Usamos terminal length 0 para que no pagine el output
-            conn.send_command('terminal length 0')
-            output = conn.send_command('show running-config')
-            
-            # Guardar la salida en un archivo
-            with open(backup_file, 'w') as f:
-                f.write(output)
-            
-            print(f"Backup de {device_name} guardado en {backup_file}")
-            
-            return backup_file
+        return run_plan(device_name, device_info, device_ops.incremental_backup_device(device_name))
     except Exception as e:
-        print(f"Error realizando backup de {device_name}: {e}")
+        logger.error(f"Error realizando backup incremental de {device_name}: {e}")
         return None
 
-def backup_all_devices():
-    """Realizar backup de todos los dispositivos configurados"""
+def iter_devices(data=None):
+    """Recorrer routers y switches como tuplas (name, info)"""
+    if data is None:
+        return iter(get_inventory().devices())
+    return ((name, info) for device_type in ['routers', 'switches']
+            for name, info in data['devices'][device_type].items())
+
+def preflight_settings():
+    """(enabled, timeout) del pre-flight TCP/22 según la sección preflight de devices.yaml"""
+    settings = (load_devices() or {}).get('preflight') or {}
+    enabled = settings.get('enabled', True)
+    return enabled, float(settings.get('timeout', reachability.PROBE_TIMEOUT))
+
+def run_on_devices(func, devices, *args, workers=None, use_async=False, on_result=None, cancel=None,
+                   preflight=None):
+    """
+    Ejecutar una operación por dispositivo en paralelo.
+
+    Por defecto usa el pool de hilos compartido; con use_async=True usa el
+    backend asyncio, donde workers limita las sesiones simultáneas.
+    Devuelve tuplas (name, result, error) en el orden de entrada; on_result
+    y cancel permiten seguir el progreso y cancelar (ver FleetExecutor).
+
+    Antes se prueba el puerto SSH de todos los dispositivos a la vez; los
+    inalcanzables se devuelven con DeviceUnreachable sin intentar la sesión.
+    preflight=True/False fuerza o desactiva esa prueba (--no-preflight);
+    con None se usa preflight.enabled de devices.yaml.
+    Al terminar, los resultados se envían al trapper de Zabbix.
+    """
+    devices = list(devices)
+    enabled, timeout = preflight_settings()
+    down = {}
+    if (enabled if preflight is None else preflight) and devices:
+        down = reachability.unreachable(devices, timeout=timeout)
+    skipped = {}
+    for name, info in devices:
+        if name in down:
+            skipped[name] = (name, None, DeviceUnreachable(f"{info['ip']}: {down[name]}"))
+            if on_result:
+                on_result(*skipped[name])
+    reachable = [(name, info) for name, info in devices if name not in down]
+
+    if not reachable:
+        results = []
+    elif use_async:
+        import async_backend
+        results = async_backend.run(func.__name__, reachable, *args, concurrency=workers,
+                                    on_result=on_result, cancel=cancel)
+    else:
+        results = get_executor(workers).map_devices(func, reachable, *args, on_result=on_result, cancel=cancel)
+
+    # Recomponer el orden de entrada con los dispositivos omitidos
+    by_name = {item[0]: item for item in results}
+    by_name.update(skipped)
+    results = [by_name[name] for name, info in devices]
+    
+    # Un único envío por lotes a Zabbix con lo obtenido (si está habilitado)
+    zabbix_sender.report(func.__name__, results, args)
+    return results
+
+def backup_all_devices(workers=None, use_async=False, verbose=True, on_result=None, cancel=None,
+                       incremental=False, preflight=None):
+    """
+    Realizar backup de todos los dispositivos configurados.
+
+    Con incremental=True solo se descarga la configuración de los equipos
+    cuyo marcador de cambios varió; el resto se lista en "skipped".
+    """
     data = load_devices()
     if not data:
         logger.error("No se pudo cargar configuración de dispositivos")
         return
     
     results = {"success": [], "failed": []}
+    if incremental:
+        results["skipped"] = []
     
-    # Backup de routers
-    logger.info("Realizando backup de routers...")
-    for name, info in data['devices']['routers'].items():
-        result = backup_device_config(name, info)
-        if result:
-            results["success"].append(name)
-        else:
+    # Backup en paralelo de routers y switches
+    logger.info("Realizando backup de routers y switches...")
+    operation = incremental_backup_device if incremental else backup_device_config
+    fleet_results = run_on_devices(operation, iter_devices(data), workers=workers,
+                                   use_async=use_async, on_result=on_result, cancel=cancel, preflight=preflight)
+    for name, result, error in fleet_results:
+        if not result:
             results["failed"].append(name)
-    
-    # Backup de switches
-    logger.info("Realizando backup de switches...")
-    for name, info in data['devices']['switches'].items():
-        result = backup_device_config(name, info)
-        if result:
-            results["success"].append(name)
+        elif incremental and result["skipped"]:
+            results["skipped"].append(name)
         else:
-            results["failed"].append(name)
+            results["success"].append(name)
     
-    # Mostrar resultados
+    if verbose:
+        print_backup_summary(results)
+    
+    return results
+
+def print_backup_summary(results):
+    """Mostrar resumen de backup"""
     print("\nResumen de backup:")
     print(f"Exitosos: {len(results['success'])}")
     print(f"Fallidos: {len(results['failed'])}")
+    if "skipped" in results:
+        print(f"Sin cambios (omitidos): {len(results['skipped'])}")
     
     if results["success"]:
         print("\nDispositivos con backup exitoso:")
@@ -156,49 +190,90 @@ def backup_all_devices():
         for device in results["failed"]:
             print(f"  ✗ {device}")
     
+    if results.get("skipped"):
+        print("\nDispositivos sin cambios (omitidos):")
+        for device in results["skipped"]:
+            print(f"  - {device}")
+
+def snapshot_commands(data=None):
+    """Lista de comandos del snapshot (devices.yaml snapshot.commands o SNAPSHOT_COMMANDS)"""
+    if data is None:
+        data = load_devices() or {}
+    return list((data.get('snapshot') or {}).get('commands') or SNAPSHOT_COMMANDS)
+
+def snapshot_device(device_name, device_info, commands=None):
+    """Ejecutar todos los comandos del snapshot en una sola sesión con el dispositivo"""
+    try:
+        return run_plan(device_name, device_info, device_ops.snapshot_device(device_name, commands))
+    except Exception as e:
+        logger.error(f"Error obteniendo snapshot de {device_name}: {e}")
+        return None
+
+def snapshot_all_devices(commands=None, workers=None, use_async=False, verbose=True, on_result=None, cancel=None,
+                         preflight=None):
+    """
+    Snapshot de todos los dispositivos: un login por equipo para todos los comandos.
+
+    Sin commands se usa snapshot_commands() (configurable en devices.yaml).
+    Lanza ValueError si algún comando no es un 'show ...'.
+    """
+    data = load_devices()
+    if not data:
+        logger.error("No se pudo cargar configuración de dispositivos")
+        return
+    
+    commands = commands or snapshot_commands(data)
+    # Rechazar comandos que no sean show antes de abrir ninguna sesión
+    device_ops.check_show_commands(commands)
+    results = {"commands": commands, "success": [], "failed": []}
+    
+    # Snapshot en paralelo de routers y switches
+    logger.info(f"Obteniendo snapshot ({len(commands)} comandos) de routers y switches...")
+    fleet_results = run_on_devices(snapshot_device, iter_devices(data), commands, workers=workers,
+                                   use_async=use_async, on_result=on_result, cancel=cancel, preflight=preflight)
+    for name, result, error in fleet_results:
+        if result:
+            results["success"].append({"device": name, "snapshot_file": result["snapshot_file"]})
+        else:
+            results["failed"].append(name)
+    
+    if verbose:
+        print_snapshot_summary(results)
+    
     return results
 
+def print_snapshot_summary(results):
+    """Mostrar resumen de snapshots"""
+    print("\nResumen de snapshot:")
+    print(f"Comandos por dispositivo: {len(results['commands'])}")
+    print(f"Exitosos: {len(results['success'])}")
+    print(f"Fallidos: {len(results['failed'])}")
+    
+    if results["success"]:
+        print("\nSnapshots guardados:")
+        for item in results["success"]:
+            print(f"  ✓ {item['device']}: {item['snapshot_file']}")
+    
+    if results["failed"]:
+        print("\nDispositivos con errores:")
+        for device in results["failed"]:
+            print(f"  ✗ {device}")
+
 def get_interfaces(device_name, device_info):
     """Obtener información de interfaces de un dispositivo"""
-    connection = connect_to_device(device_info)
-    if not connection:
-        return None
-    
     try:
-        # Obtener interfaces
-        interfaces = connection.send_command("show ip interface brief")
-        connection.disconnect()
-        
-        # Analizar la información
-        interfaces_info = []
-        for line in interfaces.split("\n"):
-            if "unassigned" in line or "not set" in line:
-                continue
-            
-            # Extraer información relevante para interfaces con IP
-            match = re.search(r"(\S+)\s+(\d+\.\d+\.\d+\.\d+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)", line)
-            if match:
-                interface_name = match.group(1)
-                ip_address = match.group(2)
-                status = match.group(5)
-                protocol = match.group(6)
-                
-                interfaces_info.append({
-                    "name": interface_name,
-                    "ip": ip_address,
-                    "status": status,
-                    "protocol": protocol
-                })
-        
-        return interfaces_info
+        return run_plan(device_name, device_info, device_ops.get_interfaces(device_name))
     except Exception as e:
         logger.error(f"Error obteniendo interfaces de {device_name}: {e}")
-        if connection:
-            connection.disconnect()
         return None
 
-def scan_all_interfaces():
-    """Escanear interfaces de todos los dispositivos"""
+def scan_all_interfaces(workers=None, use_async=False, verbose=True, on_result=None, cancel=None,
+                        preflight=None):
+    """
+    Escanear interfaces de todos los dispositivos.
+
+    Devuelve {device: [InterfaceRecord]} con los dispositivos que respondieron.
+    """
     data = load_devices()
     if not data:
         logger.error("No se pudo cargar configuración de dispositivos")
@@ -206,23 +281,22 @@ def scan_all_interfaces():
     
     results = {}
     
-    # Escanear interfaces de routers
-    logger.info("Escaneando interfaces de routers...")
-    for name, info in data['devices']['routers'].items():
-        interfaces = get_interfaces(name, info)
+    # Escanear interfaces de routers y switches en paralelo
+    logger.info("Escaneando interfaces de routers y switches...")
+    fleet_results = run_on_devices(get_interfaces, iter_devices(data), workers=workers,
+                                   use_async=use_async, on_result=on_result, cancel=cancel, preflight=preflight)
+    for name, interfaces, error in fleet_results:
         if interfaces:
             results[name] = interfaces
             logger.info(f"Escaneadas {len(interfaces)} interfaces de {name}")
     
-    # Escanear interfaces de switches con IP
-    logger.info("Escaneando interfaces de switches...")
-    for name, info in data['devices']['switches'].items():
-        interfaces = get_interfaces(name, info)
-        if interfaces:
-            results[name] = interfaces
-            logger.info(f"Escaneadas {len(interfaces)} interfaces de {name}")
+    if verbose:
+        print_interfaces_summary(results)
     
-    # Mostrar resultados
+    return results
+
+def print_interfaces_summary(results):
+    """Mostrar resumen de interfaces"""
     print("\nResumen de interfaces:")
     total_interfaces = sum(len(interfaces) for interfaces in results.values())
     print(f"Total dispositivos escaneados: {len(results)}")
@@ -232,147 +306,187 @@ def scan_all_interfaces():
     for device, interfaces in results.items():
         print(f"\n{device}:")
         for interface in interfaces:
-            status_color = "✓" if interface["status"] == "up" else "✗"
-            print(f"  {status_color} {interface['name']} - {interface['ip']} ({interface['status']}/{interface['protocol']})")
-    
-    return results
+            status_color = "✓" if interface.status == "up" else "✗"
+            ip_address = interface.ip or "unassigned"
+            print(f"  {status_color} {interface.name} - {ip_address} ({interface.status}/{interface.protocol})")
 
 def test_connectivity(device_name, device_info, target_ip):
     """Probar conectividad desde un dispositivo a una IP destino"""
-    connection = connect_to_device(device_info)
-    if not connection:
-        return None
-    
     try:
-        # Ejecutar ping desde el dispositivo
-        output = connection.send_command(f"ping {target_ip}")
-        connection.disconnect()
-        
-        # Analizar resultado
-        if "Success rate is 0 percent" in output:
-            return {"success": False, "output": output}
-        elif "Success rate is" in output:
-            # Extraer tasa de éxito
-            match = re.search(r"Success rate is (\d+) percent", output)
-            success_rate = int(match.group(1)) if match else 0
-            return {"success": success_rate > 0, "success_rate": success_rate, "output": output}
-        else:
-            return {"success": False, "output": output}
+        return run_plan(device_name, device_info, device_ops.test_connectivity(device_name, target_ip))
     except Exception as e:
         logger.error(f"Error probando conectividad desde {device_name} a {target_ip}: {e}")
-        if connection:
-            connection.disconnect()
         return None
 
-def test_all_connectivity(target_ip):
+def test_all_connectivity(target_ip, workers=None, use_async=False, verbose=True, on_result=None, cancel=None,
+                          preflight=None):
     """Probar conectividad desde todos los dispositivos a una IP destino"""
     data = load_devices()
     if not data:
         logger.error("No se pudo cargar configuración de dispositivos")
         return
     
-    print(f"\nProbando conectividad a {target_ip} desde todos los dispositivos...")
+    if verbose:
+        print(f"\nProbando conectividad a {target_ip} desde todos los dispositivos...")
     results = {"success": [], "failed": []}
     
-    # Probar desde routers
-    for name, info in data['devices']['routers'].items():
-        logger.info(f"Probando desde {name} a {target_ip}...")
-        result = test_connectivity(name, info, target_ip)
-        
+    # Probar desde routers y switches en paralelo
+    logger.info(f"Probando desde todos los dispositivos a {target_ip}...")
+    fleet_results = run_on_devices(test_connectivity, iter_devices(data), target_ip, workers=workers,
+                                   use_async=use_async, on_result=on_result, cancel=cancel, preflight=preflight)
+    for name, result, error in fleet_results:
         if result and result["success"]:
             success_rate = result.get("success_rate", 100)
             results["success"].append({"device": name, "success_rate": success_rate})
-            print(f"  ✓ {name}: Exitoso ({success_rate}% de éxito)")
         else:
             results["failed"].append({"device": name})
-            print(f"  ✗ {name}: Fallido")
     
-    # Probar desde switches (solo los que tengan IP)
-    for name, info in data['devices']['switches'].items():
-        logger.info(f"Probando desde {name} a {target_ip}...")
-        result = test_connectivity(name, info, target_ip)
-        
-        if result and result["success"]:
-            success_rate = result.get("success_rate", 100)
-            results["success"].append({"device": name, "success_rate": success_rate})
-            print(f"  ✓ {name}: Exitoso ({success_rate}% de éxito)")
-        else:
-            results["failed"].append({"device": name})
-            print(f"  ✗ {name}: Fallido")
+    if verbose:
+        print_connectivity_summary(results)
+    
+    return results
+
+def print_connectivity_summary(results):
+    """Mostrar resumen de prueba de conectividad"""
+    for item in results["success"]:
+        print(f"  ✓ {item['device']}: Exitoso ({item['success_rate']}% de éxito)")
+    for item in results["failed"]:
+        print(f"  ✗ {item['device']}: Fallido")
     
-    # Mostrar resumen
     print("\nResumen de prueba de conectividad:")
     print(f"Exitosos: {len(results['success'])}")
     print(f"Fallidos: {len(results['failed'])}")
+
+def matrix_targets(targets=None):
+    """
+    Destinos de la matriz como lista de {"name", "ip"}.
+
+    Sin targets (o con "all") se usan los loopbacks de todos los dispositivos
+    (clave loopback de devices.yaml, o su IP de gestión si no la tiene).
+    Lanza ValueError si algún destino no es una IP.
+    """
+    inventory = get_inventory()
+    if not targets or targets == 'all':
+        return [{"name": name, "ip": check_ip(info.get('loopback', info['ip']))} for name, info in inventory.devices()]
+    ips = [check_ip(ip) for ip in targets]
+    return [{"name": inventory.name_for_ip(ip) or ip, "ip": ip} for ip in ips]
+
+def ping_targets(device_name, device_info, targets, repeat=MATRIX_PING_REPEAT, timeout=MATRIX_PING_TIMEOUT):
+    """
+    Hacer ping a varios destinos desde un dispositivo en una sola sesión.
+
+    Devuelve {destino: {success, success_rate, rtt_min, rtt_avg, rtt_max}};
+    el propio dispositivo no se prueba.
+    """
+    try:
+        return run_plan(device_name, device_info, device_ops.ping_targets(device_name, targets, repeat, timeout))
+    except Exception as e:
+        logger.error(f"Error probando la matriz de conectividad desde {device_name}: {e}")
+        return None
+
+def connectivity_matrix(targets=None, repeat=MATRIX_PING_REPEAT, timeout=MATRIX_PING_TIMEOUT,
+                        workers=None, use_async=False, verbose=True, on_result=None, cancel=None,
+                        preflight=None):
+    """
+    Matriz de conectividad N×M: todos los dispositivos contra todos los destinos.
+
+    Los dispositivos se prueban en paralelo y cada uno recorre sus destinos en
+    una sola sesión. Devuelve {"targets", "matrix": {device: fila o None},
+    "summary": {"ok", "failed", "unreachable_devices"}}.
+    """
+    data = load_devices()
+    if not data:
+        logger.error("No se pudo cargar configuración de dispositivos")
+        return
+    
+    targets = matrix_targets(targets)
+    results = {"targets": targets, "matrix": {},
+               "summary": {"ok": 0, "failed": 0, "unreachable_devices": []}}
+    
+    logger.info(f"Probando matriz de conectividad ({len(targets)} destinos)...")
+    fleet_results = run_on_devices(ping_targets, iter_devices(data), targets, repeat, timeout, workers=workers,
+                                   use_async=use_async, on_result=on_result, cancel=cancel, preflight=preflight)
+    for name, row, error in fleet_results:
+        results["matrix"][name] = row
+        if row is None:
+            results["summary"]["unreachable_devices"].append(name)
+            continue
+        for cell in row.values():
+            results["summary"]["ok" if cell["success"] else "failed"] += 1
+    
+    if verbose:
+        print_matrix_summary(results)
     
     return results
 
-def configure_ntp(device_name, device_info, ntp_server):
-    """Configurar servidor NTP en un dispositivo"""
-    connection = connect_to_device(device_info)
-    if not connection:
-        return False
+def print_matrix_summary(results):
+    """Mostrar la matriz de conectividad (RTT medio en ms, o ✗)"""
+    names = [target["name"] for target in results["targets"]]
+    width = max([len(name) for name in names + list(results["matrix"])] + [6]) + 2
+    print("\nMatriz de conectividad (RTT medio en ms):")
+    print(" " * width + "".join(name.rjust(width) for name in names))
+    for device, row in results["matrix"].items():
+        cells = []
+        for name in names:
+            if row is None:
+                cell = "?"
+            elif name not in row:
+                cell = "-"
+            elif row[name]["success"]:
+                cell = str(row[name].get("rtt_avg"))
+            else:
+                cell = "✗"
+            cells.append(cell.rjust(width))
+        print(device.ljust(width) + "".join(cells))
     
-    try:
-        # Configurar NTP
-        commands = [
-            "configure terminal",
-            f"ntp server {ntp_server}",
-            "exit"
-        ]
-        
-        output = connection.send_config_set(commands)
-        connection.save_config()
-        connection.disconnect()
-        
-        logger.info(f"NTP configurado en {device_name}: {ntp_server}")
-        return True
-    except Exception as e:
-        logger.error(f"Error configurando NTP en {device_name}: {e}")
-        if connection:
-            connection.disconnect()
-        return False
+    summary = results["summary"]
+    print("\nResumen de matriz de conectividad:")
+    print(f"Pares con conectividad: {summary['ok']}")
+    print(f"Pares sin conectividad: {summary['failed']}")
+    if summary["unreachable_devices"]:
+        print(f"Dispositivos sin sesión: {', '.join(summary['unreachable_devices'])}")
 
-def configure_all_ntp(ntp_server):
-    """Configurar NTP en todos los dispositivos"""
+def configure_all_ntp(ntp_server, workers=None, verbose=True, on_result=None, cancel=None, preflight=None):
+    """
+    Configurar NTP en todos los dispositivos.
+
+    Usa el motor transaccional de config_push (canario, verificación,
+    rollback y write memory al final).
+    Lanza ValueError si ntp_server no es una IP o un nombre de host.
+    """
     data = load_devices()
     if not data:
         logger.error("No se pudo cargar configuración de dispositivos")
         return
     
-    print(f"\nConfigurando NTP ({ntp_server}) en todos los dispositivos...")
+    commands = device_ops.ntp_commands(ntp_server)
+    
+    if verbose:
+        print(f"\nConfigurando NTP ({ntp_server}) en todos los dispositivos...")
     results = {"success": [], "failed": []}
     
-    # Configurar en routers
-    for name, info in data['devices']['routers'].items():
-        logger.info(f"Configurando NTP en {name}...")
-        result = configure_ntp(name, info, ntp_server)
-        
-        if result:
-            results["success"].append(name)
-            print(f"  ✓ {name}: Configurado")
-        else:
-            results["failed"].append(name)
-            print(f"  ✗ {name}: Fallido")
+    logger.info("Configurando NTP en todos los dispositivos...")
+    from config_push import push_config, APPLIED
+    report = push_config(commands, workers=workers, verbose=False,
+                         on_result=on_result, cancel=cancel, preflight=preflight)
+    for name, result in report["devices"].items():
+        results["success" if result["status"] == APPLIED else "failed"].append(name)
     
-    # Configurar en switches
-    for name, info in data['devices']['switches'].items():
-        logger.info(f"Configurando NTP en {name}...")
-        result = configure_ntp(name, info, ntp_server)
-        
-        if result:
-            results["success"].append(name)
-            print(f"  ✓ {name}: Configurado")
-        else:
-            results["failed"].append(name)
-            print(f"  ✗ {name}: Fallido")
+    if verbose:
+        print_ntp_summary(results)
+    
+    return results
+
+def print_ntp_summary(results):
+    """Mostrar resumen de configuración NTP"""
+    for name in results["success"]:
+        print(f"  ✓ {name}: Configurado")
+    for name in results["failed"]:
+        print(f"  ✗ {name}: Fallido")
     
-    # Mostrar resumen
     print("\nResumen de configuración NTP:")
     print(f"Exitosos: {len(results['success'])}")
     print(f"Fallidos: {len(results['failed'])}")
-    
-    return results
 
 def main():
     """Función principal"""
@@ -380,18 +494,42 @@ def main():
     parser.add_argument("--backup", action="store_true", help="Realizar backup de configuraciones")
     parser.add_argument("--interfaces", action="store_true", help="Escanear interfaces de dispositivos")
     parser.add_argument("--ping", type=str, help="Probar conectividad desde todos los dispositivos a una IP")
+    parser.add_argument("--matrix", nargs="*", metavar="IP", help="Matriz de conectividad desde todos los dispositivos a las IPs indicadas (sin IPs: loopbacks de todos los dispositivos)")
     parser.add_argument("--ntp", type=str, help="Configurar NTP en todos los dispositivos")
+    parser.add_argument("--snapshot", action="store_true", help="Ejecutar los comandos del snapshot en una sola sesión por dispositivo")
+    parser.add_argument("--push", type=str, metavar="ARCHIVO", help="Aplicar los comandos de configuración de ARCHIVO (uno por línea) como cambio transaccional")
+    parser.add_argument("--targets", nargs="+", metavar="DISPOSITIVO", help="Con --push, dispositivos destino (por defecto todos)")
+    parser.add_argument("--canary", type=int, help="Con --push, dispositivos que se cambian primero y solos (por defecto 1; 0 para ninguno)")
+    parser.add_argument("--wave-size", type=int, help="Con --push, dispositivos por oleada tras el canario (por defecto todos)")
+    parser.add_argument("--workers", type=int, help=f"Número máximo de dispositivos en paralelo (por defecto {DEFAULT_WORKERS}, o 500 sesiones con --async)")
+    parser.add_argument("--incremental", action="store_true", help="Con --backup, omitir los dispositivos cuya configuración no cambió")
+    parser.add_argument("--no-preflight", dest="preflight", action="store_false", help="No comprobar el puerto SSH de los dispositivos antes de conectar")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Usar el backend asyncio (miles de sesiones sin un hilo por dispositivo)")
     
     args = parser.parse_args()
     
+    # Con --no-preflight se desactiva; si no, decide devices.yaml
+    preflight = None if args.preflight else False
+    
     if args.backup:
-        backup_all_devices()
+        backup_all_devices(workers=args.workers, use_async=args.use_async, incremental=args.incremental,
+                           preflight=preflight)
     elif args.interfaces:
-        scan_all_interfaces()
+        scan_all_interfaces(workers=args.workers, use_async=args.use_async, preflight=preflight)
     elif args.ping:
-        test_all_connectivity(args.ping)
+        test_all_connectivity(args.ping, workers=args.workers, use_async=args.use_async, preflight=preflight)
+    elif args.matrix is not None:
+        connectivity_matrix(args.matrix, workers=args.workers, use_async=args.use_async, preflight=preflight)
     elif args.ntp:
-        configure_all_ntp(args.ntp)
+        configure_all_ntp(args.ntp, workers=args.workers, preflight=preflight)
+    elif args.push:
+        from config_push import push_config
+        with open(args.push) as f:
+            commands = [line.rstrip() for line in f if line.strip() and not line.startswith('!')]
+        push_config(commands, devices=args.targets, canary=args.canary, wave_size=args.wave_size,
+                    workers=args.workers, preflight=preflight)
+    elif args.snapshot:
+        snapshot_all_devices(workers=args.workers, use_async=args.use_async, preflight=preflight)
     else:
         parser.print_help()
 
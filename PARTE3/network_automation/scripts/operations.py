@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Servicio de ejecución de operaciones en proceso
+Parte III - Administración de Redes
+
+Expone las operaciones de network_admin como llamadas Python que devuelven
+resultados estructurados, para que la API no tenga que lanzar un nuevo
+intérprete de network_admin.py (y reimportar netmiko/paramiko) por cada
+petición.
+"""
+
+import time
+import logging
+import threading
+
+import network_admin
+import config_push
+from inventory import get_inventory
+from device_ops import check_ip
+
+logger = logging.getLogger('network_admin.operations')
+
+class OperationService:
+    """Fachada en proceso sobre las operaciones de flota de network_admin"""
+
+    def __init__(self, workers=None):
+        self.workers = workers
+
+    def _run(self, name, func, *args, on_result=None, cancel=None, **options):
+        start = time.monotonic()
+        results = func(*args, workers=self.workers, verbose=False, on_result=on_result, cancel=cancel, **options)
+        elapsed = round(time.monotonic() - start, 3)
+        if results is None:
+            raise RuntimeError("No se pudo cargar configuración de dispositivos")
+        logger.info(f"Operación {name} completada en {elapsed}s")
+        return {"operation": name, "elapsed": elapsed, "results": results}
+
+    def device_count(self):
+        """Número de dispositivos del inventario"""
+        try:
+            return len(get_inventory())
+        except Exception:
+            return 0
+
+    def interfaces(self, **kwargs):
+        """Escanear interfaces de todos los dispositivos"""
+        return self._run("interfaces", network_admin.scan_all_interfaces, **kwargs)
+
+    def backup(self, **kwargs):
+        """Backup de todos los dispositivos (incremental=True omite los que no cambiaron)"""
+        return self._run("backup", network_admin.backup_all_devices, **kwargs)
+
+    def backup_device(self, device_name, device_info, on_result=None, cancel=None):
+        """Backup de un solo dispositivo (reutiliza la sesión SSH del pool si está abierta)"""
+        start = time.monotonic()
+        results = network_admin.run_on_devices(network_admin.backup_device_config, [(device_name, device_info)],
+                                               workers=self.workers, on_result=on_result, cancel=cancel)
+        name, backup_file, error = results[0]
+        if not backup_file:
+            raise RuntimeError(f"Error realizando backup de {device_name}" + (f": {error}" if error else ""))
+        elapsed = round(time.monotonic() - start, 3)
+        logger.info(f"Operación backup de {device_name} completada en {elapsed}s")
+        return {"operation": "backup", "elapsed": elapsed, "device": device_name, "backup_file": backup_file}
+
+    def ping(self, target_ip, **kwargs):
+        """Ping desde todos los dispositivos a target_ip"""
+        return self._run("ping", network_admin.test_all_connectivity, target_ip, **kwargs)
+
+    def ping_matrix(self, targets=None, **kwargs):
+        """Matriz de conectividad desde todos los dispositivos a targets (None: todos los loopbacks)"""
+        if targets and targets != 'all':
+            targets = [check_ip(ip) for ip in targets]
+        return self._run("ping_matrix", network_admin.connectivity_matrix, targets, **kwargs)
+
+    def ntp(self, ntp_server, **kwargs):
+        """Configurar ntp_server en todos los dispositivos"""
+        return self._run("ntp", network_admin.configure_all_ntp, ntp_server, **kwargs)
+
+    def push(self, commands, **kwargs):
+        """Cambio de configuración transaccional (ver config_push.push_config)"""
+        return self._run("push", config_push.push_config, commands, **kwargs)
+
+    def snapshot(self, commands=None, **kwargs):
+        """Snapshot de todos los dispositivos (una sesión por equipo para todos los comandos)"""
+        return self._run("snapshot", network_admin.snapshot_all_devices, commands, **kwargs)
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_service():
+    """Obtener el servicio de operaciones compartido del proceso"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = OperationService()
+        return _service
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Parsers de comandos show de Cisco IOS
+Parte III - Administración de Redes
+
+Plantillas precompiladas por comando que convierten la salida de texto en
+registros tipados compactos (NamedTuple). Las expresiones se compilan una
+vez al importar el módulo y cada salida se recorre en una sola pasada, de
+modo que el coste de parsear una flota grande es despreciable frente al de
+recoger los datos. Ver bench_parsers.py para medirlo.
+"""
+
+import re
+from typing import NamedTuple, Optional
+
+# ---------------------------------------------------------------------------
+# Registros
+# ---------------------------------------------------------------------------
+
+class IpInterfaceBrief(NamedTuple):
+    name: str
+    ip: Optional[str]
+    ok: str
+    method: str
+    status: str
+    protocol: str
+
+class InterfaceDetail(NamedTuple):
+    name: str
+    status: str
+    protocol: str
+    hardware: Optional[str]
+    mac: Optional[str]
+    description: Optional[str]
+    ip: Optional[str]
+    mtu: Optional[int]
+    bandwidth_kbit: Optional[int]
+    input_rate_bps: Optional[int]
+    output_rate_bps: Optional[int]
+    input_packets: Optional[int]
+    output_packets: Optional[int]
+    input_errors: Optional[int]
+    output_errors: Optional[int]
+
+class VersionInfo(NamedTuple):
+    version: Optional[str]
+    hostname: Optional[str]
+    uptime: Optional[str]
+    image: Optional[str]
+    model: Optional[str]
+    serial: Optional[str]
+    config_register: Optional[str]
+    restarted: Optional[str]
+
+class Route(NamedTuple):
+    code: str
+    prefix: str
+    distance: Optional[int]
+    metric: Optional[int]
+    next_hop: Optional[str]
+    interface: Optional[str]
+
+class CdpNeighbor(NamedTuple):
+    device_id: str
+    local_interface: str
+    holdtime: int
+    capability: str
+    platform: str
+    port_id: str
+
+class NtpAssociation(NamedTuple):
+    address: str
+    ref_clock: str
+    stratum: int
+    when: str
+    poll: int
+    reach: int
+    delay: float
+    offset: float
+    dispersion: float
+    selected: bool
+    configured: bool
+    status: str
+
+class PingResult(NamedTuple):
+    target: Optional[str]
+    success_rate: int
+    received: int
+    sent: int
+    rtt_min: Optional[int]
+    rtt_avg: Optional[int]
+    rtt_max: Optional[int]
+
+def to_dict(record):
+    """Convertir un registro en dict (para JSON)"""
+    return record._asdict()
+
+# ---------------------------------------------------------------------------
+# show ip interface brief
+# ---------------------------------------------------------------------------
+
+IP_BRIEF_RE = re.compile(
+    r"^(?P<name>\S+)\s+(?P<ip>\S+)\s+(?P<ok>YES|NO|\?)\s+(?P<method>\S+)\s+"
+    r"(?P<status>administratively down|up|down|deleted)\s+(?P<protocol>up|down)\s*$",
+    re.M
+)
+
+def parse_ip_interface_brief(output):
+    """Todas las interfaces, incluidas las "unassigned" (ip=None)"""
+    records = []
+    for m in IP_BRIEF_RE.finditer(output):
+        ip = m.group('ip')
+        records.append(IpInterfaceBrief(
+            m.group('name'),
+            None if ip == 'unassigned' else ip,
+            m.group('ok'),
+            m.group('method'),
+            m.group('status'),
+            m.group('protocol')
+        ))
+    return records
+
+# ---------------------------------------------------------------------------
+# show interfaces
+# ---------------------------------------------------------------------------
+
+INTF_HEADER_RE = re.compile(
+    r"^(?P<name>\S+) is (?P<status>administratively down|up|down|deleted),"
+    r" line protocol is (?P<protocol>up|down)", re.M
+)
+INTF_FIELDS = [
+    ('hardware', re.compile(r"Hardware is ([^,\n]+)"), str),
+    # Solo la dirección de la línea Hardware (no "Internet address is ...")
+    ('mac', re.compile(r"Hardware is [^,\n]+, address is ([0-9a-f]{4}\.[0-9a-f]{4}\.[0-9a-f]{4})"), str),
+    ('description', re.compile(r"Description: (.+)"), str),
+    ('ip', re.compile(r"Internet address is (\S+)"), str),
+    ('mtu', re.compile(r"MTU (\d+) bytes"), int),
+    ('bandwidth_kbit', re.compile(r"BW (\d+) Kbit"), int),
+    ('input_rate_bps', re.compile(r"input rate (\d+) bits/sec"), int),
+    ('output_rate_bps', re.compile(r"output rate (\d+) bits/sec"), int),
+    ('input_packets', re.compile(r"(\d+) packets input"), int),
+    ('output_packets', re.compile(r"(\d+) packets output"), int),
+    ('input_errors', re.compile(r"(\d+) input errors"), int),
+    ('output_errors', re.compile(r"(\d+) output errors"), int),
+]
+
+def parse_interfaces(output):
+    """Un registro por bloque de interfaz"""
+    headers = list(INTF_HEADER_RE.finditer(output))
+    records = []
+    for index, header in enumerate(headers):
+        end = headers[index + 1].start() if index + 1 < len(headers) else len(output)
+        block = output[header.end():end]
+        values = {}
+        for field, regex, cast in INTF_FIELDS:
+            m = regex.search(block)
+            values[field] = cast(m.group(1).strip()) if m else None
+        records.append(InterfaceDetail(
+            header.group('name'), header.group('status'), header.group('protocol'), **values
+        ))
+    return records
+
+# ---------------------------------------------------------------------------
+# show version
+# ---------------------------------------------------------------------------
+
+VERSION_FIELDS = [
+    ('version', re.compile(r"Cisco IOS.*?Version ([^,\s]+)")),
+    ('hostname', re.compile(r"^(\S+) uptime is", re.M)),
+    ('uptime', re.compile(r"uptime is (.+)")),
+    ('image', re.compile(r'System image file is "([^"]+)"')),
+    ('model', re.compile(r"^[Cc]isco (\S+) .*?(?:processor|bytes of memory)", re.M)),
+    ('serial', re.compile(r"(?:Processor board ID|System serial number\s*:)\s*(\S+)")),
+    ('config_register', re.compile(r"Configuration register is (\S+)")),
+    ('restarted', re.compile(r"System restarted at (.+)")),
+]
+
+def parse_version(output):
+    values = {}
+    for field, regex in VERSION_FIELDS:
+        m = regex.search(output)
+        values[field] = m.group(1).strip() if m else None
+    return VersionInfo(**values)
+
+# ---------------------------------------------------------------------------
+# show ip route
+# ---------------------------------------------------------------------------
+
+ROUTE_RE = re.compile(
+    r"^(?P<code>[A-Za-z][A-Za-z0-9* ]{0,8}?)\s+(?P<prefix>\d+\.\d+\.\d+\.\d+(?:/\d+)?)"
+    r"(?:\s+\[(?P<distance>\d+)/(?P<metric>\d+)\])?"
+    r"(?:\s+via (?P<via>\d+\.\d+\.\d+\.\d+))?"
+    r"(?P<connected> is directly connected)?"
+    r"(?:,\s*(?:\S+,\s*)?(?P<intf>[A-Za-z][\w/.:-]*))?\s*$"
+)
+ROUTE_ECMP_RE = re.compile(
+    r"^\s+\[(?P<distance>\d+)/(?P<metric>\d+)\] via (?P<via>\d+\.\d+\.\d+\.\d+)"
+    r"(?:,\s*(?:\S+,\s*)?(?P<intf>[A-Za-z][\w/.:-]*))?\s*$"
+)
+ROUTE_SKIP_RE = re.compile(r"is (?:variably )?subnetted|^Codes:|^Gateway of last resort|^\s+[a-zA-Z*]+ - ")
+
+def parse_ip_route(output):
+    """Una entrada por ruta (las rutas ECMP generan una entrada por next hop)"""
+    records = []
+    last = None
+    for line in output.splitlines():
+        if not line.strip() or ROUTE_SKIP_RE.search(line):
+            continue
+        m = ROUTE_RE.match(line)
+        if m:
+            distance = m.group('distance')
+            last = Route(
+                m.group('code').strip(),
+                m.group('prefix'),
+                int(distance) if distance else None,
+                int(m.group('metric')) if distance else None,
+                m.group('via'),
+                m.group('intf')
+            )
+            records.append(last)
+            continue
+        m = ROUTE_ECMP_RE.match(line)
+        if m and last is not None:
+            records.append(last._replace(
+                distance=int(m.group('distance')),
+                metric=int(m.group('metric')),
+                next_hop=m.group('via'),
+                interface=m.group('intf')
+            ))
+    return records
+
+# ---------------------------------------------------------------------------
+# show cdp neighbors
+# ---------------------------------------------------------------------------
+
+CDP_ROW_RE = re.compile(
+    r"^(?P<device>\S+)?\s+(?P<local>[A-Za-z]+ ?[\d/.:]+)\s+(?P<hold>\d+)\s+"
+    r"(?P<cap>(?:[RTBSHIrPDCMs] )*[RTBSHIrPDCMs]?)\s+(?P<platform>.+?)\s+"
+    r"(?P<port>[A-Za-z]+ ?[\d/.:]+)\s*$"
+)
+
+def parse_cdp_neighbors(output):
+    """Vecinos CDP; soporta Device ID largos que IOS parte en su propia línea"""
+    records = []
+    pending_device = None
+    in_table = False
+    for line in output.splitlines():
+        if line.startswith('Device ID'):
+            in_table = True
+            continue
+        if not in_table or not line.strip() or line.startswith('Total cdp entries'):
+            continue
+        m = CDP_ROW_RE.match(line)
+        if m:
+            device = m.group('device') or pending_device
+            pending_device = None
+            if device:
+                records.append(CdpNeighbor(
+                    device,
+                    m.group('local'),
+                    int(m.group('hold')),
+                    m.group('cap').strip(),
+                    m.group('platform').strip(),
+                    m.group('port')
+                ))
+        elif len(line.split()) == 1:
+            pending_device = line.strip()
+    return records
+
+# ---------------------------------------------------------------------------
+# show ntp associations
+# ---------------------------------------------------------------------------
+
+NTP_ROW_RE = re.compile(
+    r"^(?P<flag>[*#+\-x ]?)(?P<cfg>~?)(?P<address>\d+\.\d+\.\d+\.\d+)\s+(?P<ref>\S+)\s+"
+    r"(?P<st>\d+)\s+(?P<when>\S+)\s+(?P<poll>\d+)\s+(?P<reach>\d+)\s+"
+    r"(?P<delay>-?[\d.]+)\s+(?P<offset>-?[\d.]+)\s+(?P<disp>-?[\d.]+)",
+    re.M
+)
+NTP_FLAGS = {'*': 'sys.peer', '#': 'selected', '+': 'candidate', '-': 'outlyer', 'x': 'falseticker'}
+
+def parse_ntp_associations(output):
+    records = []
+    for m in NTP_ROW_RE.finditer(output):
+        flag = m.group('flag').strip()
+        records.append(NtpAssociation(
+            m.group('address'),
+            m.group('ref'),
+            int(m.group('st')),
+            m.group('when'),
+            int(m.group('poll')),
+            int(m.group('reach')),
+            float(m.group('delay')),
+            float(m.group('offset')),
+            float(m.group('disp')),
+            flag == '*',
+            m.group('cfg') == '~',
+            NTP_FLAGS.get(flag, 'unsynced')
+        ))
+    return records
+
+# ---------------------------------------------------------------------------
+# ping
+# ---------------------------------------------------------------------------
+
+PING_TARGET_RE = re.compile(r"Echos to (\S+?),")
+PING_RATE_RE = re.compile(
+    r"Success rate is (?P<rate>\d+) percent \((?P<recv>\d+)/(?P<sent>\d+)\)"
+    r"(?:, round-trip min/avg/max = (?P<min>\d+)/(?P<avg>\d+)/(?P<max>\d+) ms)?"
+)
+
+def parse_ping(output):
+    """Resultado de un ping de IOS, o None si la salida no incluye la tasa de éxito"""
+    m = PING_RATE_RE.search(output)
+    if not m:
+        return None
+    target = PING_TARGET_RE.search(output)
+    has_rtt = m.group('min') is not None
+    return PingResult(
+        target.group(1) if target else None,
+        int(m.group('rate')),
+        int(m.group('recv')),
+        int(m.group('sent')),
+        int(m.group('min')) if has_rtt else None,
+        int(m.group('avg')) if has_rtt else None,
+        int(m.group('max')) if has_rtt else None
+    )
+
+# ---------------------------------------------------------------------------
+# Tabla de plantillas
+# ---------------------------------------------------------------------------
+
+TEMPLATES = {
+    'show ip interface brief': parse_ip_interface_brief,
+    'show interfaces': parse_interfaces,
+    'show version': parse_version,
+    'show ip route': parse_ip_route,
+    'show cdp neighbors': parse_cdp_neighbors,
+    'show ntp associations': parse_ntp_associations,
+}
+
+def parse(command, output):
+    """
+    Parsear la salida de un comando con su plantilla.
+
+    Devuelve None si no hay plantilla para el comando.
+    """
+    parser = TEMPLATES.get(' '.join(command.split()))
+    return parser(output) if parser else None
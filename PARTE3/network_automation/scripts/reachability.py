@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Comprobación previa de alcanzabilidad (TCP/22)
+Parte III - Administración de Redes
+
+Antes de abrir sesiones netmiko se intenta una conexión TCP al puerto SSH
+de todos los dispositivos a la vez, con un plazo corto. Un equipo apagado
+se descarta en ~1 s en lugar de agotar el timeout de 10 s de la conexión
+SSH, y la misma prueba sirve al dashboard como estado barato de la flota.
+"""
+
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger('network_admin.reachability')
+
+# Valores por defecto
+SSH_PORT = 22
+PROBE_TIMEOUT = 1.5
+PROBE_CONCURRENCY = 1000
+
+async def probe(host, port=SSH_PORT, timeout=PROBE_TIMEOUT):
+    """
+    Intentar una conexión TCP a host:port.
+
+    Devuelve {"reachable", "latency_ms", "error"}; la conexión se cierra
+    en cuanto se establece, sin llegar a negociar SSH.
+    """
+    start = time.monotonic()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=timeout)
+    except asyncio.TimeoutError:
+        return {"reachable": False, "latency_ms": None, "error": "timeout"}
+    except OSError as e:
+        return {"reachable": False, "latency_ms": None, "error": e.strerror or str(e)}
+    latency = round((time.monotonic() - start) * 1000, 1)
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return {"reachable": True, "latency_ms": latency, "error": None}
+
+async def probe_all(devices, timeout=PROBE_TIMEOUT, concurrency=PROBE_CONCURRENCY):
+    """
+    Probar todos los dispositivos (tuplas (name, info)) a la vez.
+
+    El puerto es info["port"] si existe, o 22. Devuelve {name: resultado}
+    con la IP y el puerto añadidos.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def probe_one(name, info):
+        port = int(info.get('port', SSH_PORT))
+        async with semaphore:
+            result = await probe(info['ip'], port, timeout)
+        return name, {"ip": info['ip'], "port": port, **result}
+
+    results = await asyncio.gather(*(probe_one(name, info) for name, info in devices))
+    return dict(results)
+
+def check(devices, timeout=PROBE_TIMEOUT, concurrency=PROBE_CONCURRENCY):
+    """Punto de entrada síncrono: probar devices y devolver {name: resultado}"""
+    return asyncio.run(probe_all(list(devices), timeout=timeout, concurrency=concurrency))
+
+def unreachable(devices, timeout=PROBE_TIMEOUT):
+    """Nombres de los dispositivos que no aceptan conexiones en el puerto SSH"""
+    start = time.monotonic()
+    results = check(devices, timeout=timeout)
+    down = {name: result["error"] for name, result in results.items() if not result["reachable"]}
+    elapsed = round(time.monotonic() - start, 2)
+    if down:
+        logger.warning(f"Pre-flight: {len(down)}/{len(results)} dispositivos inalcanzables "
+                       f"({', '.join(sorted(down))}) en {elapsed}s")
+    else:
+        logger.info(f"Pre-flight: {len(results)} dispositivos alcanzables en {elapsed}s")
+    return down
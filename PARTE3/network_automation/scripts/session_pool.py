@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Pool de sesiones SSH persistentes
+Parte III - Administración de Redes
+
+Mantiene sesiones netmiko abiertas por dispositivo para que las operaciones
+repetidas (API y network_admin) no paguen de nuevo TCP, intercambio de
+claves SSH, autenticación, enable y terminal length 0 en cada llamada.
+"""
+
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+
+import netmiko
+
+logger = logging.getLogger('network_admin.session_pool')
+
+# Valores por defecto
+MAX_SESSIONS_PER_DEVICE = 2
+IDLE_TIMEOUT = 300
+CONNECT_TIMEOUT = 10
+ACQUIRE_TIMEOUT = 60
+
+class PooledSession:
+    """Sesión netmiko con marca de último uso"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.last_used = time.monotonic()
+
+    def is_alive(self):
+        try:
+            return self.connection.is_alive()
+        except Exception:
+            return False
+
+    def close(self):
+        try:
+            self.connection.disconnect()
+        except Exception:
+            pass
+
+class SessionPool:
+    """Sesiones SSH reutilizables indexadas por nombre de dispositivo"""
+
+    def __init__(self, max_per_device=MAX_SESSIONS_PER_DEVICE, idle_timeout=IDLE_TIMEOUT):
+        self.max_per_device = max_per_device
+        self.idle_timeout = idle_timeout
+        self._idle = {}      # device -> [PooledSession]
+        self._in_use = {}    # device -> número de sesiones prestadas
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self._reaper = threading.Thread(target=self._reap_loop, name='session-reaper', daemon=True)
+        self._reaper.start()
+
+    def _open(self, device_name, device_info):
+        """Abrir y preparar una sesión nueva"""
+        device_params = {
+            'device_type': device_info['type'],
+            'host': device_info['ip'],
+            'username': device_info['username'],
+            'password': device_info['password'],
+            'secret': device_info.get('secret', device_info['password']),
+            'timeout': CONNECT_TIMEOUT,
+            'session_log': None
+        }
+        logger.info(f"Abriendo sesión a {device_name} ({device_info['ip']})...")
+        connection = netmiko.ConnectHandler(**device_params)
+        connection.enable()
+        connection.send_command('terminal length 0')
+        return PooledSession(connection)
+
+    def _checkout(self, device_name):
+        """Tomar una sesión ociosa sana o reservar un hueco para abrir una nueva"""
+        deadline = time.monotonic() + ACQUIRE_TIMEOUT
+        with self._cond:
+            while True:
+                idle = self._idle.get(device_name, [])
+                while idle:
+                    session = idle.pop()
+                    self._in_use[device_name] = self._in_use.get(device_name, 0) + 1
+                    return session
+                if self._in_use.get(device_name, 0) < self.max_per_device:
+                    self._in_use[device_name] = self._in_use.get(device_name, 0) + 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No hay sesiones libres para {device_name}")
+                self._cond.wait(remaining)
+
+    def _release(self, device_name, session):
+        """Devolver la sesión al pool (o liberar el hueco si se descartó)"""
+        with self._cond:
+            self._in_use[device_name] -= 1
+            if session is not None and not self._closed:
+                session.last_used = time.monotonic()
+                self._idle.setdefault(device_name, []).append(session)
+                session = None
+            self._cond.notify_all()
+        if session is not None:
+            session.close()
+
+    @contextmanager
+    def session(self, device_name, device_info):
+        """
+        Prestar una conexión netmiko lista para usar.
+
+        Si la operación lanza una excepción la sesión se descarta en vez de
+        volver al pool, porque su estado (modo config, prompt) es incierto.
+        """
+        session = self._checkout(device_name)
+        try:
+            # Health check de la sesión reutilizada
+            if session is not None and not session.is_alive():
+                logger.info(f"Sesión a {device_name} caída, reconectando...")
+                session.close()
+                session = None
+            if session is None:
+                session = self._open(device_name, device_info)
+        except Exception:
+            self._release(device_name, None)
+            raise
+
+        try:
+            yield session.connection
+        except Exception:
+            session.close()
+            self._release(device_name, None)
+            raise
+        self._release(device_name, session)
+
+    def evict_idle(self):
+        """Cerrar las sesiones que llevan más de idle_timeout sin usarse"""
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            for device_name, sessions in self._idle.items():
+                keep = []
+                for session in sessions:
+                    if now - session.last_used > self.idle_timeout:
+                        expired.append((device_name, session))
+                    else:
+                        keep.append(session)
+                sessions[:] = keep
+        for device_name, session in expired:
+            logger.info(f"Cerrando sesión ociosa a {device_name}")
+            session.close()
+
+    def _reap_loop(self):
+        while not self._closed:
+            time.sleep(min(30, self.idle_timeout))
+            self.evict_idle()
+
+    def stats(self):
+        """Número de sesiones ociosas y en uso por dispositivo"""
+        with self._cond:
+            devices = set(self._idle) | set(self._in_use)
+            return {
+                name: {"idle": len(self._idle.get(name, [])), "in_use": self._in_use.get(name, 0)}
+                for name in sorted(devices)
+            }
+
+    def close_all(self):
+        """Cerrar todas las sesiones ociosas"""
+        with self._cond:
+            self._closed = True
+            sessions = [s for sessions in self._idle.values() for s in sessions]
+            self._idle.clear()
+        for session in sessions:
+            session.close()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Obtener el pool de sesiones compartido del proceso"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SessionPool()
+            atexit.register(_pool.close_all)
+        return _pool
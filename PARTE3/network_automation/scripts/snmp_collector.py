@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Recolector SNMP v2c asíncrono
+Parte III - Administración de Redes
+
+Consulta sysUpTime y las columnas de IF-MIB (nombre, estado operativo,
+octetos y errores) de todos los dispositivos con GETBULK sobre un único
+socket UDP y asyncio. Cada equipo cuesta unos pocos paquetes UDP en lugar
+de un login SSH completo. La codificación BER necesaria (un subconjunto
+pequeño de SNMPv2c) se implementa aquí para no depender de pysnmp.
+
+Uso: python snmp_collector.py [dispositivo ...]
+"""
+
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+
+from inventory import get_inventory
+
+logger = logging.getLogger('network_admin.snmp')
+
+# Valores por defecto (sobrescribibles en la sección snmp de devices.yaml)
+SNMP_PORT = 161
+SNMP_TIMEOUT = 2.0
+SNMP_RETRIES = 1
+MAX_REPETITIONS = 25
+POLL_CONCURRENCY = 200
+
+# OIDs
+SYS_UPTIME = '1.3.6.1.2.1.1.3.0'
+IF_COLUMNS = {
+    'name': '1.3.6.1.2.1.31.1.1.1.1',          # ifName
+    'oper_status': '1.3.6.1.2.1.2.2.1.8',      # ifOperStatus
+    'in_octets': '1.3.6.1.2.1.31.1.1.1.6',     # ifHCInOctets
+    'out_octets': '1.3.6.1.2.1.31.1.1.1.10',   # ifHCOutOctets
+    'in_errors': '1.3.6.1.2.1.2.2.1.14',       # ifInErrors
+    'out_errors': '1.3.6.1.2.1.2.2.1.20',      # ifOutErrors
+}
+OPER_STATUS = {1: 'up', 2: 'down', 3: 'testing', 4: 'unknown', 5: 'dormant', 6: 'notPresent', 7: 'lowerLayerDown'}
+
+# ---------------------------------------------------------------------------
+# Codificación BER
+# ---------------------------------------------------------------------------
+
+INTEGER = 0x02
+OCTET_STRING = 0x04
+NULL = 0x05
+OBJECT_IDENTIFIER = 0x06
+SEQUENCE = 0x30
+IP_ADDRESS = 0x40
+COUNTER32 = 0x41
+GAUGE32 = 0x42
+TIMETICKS = 0x43
+COUNTER64 = 0x46
+NO_SUCH_OBJECT = 0x80
+NO_SUCH_INSTANCE = 0x81
+END_OF_MIB_VIEW = 0x82
+
+GET_REQUEST = 0xA0
+GET_NEXT_REQUEST = 0xA1
+GET_RESPONSE = 0xA2
+GET_BULK_REQUEST = 0xA5
+
+SNMP_V2C = 1
+
+class SnmpError(Exception):
+    """Respuesta SNMP con error o que no se pudo decodificar"""
+
+class _Exception:
+    """Valores de excepción de SNMPv2 (noSuchObject, endOfMibView...)"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+NO_SUCH_OBJECT_VALUE = _Exception('noSuchObject')
+NO_SUCH_INSTANCE_VALUE = _Exception('noSuchInstance')
+END_OF_MIB = _Exception('endOfMibView')
+
+def encode_length(length):
+    if length < 0x80:
+        return bytes([length])
+    raw = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes([0x80 | len(raw)]) + raw
+
+def encode_tlv(tag, value):
+    return bytes([tag]) + encode_length(len(value)) + value
+
+def encode_integer(value):
+    return encode_tlv(INTEGER, value.to_bytes(value.bit_length() // 8 + 1, 'big', signed=True))
+
+def encode_oid(oid):
+    parts = [int(part) for part in oid.split('.')]
+    body = bytearray([40 * parts[0] + parts[1]])
+    for part in parts[2:]:
+        chunk = [part & 0x7F]
+        part >>= 7
+        while part:
+            chunk.append(0x80 | (part & 0x7F))
+            part >>= 7
+        body.extend(reversed(chunk))
+    return encode_tlv(OBJECT_IDENTIFIER, bytes(body))
+
+def encode_message(community, pdu_type, request_id, varbinds, field1=0, field2=0):
+    """
+    Mensaje SNMPv2c completo.
+
+    field1/field2 son error-status/error-index, o non-repeaters y
+    max-repetitions en un GETBULK. varbinds es una lista de (oid, None).
+    """
+    bindings = b''.join(encode_tlv(SEQUENCE, encode_oid(oid) + encode_tlv(NULL, b'')) for oid, _ in varbinds)
+    pdu = encode_tlv(pdu_type, encode_integer(request_id) + encode_integer(field1) + encode_integer(field2)
+                     + encode_tlv(SEQUENCE, bindings))
+    return encode_tlv(SEQUENCE, encode_integer(SNMP_V2C) + encode_tlv(OCTET_STRING, community.encode()) + pdu)
+
+def decode_tlv(data, pos):
+    """Leer un TLV en data[pos:]; devuelve (tag, valor, siguiente posición)"""
+    try:
+        tag = data[pos]
+        length = data[pos + 1]
+        pos += 2
+        if length & 0x80:
+            count = length & 0x7F
+            length = int.from_bytes(data[pos:pos + count], 'big')
+            pos += count
+    except IndexError:
+        raise SnmpError("Mensaje SNMP truncado")
+    if pos + length > len(data):
+        raise SnmpError("Mensaje SNMP truncado")
+    return tag, data[pos:pos + length], pos + length
+
+def decode_oid(value):
+    parts = list(divmod(value[0], 40)) if value[0] < 80 else [2, value[0] - 80]
+    current = 0
+    for byte in value[1:]:
+        current = (current << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            parts.append(current)
+            current = 0
+    return '.'.join(str(part) for part in parts)
+
+def decode_value(tag, value):
+    if tag == INTEGER:
+        return int.from_bytes(value, 'big', signed=True)
+    if tag in (COUNTER32, GAUGE32, TIMETICKS, COUNTER64):
+        return int.from_bytes(value, 'big')
+    if tag == OCTET_STRING:
+        return value
+    if tag == OBJECT_IDENTIFIER:
+        return decode_oid(value)
+    if tag == IP_ADDRESS:
+        return '.'.join(str(byte) for byte in value)
+    if tag == NULL:
+        return None
+    if tag == NO_SUCH_OBJECT:
+        return NO_SUCH_OBJECT_VALUE
+    if tag == NO_SUCH_INSTANCE:
+        return NO_SUCH_INSTANCE_VALUE
+    if tag == END_OF_MIB_VIEW:
+        return END_OF_MIB
+    return value
+
+def decode_sequence(value):
+    items, pos = [], 0
+    while pos < len(value):
+        tag, item, pos = decode_tlv(value, pos)
+        items.append((tag, item))
+    return items
+
+def decode_message(data):
+    """
+    Decodificar un mensaje SNMPv2c.
+
+    Devuelve (pdu_type, request_id, error_status, error_index, varbinds)
+    con varbinds como lista de (oid, valor).
+    """
+    tag, message, _ = decode_tlv(data, 0)
+    if tag != SEQUENCE:
+        raise SnmpError("El mensaje SNMP no es una secuencia")
+    (_, version), (_, community), (pdu_type, pdu) = decode_sequence(message)
+    fields = decode_sequence(pdu)
+    request_id, field1, field2 = (decode_value(INTEGER, value) for _, value in fields[:3])
+    varbinds = []
+    for _, binding in decode_sequence(fields[3][1]):
+        (_, oid), (value_tag, value) = decode_sequence(binding)
+        varbinds.append((decode_oid(oid), decode_value(value_tag, value)))
+    return pdu_type, request_id, field1, field2, varbinds
+
+# ---------------------------------------------------------------------------
+# Cliente asyncio
+# ---------------------------------------------------------------------------
+
+class SnmpClient(asyncio.DatagramProtocol):
+    """Un socket UDP compartido; las respuestas se asocian por request-id"""
+
+    def __init__(self, timeout=SNMP_TIMEOUT, retries=SNMP_RETRIES):
+        self.timeout = timeout
+        self.retries = retries
+        self.transport = None
+        self._pending = {}
+        self._next_id = random.randrange(1, 2 ** 30)
+
+    @classmethod
+    async def open(cls, **kwargs):
+        client = cls(**kwargs)
+        loop = asyncio.get_running_loop()
+        await loop.create_datagram_endpoint(lambda: client, local_addr=('0.0.0.0', 0))
+        return client
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            response = decode_message(data)
+        except (SnmpError, ValueError) as e:
+            logger.warning(f"Respuesta SNMP no válida de {addr[0]}: {e}")
+            return
+        future = self._pending.pop(response[1], None)
+        if future is not None and not future.done():
+            future.set_result(response)
+
+    def _request_id(self):
+        self._next_id = self._next_id % (2 ** 31 - 1) + 1
+        return self._next_id
+
+    async def request(self, host, community, pdu_type, oids, field1=0, field2=0, port=SNMP_PORT):
+        """Enviar una petición y esperar la respuesta, con reintentos"""
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            request_id = self._request_id()
+            future = loop.create_future()
+            self._pending[request_id] = future
+            self.transport.sendto(
+                encode_message(community, pdu_type, request_id, [(oid, None) for oid in oids], field1, field2),
+                (host, port)
+            )
+            try:
+                _, _, error_status, error_index, varbinds = await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                continue
+            finally:
+                self._pending.pop(request_id, None)
+            if error_status:
+                raise SnmpError(f"error-status {error_status} (índice {error_index})")
+            return varbinds
+        raise SnmpError(f"Sin respuesta SNMP de {host}")
+
+    async def get(self, host, community, oids, port=SNMP_PORT):
+        return await self.request(host, community, GET_REQUEST, oids, port=port)
+
+    async def bulk_walk(self, host, community, columns, max_repetitions=MAX_REPETITIONS, port=SNMP_PORT):
+        """
+        Recorrer varias columnas de una tabla a la vez con GETBULK.
+
+        columns es {nombre: oid base}; devuelve {nombre: {índice: valor}}.
+        En cada respuesta las filas llegan intercaladas columna a columna.
+        """
+        results = {name: {} for name in columns}
+        current = dict(columns)
+        active = list(columns)
+        while active:
+            varbinds = await self.request(host, community, GET_BULK_REQUEST, [current[name] for name in active],
+                                          0, max_repetitions, port=port)
+            finished = set()
+            progress = set()
+            for position, (oid, value) in enumerate(varbinds):
+                name = active[position % len(active)]
+                if name in finished:
+                    continue
+                base = columns[name]
+                if value is END_OF_MIB or not oid.startswith(base + '.'):
+                    finished.add(name)
+                    continue
+                results[name][oid[len(base) + 1:]] = value
+                current[name] = oid
+                progress.add(name)
+            # Una columna sin avance (agente defectuoso) también se da por terminada
+            active = [name for name in active if name not in finished and name in progress]
+        return results
+
+# ---------------------------------------------------------------------------
+# Sondeo de la flota
+# ---------------------------------------------------------------------------
+
+def snmp_settings():
+    """Sección snmp de devices.yaml con los valores por defecto"""
+    settings = (get_inventory().data or {}).get('snmp') or {}
+    if str(settings.get('version', 'v2c')).lower() not in ('v2c', '2c', '2'):
+        raise SnmpError(f"Versión SNMP no soportada: {settings.get('version')} (solo v2c)")
+    return {
+        "community": settings.get('community', 'public'),
+        "port": int(settings.get('port', SNMP_PORT)),
+        "timeout": float(settings.get('timeout', SNMP_TIMEOUT)),
+        "retries": int(settings.get('retries', SNMP_RETRIES)),
+        "max_repetitions": int(settings.get('max_repetitions', MAX_REPETITIONS)),
+    }
+
+async def poll_device(client, device_name, device_info, settings):
+    """
+    Sondear un dispositivo: sysUpTime y tabla de interfaces.
+
+    Devuelve {"device", "uptime", "interfaces": {ifIndex: {...}},
+    "timestamp", "elapsed_ms"}.
+    """
+    start = time.monotonic()
+    host = device_info['ip']
+    community = device_info.get('snmp_community', settings["community"])
+    port = settings["port"]
+
+    (_, uptime), = await client.get(host, community, [SYS_UPTIME], port=port)
+    table = await client.bulk_walk(host, community, IF_COLUMNS, settings["max_repetitions"], port=port)
+
+    interfaces = {}
+    for index, name in table['name'].items():
+        status = table['oper_status'].get(index)
+        interfaces[int(index)] = {
+            "name": name.decode(errors='replace') if isinstance(name, bytes) else str(name),
+            "oper_status": OPER_STATUS.get(status, status),
+            "in_octets": table['in_octets'].get(index),
+            "out_octets": table['out_octets'].get(index),
+            "in_errors": table['in_errors'].get(index),
+            "out_errors": table['out_errors'].get(index),
+        }
+    return {
+        "device": device_name,
+        "uptime": uptime / 100 if isinstance(uptime, int) else None,
+        "interfaces": interfaces,
+        "timestamp": time.time(),
+        "elapsed_ms": round((time.monotonic() - start) * 1000, 1)
+    }
+
+async def poll_fleet(devices, settings=None, concurrency=POLL_CONCURRENCY):
+    """Sondear todos los dispositivos (tuplas (name, info)); devuelve {name: resultado o {"error"}}"""
+    settings = settings or snmp_settings()
+    client = await SnmpClient.open(timeout=settings["timeout"], retries=settings["retries"])
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def poll_one(name, info):
+        async with semaphore:
+            try:
+                return name, await poll_device(client, name, info, settings)
+            except (SnmpError, OSError, ValueError) as e:
+                logger.error(f"Error SNMP en {name}: {e}")
+                return name, {"device": name, "error": str(e)}
+
+    try:
+        return dict(await asyncio.gather(*(poll_one(name, info) for name, info in devices)))
+    finally:
+        client.close()
+
+def poll(devices=None, settings=None):
+    """Punto de entrada síncrono: sondear devices (por defecto todo el inventario)"""
+    if devices is None:
+        devices = get_inventory().devices()
+    return asyncio.run(poll_fleet(list(devices), settings))
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Sondeo SNMP de interfaces")
+    parser.add_argument("devices", nargs="*", help="Dispositivos a sondear (por defecto todos)")
+    args = parser.parse_args()
+
+    inventory = get_inventory()
+    devices = [(name, inventory.get(name)[1]) for name in args.devices if inventory.get(name)] or None
+    start = time.monotonic()
+    results = poll(devices)
+    for name, result in results.items():
+        if "error" in result:
+            print(f"  ✗ {name}: {result['error']}")
+            continue
+        up = sum(1 for interface in result["interfaces"].values() if interface["oper_status"] == 'up')
+        print(f"  ✓ {name}: {len(result['interfaces'])} interfaces ({up} up), "
+              f"uptime {result['uptime']:.0f}s, {result['elapsed_ms']} ms")
+    print(f"\nSondeados {len(results)} dispositivos en {time.monotonic() - start:.2f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Receptor syslog asíncrono (UDP/TCP)
+Parte III - Administración de Redes
+
+Recibe los mensajes de los equipos directamente en el servicio de
+automatización, sin pasar por los archivos de rsyslog. El bucle asyncio
+solo encola los datagramas; un hilo escritor los procesa por lotes:
+interpreta RFC 3164/5424 y el formato Cisco %FAC-SEV-MNEMONIC, traduce la
+IP de origen al nombre de devices.yaml (o, si llega reenviado por un relay
+como rsyslog en 127.0.0.1, el host de la cabecera del mensaje) y añade el lote entero a un
+segmento horario de solo escritura al final (JSON por línea) con una
+única escritura. Con un buffer de recepción grande, las ráfagas se
+absorben en el kernel mientras se escribe el lote anterior.
+
+Uso: python syslog_server.py [--port 5514]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import socket
+import asyncio
+import logging
+import argparse
+import datetime
+import ipaddress
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from inventory import get_inventory
+
+logger = logging.getLogger('network_admin.syslog')
+
+BASE_DIR = '/root/network_automation'
+LOGSTORE_DIR = os.path.join(BASE_DIR, 'logstore')
+
+# Valores por defecto (sección syslog de devices.yaml)
+SYSLOG_PORT = 5514
+BATCH_INTERVAL = 0.2
+RECEIVE_BUFFER = 8 * 1024 * 1024
+SEGMENT_SECONDS = 3600
+MAX_MESSAGE = 8192
+
+SEVERITIES = ['emerg', 'alert', 'crit', 'err', 'warning', 'notice', 'info', 'debug']
+FACILITIES = ['kern', 'user', 'mail', 'daemon', 'auth', 'syslog', 'lpr', 'news', 'uucp', 'cron',
+              'authpriv', 'ftp', 'ntp', 'audit', 'alert', 'clock',
+              'local0', 'local1', 'local2', 'local3', 'local4', 'local5', 'local6', 'local7']
+
+PRI_RE = re.compile(r"<(\d{1,3})>")
+RFC5424_RE = re.compile(r"1 (\S+) (\S+) (\S+) (\S+) (\S+) (-|(?:\[(?:[^\]\\]|\\.)*\])+) ?(.*)", re.S)
+RFC3164_RE = re.compile(r"([A-Z][a-z]{2} [ \d]\d \d\d:\d\d:\d\d) (\S+) (.*)", re.S)
+CISCO_RE = re.compile(r"%([A-Z][A-Z0-9_]*)-([0-7])-([A-Z0-9_]+)\s*:\s*(.*)", re.S)
+
+def parse_syslog(data, source_ip, received=None):
+    """
+    Interpretar un mensaje syslog.
+
+    Devuelve {ts, ip, severity, facility, mnemonic, host, message, text}:
+    ts es la hora de recepción (los relojes de los equipos no son fiables),
+    severity 0-7, y facility/mnemonic los de Cisco si el mensaje los trae.
+    text es el mensaje completo sin la prioridad.
+    """
+    text = data.decode('utf-8', errors='replace').rstrip('\r\n\x00') if isinstance(data, bytes) else data
+    record = {"ts": round(received or time.time(), 3), "ip": source_ip, "severity": 5,
+              "facility": "user", "mnemonic": None, "host": None, "message": text, "text": text}
+
+    match = PRI_RE.match(text)
+    if match:
+        pri = int(match.group(1))
+        facility = pri >> 3
+        record["severity"] = pri & 7
+        record["facility"] = FACILITIES[facility] if facility < len(FACILITIES) else str(facility)
+        text = record["text"] = record["message"] = text[match.end():]
+
+    header = RFC5424_RE.match(text)
+    if header:
+        host, app = header.group(2), header.group(3)
+        record["host"] = None if host == '-' else host
+        record["message"] = header.group(7)
+        if app != '-':
+            record["program"] = app
+    else:
+        header = RFC3164_RE.match(text)
+        if header:
+            record["host"] = header.group(2)
+            record["message"] = header.group(3)
+
+    cisco = CISCO_RE.search(record["message"])
+    if cisco:
+        record["facility"] = cisco.group(1)
+        record["severity"] = int(cisco.group(2))
+        record["mnemonic"] = f"{cisco.group(1)}-{cisco.group(2)}-{cisco.group(3)}"
+        record["message"] = cisco.group(4)
+    return record
+
+def segment_name(timestamp):
+    """Nombre del segmento (una hora por archivo) que contiene timestamp"""
+    return datetime.datetime.fromtimestamp(timestamp - timestamp % SEGMENT_SECONDS).strftime("%Y%m%d%H")
+
+class SegmentStore:
+    """Segmentos horarios de solo añadir con un registro JSON por línea"""
+
+    def __init__(self, root=LOGSTORE_DIR):
+        self.root = root
+        self.segments_dir = os.path.join(root, 'segments')
+        os.makedirs(self.segments_dir, exist_ok=True)
+        self._current = None
+        self._file = None
+
+    def segment_path(self, name):
+        return os.path.join(self.segments_dir, f"{name}.jsonl")
+
+    def segments(self):
+        """Nombres de los segmentos existentes, del más antiguo al más reciente"""
+        return sorted(filename[:-6] for filename in os.listdir(self.segments_dir) if filename.endswith('.jsonl'))
+
+    def append(self, records):
+        """Añadir registros (ordenados por ts) con una escritura por segmento"""
+        lines = {}
+        for record in records:
+            lines.setdefault(segment_name(record["ts"]), []).append(json.dumps(record, ensure_ascii=False))
+        for name, segment_lines in lines.items():
+            if name != self._current:
+                if self._file is not None:
+                    self._file.close()
+                self._file = open(self.segment_path(name), 'a', encoding='utf-8')
+                self._current = name
+            self._file.write('\n'.join(segment_lines) + '\n')
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._current = None
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        self.server.pending.append((data, addr[0], time.time()))
+
+class SyslogServer:
+    """Receptor UDP/TCP con escritura por lotes en el SegmentStore"""
+
+    def __init__(self, store=None, port=SYSLOG_PORT, host='0.0.0.0', udp=True, tcp=True,
+                 batch_interval=BATCH_INTERVAL, relays=()):
+        self.store = store or SegmentStore()
+        # Orígenes que reenvían mensajes de otros equipos (además de loopback)
+        self.relays = set(relays)
+        self.port = port
+        self.host = host
+        self.udp = udp
+        self.tcp = tcp
+        self.batch_interval = batch_interval
+        self.pending = []
+        self.listeners = []
+        self.stats = {"received": 0, "written": 0, "batches": 0, "errors": 0}
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='syslog-writer')
+        self._transports = []
+        self._stopping = None
+
+    def add_listener(self, callback):
+        """Registrar callback(records) que se llama tras escribir cada lote"""
+        self.listeners.append(callback)
+
+    def _is_relay(self, source_ip):
+        if source_ip in self.relays:
+            return True
+        try:
+            return ipaddress.ip_address(source_ip).is_loopback
+        except ValueError:
+            return False
+
+    def _process(self, batch):
+        """Interpretar y escribir un lote (en el hilo escritor)"""
+        inventory = get_inventory()
+        names = {}
+        records = []
+        for data, source_ip, received in batch:
+            try:
+                record = parse_syslog(data[:MAX_MESSAGE], source_ip, received)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Mensaje syslog no válido de {source_ip}: {e}")
+                continue
+            if self._is_relay(source_ip) and record["host"]:
+                # Reenviado: el equipo es el host de la cabecera, no el origen
+                key = record["host"]
+            else:
+                key = source_ip
+            if key not in names:
+                names[key] = inventory.name_for_ip(key) or (key if inventory.get(key) else None) or key
+            record["device"] = names[key]
+            records.append(record)
+        self.store.append(records)
+        self.stats["written"] += len(records)
+        self.stats["batches"] += 1
+        for callback in self.listeners:
+            try:
+                callback(records)
+            except Exception as e:
+                logger.error(f"Error en un suscriptor de syslog: {e}")
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.batch_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self.pending:
+                batch, self.pending = self.pending, []
+                self.stats["received"] += len(batch)
+                await loop.run_in_executor(self._writer, self._process, batch)
+
+    async def _handle_tcp(self, reader, writer):
+        """Conexión TCP: mensajes por recuento de octetos (RFC 6587) o por línea"""
+        source_ip = writer.get_extra_info('peername')[0]
+        try:
+            while True:
+                first = await reader.read(1)
+                if not first:
+                    break
+                if first.isdigit():
+                    prefix = first + await reader.readuntil(b' ')
+                    length = int(prefix[:-1])
+                    if length > MAX_MESSAGE:
+                        # No reservar memoria para una longitud arbitraria del cliente
+                        self.stats["errors"] += 1
+                        logger.warning(f"Mensaje syslog de {length} bytes de {source_ip} "
+                                       f"(máximo {MAX_MESSAGE}); se cierra la conexión")
+                        break
+                    data = await reader.readexactly(length)
+                else:
+                    data = first + await reader.readuntil(b'\n')
+                self.pending.append((data, source_ip, time.time()))
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        """Escuchar hasta stop(); pensado para ejecutarse con asyncio.run"""
+        loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        if self.udp:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+            sock.bind((self.host, self.port))
+            transport, _ = await loop.create_datagram_endpoint(lambda: _UDPProtocol(self), sock=sock)
+            self._transports.append(transport)
+        if self.tcp:
+            server = await asyncio.start_server(self._handle_tcp, self.host, self.port)
+            self._transports.append(server)
+        logger.info(f"Servidor syslog escuchando en {self.host}:{self.port} "
+                    f"({'UDP' if self.udp else ''}{'/' if self.udp and self.tcp else ''}{'TCP' if self.tcp else ''})")
+        try:
+            await self._flush_loop()
+        finally:
+            for transport in self._transports:
+                transport.close()
+            self._writer.shutdown(wait=True)
+            self.store.close()
+
+    def stop(self):
+        if self._stopping is not None:
+            self._stopping.set()
+
+    def start_in_thread(self):
+        """Ejecutar el servidor en un hilo propio con su bucle asyncio"""
+        thread = threading.Thread(target=lambda: asyncio.run(self.serve()), name='syslog-server', daemon=True)
+        thread.start()
+        return thread
+
+_server = None
+_server_lock = threading.Lock()
+
+def syslog_settings():
+    """Sección syslog de devices.yaml"""
+    return (get_inventory().data or {}).get('syslog') or {}
+
+def get_syslog_server():
+    """Obtener el receptor syslog compartido del proceso (sin arrancarlo)"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            settings = syslog_settings()
+            _server = SyslogServer(port=int(settings.get('port', SYSLOG_PORT)),
+                                   udp=settings.get('udp', True), tcp=settings.get('tcp', True),
+                                   relays=settings.get('relays') or ())
+        return _server
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Receptor syslog de los dispositivos de red")
+    parser.add_argument("--port", type=int, help=f"Puerto UDP/TCP (por defecto {SYSLOG_PORT} o syslog.port)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    server = get_syslog_server()
+    if args.port:
+        server.port = args.port
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    print(f"\nMensajes recibidos: {server.stats['received']}, escritos: {server.stats['written']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Series temporales de contadores de interfaces
+Parte III - Administración de Redes
+
+Guarda los contadores SNMP de cada (dispositivo, interfaz, métrica) en
+buffers circulares de NumPy respaldados por archivos mapeados en memoria,
+con varios niveles de resolución (10 s, 1 min y 1 h). Cada muestra se
+escribe en todos los niveles a la vez: como los contadores son
+acumulativos, el último valor de cada intervalo (con el instante en que se
+tomó) basta para calcular la tasa media entre dos muestras, así que el
+submuestreo no pierde información.
+El tamaño de los archivos es fijo y no depende de la retención consultada.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+
+import numpy as np
+
+from inventory import get_inventory
+
+logger = logging.getLogger('network_admin.timeseries')
+
+BASE_DIR = '/root/network_automation'
+TIMESERIES_DIR = os.path.join(BASE_DIR, 'timeseries')
+
+# Niveles de resolución: (segundos por punto, número de puntos)
+TIERS = [
+    (10, 2160),     # 6 horas
+    (60, 2880),     # 2 días
+    (3600, 2160),   # 90 días
+]
+
+METRICS = ['in_octets', 'out_octets', 'in_errors', 'out_errors']
+MAX_SERIES = 1024
+# Para dimensionar max_series según el inventario si no se configura
+INTERFACES_PER_DEVICE = 48
+POLL_INTERVAL = 10
+
+RANGE_RE = re.compile(r"^(\d+)([smhd]?)$")
+RANGE_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+def parse_range(value, default=3600):
+    """Convertir '30m', '6h', '7d' o segundos a segundos"""
+    if not value:
+        return default
+    match = RANGE_RE.match(str(value).strip().lower())
+    if not match:
+        raise ValueError(f"Rango no válido: {value} (usar p. ej. 30m, 6h, 7d)")
+    return int(match.group(1)) * RANGE_UNITS[match.group(2)]
+
+class _Tier:
+    """Un nivel de resolución: valor e instante de la última muestra de cada hueco"""
+
+    def __init__(self, root, step, capacity, max_series):
+        self.step = step
+        self.capacity = capacity
+        values_file = os.path.join(root, f"tier_{step}.values")
+        times_file = os.path.join(root, f"tier_{step}.times")
+        # Cada serie es una fila de capacity float64; los archivos existentes
+        # se amplían con filas vacías si max_series crece (nunca se reducen).
+        # Solo se recrean vacíos si no corresponden a esta capacidad
+        row_size = capacity * 8
+        sizes = [os.path.getsize(path) if os.path.exists(path) else None for path in (values_file, times_file)]
+        reuse = sizes[0] is not None and sizes[0] == sizes[1] and sizes[0] % row_size == 0 and sizes[0] > 0
+        stored = sizes[0] // row_size if reuse else 0
+        self.rows = max(max_series, stored)
+        self.created = not reuse
+        if reuse and self.rows > stored:
+            logger.info(f"Ampliando el nivel de {step}s de {stored} a {self.rows} series")
+            for path in (values_file, times_file):
+                with open(path, 'r+b') as f:
+                    f.truncate(self.rows * row_size)
+        mode = 'r+' if reuse else 'w+'
+        shape = (self.rows, capacity)
+        self.values = np.memmap(values_file, dtype=np.float64, mode=mode, shape=shape)
+        # Instante (epoch) de la muestra guardada en cada hueco; NaN = vacío.
+        # El intervalo del hueco es times // step
+        self.times = np.memmap(times_file, dtype=np.float64, mode=mode, shape=shape)
+        if mode == 'w+':
+            self.times[:] = np.nan
+        elif self.rows > stored:
+            self.times[stored:] = np.nan
+
+    @property
+    def retention(self):
+        return self.step * self.capacity
+
+    def write(self, rows, timestamp, values):
+        slot = int(timestamp) // self.step % self.capacity
+        self.values[rows, slot] = values
+        self.times[rows, slot] = timestamp
+
+    def read(self, row, start, end):
+        """
+        (inicio de cada intervalo, instante de su muestra, valores) entre
+        start y end; NaN en los huecos sin muestra.
+        """
+        buckets = np.arange(int(start) // self.step, int(end) // self.step + 1)
+        buckets = buckets[-self.capacity:]
+        slots = buckets % self.capacity
+        times = self.times[row, slots]
+        with np.errstate(invalid='ignore'):
+            valid = np.floor(times / self.step) == buckets
+        return (buckets * self.step, np.where(valid, times, np.nan),
+                np.where(valid, self.values[row, slots], np.nan))
+
+    def flush(self):
+        self.values.flush()
+        self.times.flush()
+
+def sample_rates(times, values):
+    """
+    Tasa de cada punto respecto a la muestra válida anterior.
+
+    Se divide por el tiempo real entre ambas muestras, no por el ancho del
+    intervalo, así que un intervalo parcial o tras un hueco da la tasa
+    media correcta. Devuelve len(values) - 1 tasas (el primer punto solo
+    sirve de referencia); los huecos y los reinicios de contador dan NaN.
+    """
+    valid = ~np.isnan(values)
+    positions = np.where(valid, np.arange(len(values)), -1)
+    # Posición de la última muestra válida anterior a cada punto
+    previous = np.concatenate(([-1], np.maximum.accumulate(positions)[:-1]))
+    rate = np.full(len(values), np.nan)
+    ok = valid & (previous >= 0)
+    rate[ok] = (values[ok] - values[previous[ok]]) / (times[ok] - times[previous[ok]])
+    rate[rate < 0] = np.nan   # reinicio o desbordamiento del contador
+    return rate[1:]
+
+class TimeSeriesStore:
+    """Buffers circulares por serie (device, interfaz, métrica) con varios niveles"""
+
+    def __init__(self, root=TIMESERIES_DIR, tiers=TIERS, max_series=MAX_SERIES):
+        self.root = root
+        self.index_file = os.path.join(root, 'series.json')
+        self._lock = threading.Lock()
+
+        os.makedirs(root, exist_ok=True)
+        self.tiers = [_Tier(root, step, capacity, max_series) for step, capacity in tiers]
+        self.max_series = min(tier.rows for tier in self.tiers)
+        self._series = {}
+        if os.path.exists(self.index_file) and not any(tier.created for tier in self.tiers):
+            with open(self.index_file) as f:
+                self._series = {tuple(key.split('\t')): row for key, row in json.load(f).items()}
+
+    def _row(self, device_name, interface, metric):
+        key = (device_name, interface, metric)
+        row = self._series.get(key)
+        if row is None:
+            if len(self._series) >= self.max_series:
+                return None
+            row = self._series[key] = len(self._series)
+        return row
+
+    def _save_index(self):
+        tmp_file = f"{self.index_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({'\t'.join(key): row for key, row in self._series.items()}, f)
+        os.replace(tmp_file, self.index_file)
+
+    def record(self, timestamp, samples):
+        """
+        Registrar muestras tomadas en timestamp.
+
+        samples es una lista de (device, interfaz, métrica, valor); todas se
+        escriben en cada nivel con una sola asignación vectorizada. Si se
+        alcanza max_series solo se descartan las series nuevas; las que ya
+        tienen fila se siguen registrando.
+        """
+        with self._lock:
+            known = len(self._series)
+            rows, values = [], []
+            dropped = 0
+            for device_name, interface, metric, value in samples:
+                row = self._row(device_name, interface, metric)
+                if row is None:
+                    dropped += 1
+                    continue
+                if value is not None:
+                    rows.append(row)
+                    values.append(value)
+            if dropped:
+                logger.error(f"Límite de {self.max_series} series alcanzado; se descartan {dropped} "
+                             f"muestras de series nuevas (aumentar timeseries.max_series)")
+            if not rows:
+                return 0
+            rows = np.array(rows)
+            values = np.array(values, dtype=np.float64)
+            for tier in self.tiers:
+                tier.write(rows, timestamp, values)
+            if len(self._series) != known:
+                self._save_index()
+        return len(rows)
+
+    def ingest(self, poll_results):
+        """
+        Registrar el resultado de snmp_collector.poll().
+
+        Cada dispositivo se guarda con el instante de su propio sondeo, que
+        es el que se usa después para calcular las tasas.
+        """
+        recorded = 0
+        for device_name, result in poll_results.items():
+            if "error" in result:
+                continue
+            samples = [(device_name, interface["name"], metric, interface.get(metric))
+                       for interface in result["interfaces"].values() for metric in METRICS]
+            recorded += self.record(result.get("timestamp") or time.time(), samples)
+        return recorded
+
+    def interfaces(self, device_name):
+        """Interfaces con series registradas de un dispositivo"""
+        with self._lock:
+            return sorted({interface for device, interface, metric in self._series if device == device_name})
+
+    def tier_for(self, seconds):
+        """Nivel más fino cuya retención cubre el rango pedido"""
+        for tier in self.tiers:
+            if tier.retention >= seconds:
+                return tier
+        return self.tiers[-1]
+
+    def query(self, device_name, interface, seconds, now=None):
+        """
+        Tasas de una interfaz en los últimos seconds segundos.
+
+        Devuelve {"step", "points": [{"t", "in_bps", "out_bps",
+        "in_errors_ps", "out_errors_ps"}]} o None si la interfaz no tiene
+        series. Las tasas se calculan con sample_rates sobre el nivel
+        elegido, dividiendo por el tiempo real entre muestras; los huecos y
+        los reinicios de contador dan null.
+        """
+        now = time.time() if now is None else now
+        tier = self.tier_for(seconds)
+        with self._lock:
+            rows = {metric: self._series.get((device_name, interface, metric)) for metric in METRICS}
+        if all(row is None for row in rows.values()):
+            return None
+
+        # Un intervalo más para poder calcular la tasa del primer punto
+        start = now - seconds - tier.step
+        rates = {}
+        timestamps = None
+        for metric, row in rows.items():
+            if row is None:
+                continue
+            timestamps, times, values = tier.read(row, start, now)
+            rates[metric] = sample_rates(times, values)
+
+        points = []
+        scale = {'in_octets': 8, 'out_octets': 8, 'in_errors': 1, 'out_errors': 1}
+        names = {'in_octets': 'in_bps', 'out_octets': 'out_bps',
+                 'in_errors': 'in_errors_ps', 'out_errors': 'out_errors_ps'}
+        columns = {names[metric]: np.round(rate * scale[metric], 3) for metric, rate in rates.items()}
+        for position, timestamp in enumerate(timestamps[1:].tolist()):
+            point = {"t": int(timestamp)}
+            for name, column in columns.items():
+                value = column[position]
+                point[name] = None if np.isnan(value) else float(value)
+            points.append(point)
+        return {"device": device_name, "interface": interface, "step": tier.step, "points": points}
+
+    def flush(self):
+        with self._lock:
+            for tier in self.tiers:
+                tier.flush()
+
+class MonitorPoller:
+    """Hilo que sondea la flota por SNMP cada interval segundos y guarda los contadores"""
+
+    def __init__(self, store, interval=POLL_INTERVAL, on_poll=None):
+        self.store = store
+        self.interval = interval
+        self.on_poll = on_poll
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='snmp-poller', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        logger.info(f"Sondeo SNMP periódico cada {self.interval}s")
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        import snmp_collector
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                results = snmp_collector.poll()
+                self.store.ingest(results)
+                self.store.flush()
+                if self.on_poll:
+                    self.on_poll(results)
+            except Exception as e:
+                logger.error(f"Error en el sondeo SNMP periódico: {e}")
+            self._stop.wait(max(0, self.interval - (time.monotonic() - started)))
+
+def default_max_series(inventory):
+    """max_series por defecto: INTERFACES_PER_DEVICE interfaces por dispositivo (mínimo MAX_SERIES)"""
+    return max(MAX_SERIES, len(inventory) * INTERFACES_PER_DEVICE * len(METRICS))
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_timeseries_store():
+    """Obtener el almacén de series compartido del proceso"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            inventory = get_inventory()
+            settings = (inventory.data or {}).get('timeseries') or {}
+            _store = TimeSeriesStore(max_series=int(settings.get('max_series') or default_max_series(inventory)))
+        return _store
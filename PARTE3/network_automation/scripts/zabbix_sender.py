@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Envío de resultados a Zabbix (protocolo sender/trapper)
+Parte III - Administración de Redes
+
+Al terminar cada operación de flota (run_on_devices) y cada sondeo SNMP
+periódico, los resultados se convierten en valores de items y se envían
+al trapper de Zabbix (puerto 10051) por lotes, con una sola conexión por
+lote. Así Zabbix recibe el estado de interfaces, pings, backups y
+alcanzabilidad que la automatización ya obtuvo, sin volver a sondear los
+equipos. Los items deben existir en Zabbix con tipo "Zabbix trapper".
+El envío se hace en un hilo propio, así que un servidor Zabbix lento o
+caído nunca retrasa la operación que generó los valores.
+
+Uso: python zabbix_sender.py HOST CLAVE VALOR   (envío de prueba)
+"""
+
+import sys
+import json
+import time
+import zlib
+import socket
+import struct
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from inventory import get_inventory
+from fleet import DeviceUnreachable
+
+logger = logging.getLogger('network_admin.zabbix')
+
+# Valores por defecto (sección zabbix de devices.yaml)
+ZABBIX_PORT = 10051
+SEND_TIMEOUT = 3
+BATCH_SIZE = 1000
+
+HEADER = b'ZBXD'
+FLAG_ZABBIX = 0x01
+FLAG_COMPRESSED = 0x02
+HEADER_SIZE = 13   # 'ZBXD' + flags + longitud de datos (4) + reservado (4)
+
+class ZabbixError(Exception):
+    """Respuesta del servidor Zabbix no válida o rechazada"""
+
+def pack(payload):
+    """Mensaje del protocolo de Zabbix: cabecera ZBXD\\1 + longitudes + JSON"""
+    data = json.dumps(payload).encode()
+    return HEADER + bytes([FLAG_ZABBIX]) + struct.pack('<II', len(data), 0) + data
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ZabbixError("Conexión cerrada por el servidor Zabbix")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def recv_message(sock):
+    """Leer y decodificar un mensaje del protocolo de Zabbix"""
+    header = _recv_exactly(sock, HEADER_SIZE)
+    if header[:4] != HEADER:
+        raise ZabbixError(f"Cabecera no válida en la respuesta: {header[:4]!r}")
+    flags = header[4]
+    length, _ = struct.unpack('<II', header[5:])
+    data = _recv_exactly(sock, length)
+    if flags & FLAG_COMPRESSED:
+        data = zlib.decompress(data)
+    return json.loads(data.decode())
+
+def parse_info(info):
+    """'processed: 3; failed: 0; total: 3; seconds spent: 0.000055' -> dict"""
+    result = {}
+    for part in info.split(';'):
+        name, _, value = part.partition(':')
+        name = name.strip().replace(' ', '_')
+        try:
+            result[name] = float(value) if '.' in value else int(value)
+        except ValueError:
+            continue
+    return result
+
+class ZabbixSender:
+    """Cliente del trapper de Zabbix con envío por lotes"""
+
+    def __init__(self, server, port=ZABBIX_PORT, timeout=SEND_TIMEOUT, batch_size=BATCH_SIZE):
+        self.server = server
+        self.port = port
+        self.timeout = timeout
+        self.batch_size = batch_size
+
+    def _send_batch(self, batch):
+        now = time.time()
+        payload = {
+            "request": "sender data",
+            "data": [{"host": host, "key": key, "value": str(value), "clock": int(clock), "ns": 0}
+                     for host, key, value, clock in batch],
+            "clock": int(now),
+            "ns": int(now % 1 * 1e9)
+        }
+        with socket.create_connection((self.server, self.port), timeout=self.timeout) as sock:
+            sock.sendall(pack(payload))
+            response = recv_message(sock)
+        if response.get("response") != "success":
+            raise ZabbixError(f"Zabbix rechazó el lote: {response}")
+        return parse_info(response.get("info", ""))
+
+    def send(self, items):
+        """
+        Enviar valores (host, clave, valor, clock) en lotes de batch_size.
+
+        Devuelve {"processed", "failed", "total", "batches"}; los valores
+        "failed" suelen ser items inexistentes o de otro tipo en Zabbix.
+        """
+        summary = {"processed": 0, "failed": 0, "total": 0, "batches": 0}
+        for start in range(0, len(items), self.batch_size):
+            info = self._send_batch(items[start:start + self.batch_size])
+            for name in ("processed", "failed", "total"):
+                summary[name] += info.get(name, 0)
+            summary["batches"] += 1
+        return summary
+
+# -- Conversión de resultados a items --------------------------------------
+
+def _interface_values(interfaces, args):
+    values = [
+        ("network.interfaces.total", len(interfaces)),
+        ("network.interfaces.up", sum(1 for i in interfaces if i.status == 'up' and i.protocol == 'up')),
+    ]
+    values.append(("network.interfaces.down", values[0][1] - values[1][1]))
+    for interface in interfaces:
+        values.append((f"network.interface.status[{interface.name}]",
+                       int(interface.status == 'up' and interface.protocol == 'up')))
+    return values
+
+def _backup_values(result, args):
+    values = [("network.backup.ok", 1), ("network.backup.last", int(time.time()))]
+    if isinstance(result, dict):
+        values.append(("network.backup.changed", int(not result.get("skipped"))))
+    return values
+
+def _ping_values(result, args):
+    target = args[0]
+    values = [(f"network.ping.success_rate[{target}]", result.get("success_rate", 0))]
+    if result.get("rtt_avg") is not None:
+        values.append((f"network.ping.rtt_avg[{target}]", result["rtt_avg"]))
+    return values
+
+def _matrix_values(row, args):
+    values = []
+    for target, result in row.items():
+        values.extend(_ping_values(result, (target,)))
+    return values
+
+# Valores específicos por operación de network_admin (además de network.run.ok)
+FLEET_VALUES = {
+    'get_interfaces': _interface_values,
+    'backup_device_config': _backup_values,
+    'incremental_backup_device': _backup_values,
+    'test_connectivity': _ping_values,
+    'ping_targets': _matrix_values,
+}
+
+def zabbix_settings():
+    """Sección zabbix de devices.yaml"""
+    return (get_inventory().data or {}).get('zabbix') or {}
+
+def fleet_items(operation, results, args=(), hosts=None, clock=None):
+    """
+    Valores de una ejecución de flota: (host, clave, valor, clock).
+
+    Para todos los dispositivos: network.run.ok[operación] y, si se sabe
+    (éxito o descartado en el pre-flight), network.ssh.reachable; además
+    los de FLEET_VALUES para la operación.
+    """
+    hosts = hosts or {}
+    clock = clock or time.time()
+    convert = FLEET_VALUES.get(operation)
+    items = []
+    for name, result, error in results:
+        host = hosts.get(name, name)
+        ok = error is None and result is not None and result is not False
+        items.append((host, f"network.run.ok[{operation}]", int(ok), clock))
+        if ok or isinstance(error, DeviceUnreachable):
+            items.append((host, "network.ssh.reachable", int(ok), clock))
+        if ok and convert:
+            items.extend((host, key, value, clock) for key, value in convert(result, args))
+        elif convert is _backup_values:
+            # Un backup fallido también es un dato (el resto de valores se omiten)
+            items.append((host, "network.backup.ok", 0, clock))
+    return items
+
+def poll_items(poll_results, hosts=None):
+    """Valores de un sondeo de snmp_collector.poll() (estado y contadores por interfaz)"""
+    hosts = hosts or {}
+    items = []
+    for name, result in poll_results.items():
+        host = hosts.get(name, name)
+        clock = result.get("timestamp") or time.time()
+        if "error" in result:
+            items.append((host, "network.device.up", 0, clock))
+            continue
+        items.append((host, "network.device.up", 1, clock))
+        if result.get("uptime") is not None:
+            items.append((host, "network.device.uptime", int(result["uptime"]), clock))
+        for interface in result["interfaces"].values():
+            interface_name = interface["name"]
+            items.append((host, f"network.if.status[{interface_name}]", int(interface["oper_status"] == 'up'), clock))
+            for metric in ('in_octets', 'out_octets', 'in_errors', 'out_errors'):
+                if interface.get(metric) is not None:
+                    items.append((host, f"network.if.{metric}[{interface_name}]", interface[metric], clock))
+    return items
+
+def _push(items, description, settings):
+    if not items:
+        return None
+    sender = ZabbixSender(settings.get('server', '127.0.0.1'), int(settings.get('port', ZABBIX_PORT)),
+                          float(settings.get('timeout', SEND_TIMEOUT)), int(settings.get('batch_size', BATCH_SIZE)))
+    start = time.monotonic()
+    try:
+        summary = sender.send(items)
+    except (OSError, ValueError, ZabbixError) as e:
+        logger.error(f"Error enviando {len(items)} valores de {description} a Zabbix: {e}")
+        return None
+    logger.info(f"Zabbix: {description}, {summary['processed']}/{len(items)} valores procesados "
+                f"en {summary['batches']} lotes ({time.monotonic() - start:.2f}s)")
+    if summary["failed"]:
+        logger.warning(f"Zabbix rechazó {summary['failed']} valores de {description} (¿items trapper sin crear?)")
+    return summary
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """Hilo de envío compartido: los lotes se envían en orden y de uno en uno"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='zabbix-sender')
+        return _executor
+
+def report(operation, results, args=()):
+    """
+    Enviar a Zabbix el resultado de una ejecución de flota (si está habilitado).
+
+    Los valores se calculan ahora y se envían en segundo plano; devuelve el
+    Future con el resumen de _push, o None si no hay nada que enviar.
+    """
+    settings = zabbix_settings()
+    if not settings.get('enabled'):
+        return None
+    items = fleet_items(operation, results, args, settings.get('hosts'))
+    return get_executor().submit(_push, items, operation, settings) if items else None
+
+def report_poll(poll_results):
+    """Enviar a Zabbix el resultado de un sondeo SNMP en segundo plano (si está habilitado)"""
+    settings = zabbix_settings()
+    if not settings.get('enabled'):
+        return None
+    items = poll_items(poll_results, settings.get('hosts'))
+    return get_executor().submit(_push, items, "sondeo SNMP", settings) if items else None
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Envío de valores al trapper de Zabbix")
+    parser.add_argument("host", help="Host en Zabbix")
+    parser.add_argument("key", help="Clave del item (tipo Zabbix trapper)")
+    parser.add_argument("value", help="Valor")
+    parser.add_argument("--server", help="Servidor Zabbix (por defecto zabbix.server)")
+    parser.add_argument("--port", type=int, help=f"Puerto del trapper (por defecto {ZABBIX_PORT})")
+    args = parser.parse_args()
+
+    settings = zabbix_settings()
+    sender = ZabbixSender(args.server or settings.get('server', '127.0.0.1'),
+                          args.port or int(settings.get('port', ZABBIX_PORT)))
+    try:
+        summary = sender.send([(args.host, args.key, args.value, time.time())])
+    except (OSError, ZabbixError) as e:
+        print(f"✗ Error: {e}")
+        return 1
+    print(f"✓ Procesados: {summary['processed']}, fallidos: {summary['failed']}")
+    return 0 if not summary["failed"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
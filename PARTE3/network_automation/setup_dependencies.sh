@@ -20,11 +20,11 @@ pip install --upgrade pip
 
 # Instalar dependencias principales
 echo -e "${YELLOW}Instalando dependencias principales...${NC}"
-pip install netmiko paramiko flask flask-restful pyyaml requests
+pip install netmiko paramiko asyncssh flask flask-restful pyyaml requests
 
 # Instalar dependencias adicionales
 echo -e "${YELLOW}Instalando dependencias adicionales...${NC}"
-pip install pytest jinja2 pandas
+pip install pytest jinja2 pandas numpy
 
 # Verificar instalación
 echo -e "${YELLOW}Verificando instalación...${NC}"
@@ -0,0 +1,13 @@
+"""
+Configuración común de las pruebas
+Parte III - Administración de Redes
+
+Los módulos de scripts/ se importan como en producción, desde su propio
+directorio.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
@@ -0,0 +1,206 @@
+"""
+Pruebas del recolector SNMP contra un agente UDP simulado
+Parte III - Administración de Redes
+"""
+
+import asyncio
+
+import pytest
+
+import snmp_collector
+from snmp_collector import (SnmpClient, SnmpError, encode_tlv, encode_integer, encode_oid, decode_message,
+                            IF_COLUMNS, SYS_UPTIME, SEQUENCE, OCTET_STRING, INTEGER, COUNTER32, COUNTER64,
+                            TIMETICKS, END_OF_MIB_VIEW, NO_SUCH_OBJECT, GET_REQUEST, GET_BULK_REQUEST,
+                            GET_RESPONSE, SNMP_V2C, END_OF_MIB)
+
+COMMUNITY = 'public'
+
+def oid_key(oid):
+    return tuple(int(part) for part in oid.split('.'))
+
+def encode_value(tag, value):
+    if tag == OCTET_STRING:
+        return encode_tlv(tag, value)
+    if tag in (INTEGER, COUNTER32, COUNTER64, TIMETICKS):
+        return encode_tlv(tag, encode_integer(value)[2:])
+    return encode_tlv(tag, b'')
+
+class FakeAgent(asyncio.DatagramProtocol):
+    """
+    Agente SNMPv2c mínimo: responde GET y GETBULK a partir de un diccionario
+    {oid: (tipo, valor)}. drop descarta las primeras peticiones recibidas.
+    """
+
+    def __init__(self, mib, drop=0):
+        self.mib = mib
+        self.order = sorted(mib, key=oid_key)
+        self.drop = drop
+        self.requests = []
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    @property
+    def port(self):
+        return self.transport.get_extra_info('sockname')[1]
+
+    def _next(self, oid):
+        key = oid_key(oid)
+        for candidate in self.order:
+            if oid_key(candidate) > key:
+                return candidate
+        return None
+
+    def datagram_received(self, data, addr):
+        pdu_type, request_id, non_repeaters, max_repetitions, varbinds = decode_message(data)
+        self.requests.append((pdu_type, [oid for oid, _ in varbinds], max_repetitions))
+        if self.drop:
+            self.drop -= 1
+            return
+        bindings = []
+        if pdu_type == GET_REQUEST:
+            for oid, _ in varbinds:
+                tag, value = self.mib.get(oid, (NO_SUCH_OBJECT, None))
+                bindings.append((oid, tag, value))
+        elif pdu_type == GET_BULK_REQUEST:
+            current = [oid for oid, _ in varbinds]
+            for _ in range(max_repetitions):
+                for position, oid in enumerate(current):
+                    following = self._next(oid)
+                    if following is None:
+                        bindings.append((oid, END_OF_MIB_VIEW, None))
+                    else:
+                        bindings.append((following,) + self.mib[following])
+                        current[position] = following
+        body = b''.join(encode_tlv(SEQUENCE, encode_oid(oid) + encode_value(tag, value))
+                        for oid, tag, value in bindings)
+        pdu = encode_tlv(GET_RESPONSE, encode_integer(request_id) + encode_integer(0) + encode_integer(0)
+                         + encode_tlv(SEQUENCE, body))
+        self.transport.sendto(
+            encode_tlv(SEQUENCE, encode_integer(SNMP_V2C) + encode_tlv(OCTET_STRING, COMMUNITY.encode()) + pdu),
+            addr
+        )
+
+def interface_mib(count, uptime=123456):
+    """MIB con sysUpTime y la tabla IF-MIB de count interfaces"""
+    mib = {SYS_UPTIME: (TIMETICKS, uptime)}
+    for index in range(1, count + 1):
+        mib[f"{IF_COLUMNS['name']}.{index}"] = (OCTET_STRING, f"Gi0/{index}".encode())
+        mib[f"{IF_COLUMNS['oper_status']}.{index}"] = (INTEGER, 1 if index % 2 else 2)
+        mib[f"{IF_COLUMNS['in_octets']}.{index}"] = (COUNTER64, 1000 * index)
+        mib[f"{IF_COLUMNS['out_octets']}.{index}"] = (COUNTER64, 2000 * index)
+        mib[f"{IF_COLUMNS['in_errors']}.{index}"] = (COUNTER32, index)
+        mib[f"{IF_COLUMNS['out_errors']}.{index}"] = (COUNTER32, 0)
+    return mib
+
+def run_with_agent(mib, scenario, drop=0, timeout=0.5, retries=1):
+    """Arrancar el agente en 127.0.0.1, ejecutar scenario(client, agent) y cerrar ambos"""
+    async def main():
+        loop = asyncio.get_running_loop()
+        agent = FakeAgent(mib, drop)
+        transport, _ = await loop.create_datagram_endpoint(lambda: agent, local_addr=('127.0.0.1', 0))
+        client = await SnmpClient.open(timeout=timeout, retries=retries)
+        try:
+            return await scenario(client, agent)
+        finally:
+            client.close()
+            transport.close()
+    return asyncio.run(main())
+
+def bulk_requests(agent):
+    return [request for request in agent.requests if request[0] == GET_BULK_REQUEST]
+
+def test_get_returns_typed_values():
+    mib = interface_mib(1)
+    varbinds = run_with_agent(mib, lambda client, agent: client.get('127.0.0.1', COMMUNITY, [SYS_UPTIME],
+                                                                    port=agent.port))
+    assert varbinds == [(SYS_UPTIME, 123456)]
+
+@pytest.mark.parametrize("rows", [3, 5, 6, 11])
+def test_bulk_walk_crosses_repetition_boundaries(rows):
+    """Tablas menores, iguales y mayores que max_repetitions (5)"""
+    mib = interface_mib(rows)
+
+    async def scenario(client, agent):
+        return await client.bulk_walk('127.0.0.1', COMMUNITY, IF_COLUMNS, max_repetitions=5,
+                                      port=agent.port), agent
+
+    table, agent = run_with_agent(mib, scenario)
+    assert set(table) == set(IF_COLUMNS)
+    for name, column in table.items():
+        assert sorted(column, key=int) == [str(index) for index in range(1, rows + 1)]
+    assert table['in_octets'][str(rows)] == 1000 * rows
+    # Una petición por cada bloque completo de 5 filas más la que detecta el final de la tabla
+    assert len(bulk_requests(agent)) == rows // 5 + 1
+
+def test_bulk_walk_stops_at_end_of_mib():
+    """Las columnas de ifXTable son lo último del MIB: el agente responde endOfMibView"""
+    mib = {oid: value for oid, value in interface_mib(2).items() if oid.startswith(IF_COLUMNS['name'])}
+
+    async def scenario(client, agent):
+        return await client.bulk_walk('127.0.0.1', COMMUNITY, {'name': IF_COLUMNS['name']},
+                                      max_repetitions=10, port=agent.port), agent
+
+    table, agent = run_with_agent(mib, scenario)
+    assert table == {'name': {'1': b'Gi0/1', '2': b'Gi0/2'}}
+    assert len(bulk_requests(agent)) == 1
+
+def test_bulk_walk_end_of_mib_on_one_column_keeps_the_others():
+    """Una columna que llega al final del MIB no corta el recorrido de las demás"""
+    mib = {oid: value for oid, value in interface_mib(7).items()
+           if oid.startswith((IF_COLUMNS['oper_status'], IF_COLUMNS['out_octets']))}
+    columns = {'oper_status': IF_COLUMNS['oper_status'], 'out_octets': IF_COLUMNS['out_octets']}
+
+    async def scenario(client, agent):
+        return await client.bulk_walk('127.0.0.1', COMMUNITY, columns, max_repetitions=3, port=agent.port)
+
+    table = run_with_agent(mib, scenario)
+    assert len(table['oper_status']) == 7
+    assert table['out_octets'] == {str(index): 2000 * index for index in range(1, 8)}
+
+def test_request_retries_after_timeout():
+    mib = interface_mib(1)
+
+    async def scenario(client, agent):
+        return await client.get('127.0.0.1', COMMUNITY, [SYS_UPTIME], port=agent.port), agent
+
+    varbinds, agent = run_with_agent(mib, scenario, drop=1, timeout=0.2, retries=1)
+    assert varbinds == [(SYS_UPTIME, 123456)]
+    assert len(agent.requests) == 2
+
+def test_request_gives_up_after_retries():
+    mib = interface_mib(1)
+
+    async def scenario(client, agent):
+        with pytest.raises(SnmpError):
+            await client.get('127.0.0.1', COMMUNITY, [SYS_UPTIME], port=agent.port)
+        return agent
+
+    agent = run_with_agent(mib, scenario, drop=10, timeout=0.1, retries=2)
+    assert len(agent.requests) == 3
+
+def test_poll_device_builds_interface_table():
+    mib = interface_mib(4, uptime=500)
+
+    async def scenario(client, agent):
+        settings = {"community": COMMUNITY, "port": agent.port, "timeout": 0.5, "retries": 1,
+                    "max_repetitions": 3}
+        return await snmp_collector.poll_device(client, 'R1', {'ip': '127.0.0.1'}, settings)
+
+    result = run_with_agent(mib, scenario)
+    assert result["device"] == 'R1'
+    assert result["uptime"] == 5.0
+    assert sorted(result["interfaces"]) == [1, 2, 3, 4]
+    assert result["interfaces"][1] == {"name": "Gi0/1", "oper_status": "up", "in_octets": 1000,
+                                       "out_octets": 2000, "in_errors": 1, "out_errors": 0}
+    assert result["interfaces"][2]["oper_status"] == "down"
+
+def test_end_of_mib_value_is_decoded():
+    mib = {}
+
+    async def scenario(client, agent):
+        return await client.request('127.0.0.1', COMMUNITY, GET_BULK_REQUEST, [SYS_UPTIME], 0, 1,
+                                    port=agent.port)
+
+    assert run_with_agent(mib, scenario) == [(SYS_UPTIME, END_OF_MIB)]
@@ -0,0 +1,186 @@
+"""
+Pruebas del envío al trapper de Zabbix contra un servidor TCP simulado
+Parte III - Administración de Redes
+"""
+
+import json
+import socket
+import struct
+import threading
+
+import pytest
+
+import zabbix_sender
+from zabbix_sender import ZabbixSender, ZabbixError, parse_info, fleet_items, poll_items, pack, HEADER
+from fleet import DeviceUnreachable
+from device_ops import InterfaceRecord
+
+class FakeTrapper:
+    """
+    Trapper de Zabbix mínimo en 127.0.0.1: guarda cada petición "sender
+    data" y responde con failed valores rechazados por lote.
+    """
+
+    def __init__(self, failed=0, response="success"):
+        self.failed = failed
+        self.response = response
+        self.requests = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(8)
+        self.port = self.sock.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _recv_exactly(self, conn, size):
+        data = b''
+        while len(data) < size:
+            chunk = conn.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("conexión cerrada")
+            data += chunk
+        return data
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            with conn:
+                header = self._recv_exactly(conn, 13)
+                assert header[:4] == HEADER
+                length, _ = struct.unpack('<II', header[5:])
+                request = json.loads(self._recv_exactly(conn, length))
+                self.requests.append(request)
+                total = len(request["data"])
+                failed = min(self.failed, total)
+                conn.sendall(pack({
+                    "response": self.response,
+                    "info": f"processed: {total - failed}; failed: {failed}; total: {total}; "
+                            f"seconds spent: 0.000055"
+                }))
+
+    def close(self):
+        self.sock.close()
+
+@pytest.fixture
+def trapper():
+    server = FakeTrapper()
+    yield server
+    server.close()
+
+def make_items(count):
+    return [("R1", f"network.test[{index}]", index, 1700000000) for index in range(count)]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def test_parse_info():
+    assert parse_info("processed: 3; failed: 1; total: 4; seconds spent: 0.000055") == {
+        "processed": 3, "failed": 1, "total": 4, "seconds_spent": 0.000055
+    }
+    assert parse_info("") == {}
+
+def test_send_splits_items_in_batches(trapper):
+    sender = ZabbixSender('127.0.0.1', trapper.port, timeout=2, batch_size=2)
+    summary = sender.send(make_items(5))
+    assert summary == {"processed": 5, "failed": 0, "total": 5, "batches": 3}
+    assert [len(request["data"]) for request in trapper.requests] == [2, 2, 1]
+    first = trapper.requests[0]
+    assert first["request"] == "sender data"
+    assert first["data"][0] == {"host": "R1", "key": "network.test[0]", "value": "0",
+                                "clock": 1700000000, "ns": 0}
+
+def test_push_reports_failed_values(caplog):
+    server = FakeTrapper(failed=1)
+    try:
+        settings = {"server": "127.0.0.1", "port": server.port, "batch_size": 10}
+        summary = zabbix_sender._push(make_items(3), "prueba", settings)
+    finally:
+        server.close()
+    assert summary["processed"] == 2
+    assert summary["failed"] == 1
+    assert "rechazó 1 valores" in caplog.text
+
+def test_rejected_batch_raises():
+    server = FakeTrapper(response="failed")
+    try:
+        with pytest.raises(ZabbixError):
+            ZabbixSender('127.0.0.1', server.port, timeout=2).send(make_items(1))
+    finally:
+        server.close()
+
+def test_connection_refused():
+    port = free_port()
+    with pytest.raises(OSError):
+        ZabbixSender('127.0.0.1', port, timeout=1).send(make_items(1))
+    # _push lo registra y no propaga el error a la operación de flota
+    assert zabbix_sender._push(make_items(1), "prueba", {"server": "127.0.0.1", "port": port}) is None
+
+def test_fleet_items_for_interfaces():
+    interfaces = [
+        InterfaceRecord("R1", "Gi0/0", "10.0.0.1", "up", "up"),
+        InterfaceRecord("R1", "Gi0/1", None, "administratively down", "down"),
+    ]
+    results = [
+        ("R1", interfaces, None),
+        ("R2", None, DeviceUnreachable("10.0.0.2: timeout")),
+        ("R3", None, RuntimeError("fallo")),
+    ]
+    items = fleet_items("get_interfaces", results, hosts={"R1": "router-r1"}, clock=100)
+    assert ("router-r1", "network.run.ok[get_interfaces]", 1, 100) in items
+    assert ("router-r1", "network.ssh.reachable", 1, 100) in items
+    assert ("router-r1", "network.interfaces.total", 2, 100) in items
+    assert ("router-r1", "network.interfaces.up", 1, 100) in items
+    assert ("router-r1", "network.interfaces.down", 1, 100) in items
+    assert ("router-r1", "network.interface.status[Gi0/1]", 0, 100) in items
+    # Inalcanzable en el pre-flight: se sabe que SSH no responde
+    assert [item for item in items if item[0] == "R2"] == [
+        ("R2", "network.run.ok[get_interfaces]", 0, 100),
+        ("R2", "network.ssh.reachable", 0, 100),
+    ]
+    # Otro error: no se afirma nada sobre la alcanzabilidad
+    assert [item for item in items if item[0] == "R3"] == [("R3", "network.run.ok[get_interfaces]", 0, 100)]
+
+def test_fleet_items_for_ping_and_backup():
+    ping = {"success": True, "success_rate": 100, "rtt_min": 1, "rtt_avg": None, "rtt_max": 3}
+    items = fleet_items("test_connectivity", [("R1", ping, None)], ("8.8.8.8",), clock=100)
+    assert ("R1", "network.ping.success_rate[8.8.8.8]", 100, 100) in items
+    assert not any(key.startswith("network.ping.rtt_avg") for _, key, _, _ in items)
+
+    items = fleet_items("backup_device_config", [("R1", None, None)], clock=100)
+    assert ("R1", "network.backup.ok", 0, 100) in items
+
+def test_poll_items():
+    results = {
+        "R1": {"timestamp": 50, "uptime": 12.5, "interfaces": {
+            1: {"name": "Gi0/0", "oper_status": "up", "in_octets": 10, "out_octets": 20,
+                "in_errors": 0, "out_errors": None},
+        }},
+        "R2": {"device": "R2", "error": "Sin respuesta SNMP"},
+    }
+    items = poll_items(results)
+    assert ("R1", "network.device.up", 1, 50) in items
+    assert ("R1", "network.device.uptime", 12, 50) in items
+    assert ("R1", "network.if.status[Gi0/0]", 1, 50) in items
+    assert ("R1", "network.if.in_octets[Gi0/0]", 10, 50) in items
+    assert not any(key == "network.if.out_errors[Gi0/0]" for _, key, _, _ in items)
+    assert [item[1:3] for item in items if item[0] == "R2"] == [("network.device.up", 0)]
+
+def test_report_sends_in_background(trapper, monkeypatch):
+    settings = {"enabled": True, "server": "127.0.0.1", "port": trapper.port}
+    monkeypatch.setattr(zabbix_sender, "zabbix_settings", lambda: settings)
+    future = zabbix_sender.report("backup_device_config", [("R1", "/tmp/x.gz", None)])
+    assert future.result(timeout=5)["processed"] == 4
+    assert {item["key"] for item in trapper.requests[0]["data"]} == {
+        "network.run.ok[backup_device_config]", "network.ssh.reachable", "network.backup.ok",
+        "network.backup.last"
+    }
+
+def test_report_disabled(monkeypatch):
+    monkeypatch.setattr(zabbix_sender, "zabbix_settings", lambda: {"enabled": False})
+    assert zabbix_sender.report("get_interfaces", [("R1", [], None)]) is None
+    assert zabbix_sender.report_poll({"R1": {"error": "x"}}) is None